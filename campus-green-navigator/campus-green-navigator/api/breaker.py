@@ -0,0 +1,181 @@
+# api/breaker.py
+"""Per-provider circuit breakers.
+
+Each provider (MapmyIndia, the backend at ``CGN_API_BASE_URL``) gets a breaker
+that tracks the outcome of its last ``window`` calls. Once at least
+``min_calls`` are recorded and the failure rate reaches ``failure_rate`` the
+breaker opens and callers skip the provider immediately instead of waiting out
+its timeout. A background probe then checks the provider every few seconds and
+closes the breaker as soon as it answers; without a probe the breaker goes
+half-open after ``open_s`` and lets a single trial call through.
+
+Only outages count as failures (connection errors, timeouts, 429/5xx, garbled
+responses); a 404 for an unknown route means the provider is healthy.
+"""
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import httpx
+import requests
+
+from api import http_pool
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+DEFAULT_OPEN_S = float(os.getenv("CGN_BREAKER_OPEN_S", "30"))
+DEFAULT_PROBE_INTERVAL_S = float(os.getenv("CGN_BREAKER_PROBE_S", "5"))
+
+
+def is_outage(exc: BaseException) -> bool:
+    """Whether an exception means the provider is down rather than the request being bad."""
+    if isinstance(exc, (httpx.TransportError, requests.ConnectionError, requests.Timeout)):
+        return True
+    response = getattr(exc, "response", None)
+    status = getattr(response, "status_code", None)
+    if status is not None:
+        return status >= 500 or status == 429
+    # garbled / unexpected payloads (JSON errors, failed validation)
+    return isinstance(exc, ValueError)
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker over a sliding window of call outcomes."""
+
+    def __init__(self, name: str, window: int = 20, min_calls: int = 3, failure_rate: float = 0.5,
+                 open_s: float = DEFAULT_OPEN_S, probe: Optional[Callable[[], bool]] = None,
+                 probe_interval_s: float = DEFAULT_PROBE_INTERVAL_S):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.open_s = open_s
+        self.probe = probe
+        self.probe_interval_s = probe_interval_s
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self._outcomes: "deque[bool]" = deque(maxlen=window)  # True = failure
+        self._trial_in_flight = False
+        self._probing = False
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {"successes": 0, "failures": 0, "rejected": 0, "opened": 0, "probes": 0}
+
+    def allow(self) -> bool:
+        """Whether a call may go to the provider now."""
+        with self._lock:
+            if self.state == OPEN and time.time() - self.opened_at >= self.open_s:
+                self.state = HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.counters["rejected"] += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.counters["successes"] += 1
+            if self.state != CLOSED:
+                self._close()
+            else:
+                self._outcomes.append(False)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.counters["failures"] += 1
+            self._outcomes.append(True)
+            if self.state == HALF_OPEN:
+                self._open()
+            elif self.state == CLOSED and len(self._outcomes) >= self.min_calls:
+                if sum(self._outcomes) / len(self._outcomes) >= self.failure_rate:
+                    self._open()
+
+    @contextmanager
+    def guard(self) -> Iterator[None]:
+        """Record the outcome of the wrapped call; exceptions propagate."""
+        try:
+            yield
+        except Exception as exc:
+            if is_outage(exc):
+                self.record_failure()
+            else:
+                self.record_success()
+            raise
+        else:
+            self.record_success()
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self.opened_at = time.time()
+        self._trial_in_flight = False
+        self.counters["opened"] += 1
+        if self.probe is not None and not self._probing:
+            self._probing = True
+            threading.Thread(target=self._probe_loop, name=f"cgn-breaker-{self.name}", daemon=True).start()
+
+    def _close(self) -> None:
+        self.state = CLOSED
+        self._outcomes.clear()
+        self._trial_in_flight = False
+
+    def _probe_loop(self) -> None:
+        while True:
+            time.sleep(self.probe_interval_s)
+            with self._lock:
+                if self.state == CLOSED:
+                    self._probing = False
+                    return
+                self.counters["probes"] += 1
+            try:
+                healthy = bool(self.probe())  # type: ignore[misc]
+            except Exception:
+                healthy = False
+            if healthy:
+                with self._lock:
+                    self._close()
+                    self._probing = False
+                return
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            window = len(self._outcomes)
+            return dict(
+                self.counters,
+                state=self.state,
+                window_failure_rate=(sum(self._outcomes) / window) if window else 0.0,
+                open_for_s=round(time.time() - self.opened_at, 1) if self.state != CLOSED else 0.0,
+            )
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+
+def get_breaker(name: str, **settings: Any) -> CircuitBreaker:
+    """The process-wide breaker for ``name``; ``settings`` only apply on first use."""
+    with _registry_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name, **settings)
+        return breaker
+
+
+def breaker_states() -> Dict[str, Dict[str, Any]]:
+    """Snapshot of every breaker, for status displays."""
+    with _registry_lock:
+        breakers = list(_breakers.values())
+    return {b.name: b.snapshot() for b in breakers}
+
+
+def http_probe(url: str, timeout: float = 2.0) -> Callable[[], bool]:
+    """Probe that treats any non-5xx answer from ``url`` as healthy."""
+    def _probe() -> bool:
+        return http_pool.get(url, timeout=timeout).status_code < 500
+
+    return _probe
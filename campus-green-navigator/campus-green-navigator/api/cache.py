@@ -0,0 +1,147 @@
+# api/cache.py
+"""Two-tier cache: a bounded in-process LRU with TTL in front of SQLite.
+
+The memory tier answers repeat lookups within one process (every Streamlit
+rerun); the SQLite tier survives restarts and is shared between worker
+processes on the same machine (WAL mode, so readers don't block the writer).
+If the database can't be opened the cache quietly runs memory-only.
+
+Values go to disk through the ``dumps`` / ``loads`` hooks (JSON by default).
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+DEFAULT_CACHE_DB = os.getenv(
+    "CGN_CACHE_DB",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "cache.sqlite3"),
+)
+
+
+class TieredCache:
+    """String-keyed cache with per-entry expiry, backed by one SQLite table."""
+
+    def __init__(self, table: str, db_path: Optional[str] = DEFAULT_CACHE_DB, max_entries: int = 256,
+                 ttl_s: float = 24 * 3600.0, dumps: Callable[[Any], str] = json.dumps,
+                 loads: Callable[[str], Any] = json.loads):
+        if not table.isidentifier():
+            raise ValueError(f"Invalid cache table name: {table!r}")
+        self.table = table
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._dumps = dumps
+        self._loads = loads
+        # key -> (expires_at, value), least recently used first
+        self._mem: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.counters: Dict[str, int] = {
+            "memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "expired": 0, "writes": 0,
+        }
+
+    def _conn(self) -> Optional[sqlite3.Connection]:
+        if self._db is None and self.db_path:
+            try:
+                os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+                db = sqlite3.connect(self.db_path, timeout=5, isolation_level=None, check_same_thread=False)
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute(
+                    f"CREATE TABLE IF NOT EXISTS {self.table} "
+                    "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+                self._db = db
+            except (OSError, sqlite3.Error):
+                self.db_path = None  # memory-only from here on
+        return self._db
+
+    def _remember(self, key: str, expires_at: float, value: Any) -> None:
+        self._mem[key] = (expires_at, value)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def get(self, key: str, default: Any = None) -> Any:
+        now = time.time()
+        with self._lock:
+            hit = self._mem.get(key)
+            if hit is not None:
+                if hit[0] > now:
+                    self._mem.move_to_end(key)
+                    self.counters["memory_hits"] += 1
+                    return hit[1]
+                del self._mem[key]
+                self.counters["expired"] += 1
+            db = self._conn()
+            if db is not None:
+                try:
+                    row = db.execute(f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)).fetchone()
+                    if row is not None and row[1] > now:
+                        value = self._loads(row[0])
+                        self._remember(key, row[1], value)
+                        self.counters["disk_hits"] += 1
+                        return value
+                    if row is not None:
+                        db.execute(f"DELETE FROM {self.table} WHERE key = ? AND expires_at <= ?", (key, now))
+                        self.counters["expired"] += 1
+                except (sqlite3.Error, ValueError):
+                    pass
+            self.counters["misses"] += 1
+            return default
+
+    def set(self, key: str, value: Any, ttl_s: Optional[float] = None) -> None:
+        expires_at = time.time() + (self.ttl_s if ttl_s is None else ttl_s)
+        with self._lock:
+            self._remember(key, expires_at, value)
+            self.counters["writes"] += 1
+            db = self._conn()
+            if db is not None:
+                try:
+                    db.execute(
+                        f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+                        (key, self._dumps(value), expires_at),
+                    )
+                except sqlite3.Error:
+                    pass
+
+    def invalidate(self, key: str) -> None:
+        """Drop one key from both tiers."""
+        with self._lock:
+            self._mem.pop(key, None)
+            db = self._conn()
+            if db is not None:
+                try:
+                    db.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                except sqlite3.Error:
+                    pass
+
+    def clear(self) -> None:
+        """Drop every entry from both tiers."""
+        with self._lock:
+            self._mem.clear()
+            db = self._conn()
+            if db is not None:
+                try:
+                    db.execute(f"DELETE FROM {self.table}")
+                except sqlite3.Error:
+                    pass
+
+    def purge_expired(self) -> int:
+        """Delete expired rows from disk; returns how many were removed."""
+        with self._lock:
+            db = self._conn()
+            if db is None:
+                return 0
+            try:
+                return db.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (time.time(),)).rowcount
+            except sqlite3.Error:
+                return 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.counters, memory_entries=len(self._mem), persistent=self.db_path is not None)
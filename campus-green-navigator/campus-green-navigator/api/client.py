@@ -1,99 +1,298 @@
+import asyncio
+import json
 import os
-import requests
-from typing import Any, Dict
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-from data import campus_data
+from api import http_pool
+from api.breaker import breaker_states, get_breaker, http_probe
+from api.cache import TieredCache
+from api.singleflight import SingleFlight, coalescing_stats
+from ml.forecast_table import load_table
+from ml.model_registry import PARKING_MODEL_PATH
+from routing.graph import find_route
+from routing.matrix import get_route_matrix, iter_batch_rows
+from routing.pareto import find_pareto_routes
+from routing.spatial import resolve_location
+from routing.timedep import DEFAULT_BUCKET_MIN, find_route_at, week_minute
+from utils.geometry import as_geometry, jsonable_route
 
 BASE_URL = os.getenv("CGN_API_BASE_URL", "http://localhost:8000")
+# a refused connection means the backend is down, and a hung one won't answer a retry
+# either: fall back locally at once rather than block the UI for several timeouts
+http_pool.configure_host(BASE_URL, connect_retries=0, read_retries=0)
+
+# skip a provider that is known to be down; a background probe re-enables it
+backend_breaker = get_breaker("backend", probe=http_probe(f"{BASE_URL}/health"))
+mapmyindia_breaker = get_breaker("mapmyindia", probe=http_probe(os.getenv("CGN_MAPMYINDIA_URL") or "https://outpost.mapmyindia.com"))
+
+
+ROUTE_CACHE_TTL_S = float(os.getenv("CGN_ROUTE_CACHE_TTL_S", str(24 * 3600)))
+# routes served by a fallback are kept briefly so the preferred provider is retried soon
+FALLBACK_ROUTE_TTL_S = 120.0
 
 
 def _has_mapmyindia_creds() -> bool:
     return bool(os.getenv("MAPMYINDIA_CLIENT_ID") and os.getenv("MAPMYINDIA_CLIENT_SECRET"))
 
 
-def get_route(start: str, end: str) -> Dict[str, Any]:
-    """Get route using MapmyIndia if configured; else prefer backend mock API; finally fallback to local campus_data."""
+def _route_to_json(route: Dict[str, Any]) -> str:
+    return json.dumps(jsonable_route(route))
+
+
+def _route_from_json(text: str) -> Dict[str, Any]:
+    route = json.loads(text)
+    for key in ("fast", "eco"):
+        if isinstance(route.get(key), dict):
+            route[key]["geometry"] = as_geometry(route[key].get("geometry"))
+    for alt in route.get("alternatives") or []:
+        alt["geometry"] = as_geometry(alt.get("geometry"))
+    return route
+
+
+# identical concurrent lookups share one upstream call
+route_flights = SingleFlight("client.route")
+parking_flights = SingleFlight("client.parking")
+
+route_cache = TieredCache("routes", max_entries=512, ttl_s=ROUTE_CACHE_TTL_S, dumps=_route_to_json, loads=_route_from_json)
+
+
+def _preferred_provider() -> str:
+    return "mapmyindia" if _has_mapmyindia_creds() else "backend"
+
+
+def _normalize_place(place: str) -> str:
+    return ",".join(" ".join(part.split()) for part in place.casefold().split(","))
+
+
+def route_cache_key(start: str, end: str, provider: str, depart: Optional[datetime] = None) -> str:
+    key = f"{_normalize_place(start)}|{_normalize_place(end)}|{provider}"
+    if depart is not None:
+        key += f"@{int(week_minute(depart) // DEFAULT_BUCKET_MIN)}"
+    return key
+
+
+def invalidate_route_cache(start: Optional[str] = None, end: Optional[str] = None) -> None:
+    """Forget cached routes: one pair (every provider), or everything when no pair is given."""
+    if start is None or end is None:
+        route_cache.clear()
+        return
+    for provider in ("mapmyindia", "backend"):
+        route_cache.invalidate(route_cache_key(start, end, provider))
+
+
+def route_cache_stats() -> Dict[str, Any]:
+    """Hit/miss/eviction counters of the route cache."""
+    return route_cache.stats()
+
+
+def provider_status() -> Dict[str, Dict[str, Any]]:
+    """Circuit-breaker state and counts per provider."""
+    return breaker_states()
+
+
+def request_coalescing_stats() -> Dict[str, Dict[str, Any]]:
+    """Calls made and calls collapsed into another identical in-flight call."""
+    return coalescing_stats()
+
+
+async def get_route_async(start: str, end: str, depart: Optional[datetime] = None, use_cache: bool = True) -> Dict[str, Any]:
+    """Get route using MapmyIndia if configured; else prefer backend mock API; finally fallback to local campus_data.
+
+    With `depart`, backend and local routes use time-dependent travel times for that departure.
+    Results are cached per (start, end, preferred provider[, departure bucket]).
+    The returned route's `source` says which provider answered; `cached` is set on cache hits.
+    """
+    provider = _preferred_provider()
+    key = route_cache_key(start, end, provider, depart)
+    if use_cache:
+        # cache lookups (SQLite) and local routing block: run them off the shared event loop
+        cached = await asyncio.to_thread(route_cache.get, key)
+        if cached is not None:
+            return dict(cached, from_loc=start, to_loc=end, cached=True)
+    route = await route_flights.do_async(key, lambda: _fetch_and_cache(key, start, end, depart, provider))
+    return dict(route, from_loc=start, to_loc=end)
+
+
+async def _fetch_and_cache(key: str, start: str, end: str, depart: Optional[datetime], provider: str) -> Dict[str, Any]:
+    route, source = await _fetch_route(start, end, depart)
+    route = dict(route, source=source)
+    await asyncio.to_thread(route_cache.set, key, route, ttl_s=None if source == provider else FALLBACK_ROUTE_TTL_S)
+    return route
+
+
+async def _fetch_route(start: str, end: str, depart: Optional[datetime]) -> Tuple[Dict[str, Any], str]:
+    """Live lookup down the provider chain; returns the route and which source answered.
+
+    Providers whose circuit breaker is open are skipped without a request.
+    """
     # Prefer MapmyIndia when credentials are present
     if _has_mapmyindia_creds():
-        try:
-            from api.mapmyindia import directions as _mmi_directions
+        from api.mapmyindia import directions_async as _mmi_directions
 
-            return _mmi_directions(start, end)
-        except Exception:
-            # fall through to try mock server
-            pass
+        if mapmyindia_breaker.allow():
+            try:
+                with mapmyindia_breaker.guard():
+                    return await _mmi_directions(start, end), "mapmyindia"
+            except Exception:
+                # fall through to try mock server
+                pass
 
     # Try backend/mock server
-    try:
-        resp = requests.get(f"{BASE_URL}/route", params={"start": start, "end": end}, timeout=3)
-        resp.raise_for_status()
-        data = resp.json()
-        # Validate that the backend/mock returned the expected structure. If not,
-        # treat it as an error so we can fallback to the local campus_data.
-        if not isinstance(data, dict) or not all(k in data for k in ("from_loc", "to_loc", "fast", "eco")):
-            raise ValueError("Invalid route response from backend")
-        return data
-    except Exception:
-        # local fallback in-process
-        for r in campus_data.ROUTES:
-            if (r["from"] == start and r["to"] == end) or (r["from"] == end and r["to"] == start):
-                # Ensure geometry exists for map rendering. If missing, synthesize a simple
-                # straight-line geometry using campus_data.LOCATIONS coordinates.
-                def _coord_for(name):
-                    v = campus_data.LOCATIONS.get(name)
-                    if isinstance(v, (list, tuple)) and len(v) >= 2:
-                        return [float(v[0]), float(v[1])]
-                    if isinstance(v, dict):
-                        # support {'lat':.., 'lon':..}
-                        lat = v.get('lat') or v.get('latitude') or v.get('y')
-                        lon = v.get('lon') or v.get('longitude') or v.get('x')
-                        if lat is not None and lon is not None:
-                            return [float(lat), float(lon)]
-                    return None
-
-                s_coords = _coord_for(r['from'])
-                e_coords = _coord_for(r['to'])
-
-                def _ensure_geom(obj):
-                    try:
-                        geom = obj.get('geometry')
-                        if isinstance(geom, (list, tuple)) and len(geom) > 0:
-                            return obj
-                    except Exception:
-                        pass
-                    # synthesize a 3-point polyline if we have both endpoints
-                    if s_coords and e_coords:
-                        mid = [(s_coords[0] + e_coords[0]) / 2.0, (s_coords[1] + e_coords[1]) / 2.0]
-                        new = dict(obj)
-                        new['geometry'] = [s_coords, mid, e_coords]
-                        return new
-                    # if only start known, return single-point geometry
-                    if s_coords:
-                        new = dict(obj)
-                        new['geometry'] = [s_coords]
-                        return new
-                    return obj
-
-                fast = _ensure_geom(r['fast'])
-                eco = _ensure_geom(r['eco'])
-                return {"from_loc": start, "to_loc": end, "fast": fast, "eco": eco}
-        raise
+    error: Optional[Exception] = None
+    if backend_breaker.allow():
+        try:
+            with backend_breaker.guard():
+                # ask for encoded-polyline geometry; it is decoded once, straight into a Geometry
+                params = {"start": start, "end": end, "geometry": "polyline"}
+                if depart is not None:
+                    params["depart"] = depart.isoformat()
+                resp = await http_pool.async_get(f"{BASE_URL}/route", params=params, timeout=3)
+                resp.raise_for_status()
+                data = resp.json()
+                # Validate that the backend/mock returned the expected structure. If not,
+                # treat it as an error so we can fallback to the local campus_data.
+                if not isinstance(data, dict) or not all(k in data for k in ("from_loc", "to_loc", "fast", "eco")):
+                    raise ValueError("Invalid route response from backend")
+                for key in ("fast", "eco"):
+                    if isinstance(data[key], dict):
+                        data[key]["geometry"] = as_geometry(data[key].get("geometry"))
+                return data, "backend"
+        except Exception as exc:
+            error = exc
+    route = await asyncio.to_thread(_local_route, start, end, depart)
+    if route is None:
+        raise error or LookupError(f"No route between {start} and {end}")
+    return route, "local"
+
+
+def get_route(start: str, end: str, depart: Optional[datetime] = None, use_cache: bool = True) -> Dict[str, Any]:
+    return http_pool.run_sync(get_route_async(start, end, depart, use_cache))
+
+
+async def get_routes_async(pairs: Sequence[Sequence[str]], depart: Optional[datetime] = None,
+                           limit: int = http_pool.DEFAULT_POOL_MAXSIZE) -> List[Any]:
+    """Full routes (with geometry) for many (start, end) pairs, at most `limit` in flight.
+
+    Failed pairs come back as the exception instead of a route.
+    """
+    return await http_pool.gather_bounded((get_route_async(p[0], p[1], depart) for p in pairs), limit, return_exceptions=True)
+
+
+def _local_route(start: str, end: str, depart: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+    """In-process route: snap raw 'lat,lon' input to campus nodes, then index into
+    the precomputed route matrix, falling back to a graph search for names the
+    matrix doesn't know. A departure time routes on the time-dependent profiles."""
+    s = resolve_location(start) or start
+    e = resolve_location(end) or end
+    if depart is not None:
+        route = find_route_at(s, e, depart)
+    else:
+        route = get_route_matrix().route(s, e) or find_route(s, e)
+    if route is None:
+        return None
+    return dict(route, from_loc=start, to_loc=end)
+
+
+def get_route_alternatives(start: str, end: str, vehicle: str = "Car") -> Dict[str, Any]:
+    """Get the full time/CO2 trade-off set of routes from the backend, else compute it locally."""
+    error: Optional[Exception] = None
+    if backend_breaker.allow():
+        try:
+            with backend_breaker.guard():
+                resp = http_pool.get(f"{BASE_URL}/route/pareto", params={"start": start, "end": end, "vehicle": vehicle}, timeout=3)
+                resp.raise_for_status()
+                data = resp.json()
+                if not isinstance(data, dict) or not isinstance(data.get("routes"), list):
+                    raise ValueError("Invalid pareto response from backend")
+                return data
+        except Exception as exc:
+            error = exc
+    out = find_pareto_routes(start, end, vehicle)
+    if out is None:
+        raise error or LookupError(f"No route between {start} and {end}")
+    return out
+
+
+def get_routes_batch(pairs: Sequence[Sequence[str]], vehicle: str = "Car", stream: bool = False, chunk_size: int = 5000) -> List[Dict[str, Any]]:
+    """Get fast/eco distance, time and CO2 for many (start, end[, vehicle]) pairs.
+
+    Pairs are sent to the backend's POST /routes/batch in chunks of
+    `chunk_size`; with `stream=True` the backend answers in NDJSON and lines are
+    parsed as they arrive. If the backend is unavailable the rest is computed
+    locally from the route matrix in one vectorized pass per chunk.
+    """
+    rows = [(p[0], p[1], p[2] if len(p) > 2 else vehicle) for p in pairs]
+    out: List[Dict[str, Any]] = []
+    use_backend = True
+    for c in range(0, len(rows), chunk_size):
+        chunk = rows[c:c + chunk_size]
+        if use_backend and backend_breaker.allow():
+            try:
+                with backend_breaker.guard():
+                    out.extend(_routes_batch_remote(chunk, stream))
+                continue
+            except Exception:
+                use_backend = False
+        starts, ends, vehicles = (list(col) for col in zip(*chunk))
+        columns = get_route_matrix().lookup_batch(starts, ends, vehicles, resolve=resolve_location)
+        out.extend(iter_batch_rows(starts, ends, vehicles, columns))
+    return out
+
+
+def _routes_batch_remote(chunk: Sequence[Sequence[str]], stream: bool) -> List[Dict[str, Any]]:
+    body = {"pairs": [{"start": s, "end": e, "vehicle": v} for s, e, v in chunk], "stream": stream}
+    resp = http_pool.post(f"{BASE_URL}/routes/batch", json=body, timeout=30, stream=stream)
+    resp.raise_for_status()
+    if stream:
+        results = [json.loads(line) for line in resp.iter_lines() if line]
+    else:
+        results = resp.json().get("results")
+    if not isinstance(results, list) or len(results) != len(chunk):
+        raise ValueError("Invalid batch route response from backend")
+    return results
 
 
 def get_parking(hours: int = 6) -> Dict[str, Any]:
+    return parking_flights.do(hours, lambda: _fetch_parking(hours))
+
+
+def _fetch_parking(hours: int) -> Dict[str, Any]:
     try:
-        resp = requests.get(f"{BASE_URL}/parking", params={"hours": hours}, timeout=3)
-        resp.raise_for_status()
-        return resp.json()
+        if not backend_breaker.allow():
+            raise ConnectionError("backend circuit open")
+        with backend_breaker.guard():
+            resp = http_pool.get(f"{BASE_URL}/parking", params={"hours": hours}, timeout=3)
+            resp.raise_for_status()
+            return resp.json()
     except Exception:
-        # fallback: quick synthetic pattern
+        # fallback: the local hour-of-week forecast table if there is one, else a quick synthetic pattern
         import numpy as np
         from datetime import datetime, timedelta
 
-        out = []
         now = datetime.now()
+        table = _local_parking_table()
+        if table is not None:
+            return {"hours": table.forecast(now, hours)}
+        out = []
         for i in range(hours):
             t = now + timedelta(hours=i)
             val = 0.5 + 0.4 * np.sin(2 * np.pi * (t.hour) / 24.0)
             out.append({"hour": t.strftime("%Y-%m-%d %H:%M"), "predicted_occupancy": float(val), "uncertainty_std": 0.05})
         return {"hours": out}
+
+
+def _local_parking_table():
+    """The forecast table next to the local parking model, if it matches that model."""
+    try:
+        mtime_ns = os.stat(PARKING_MODEL_PATH).st_mtime_ns
+    except OSError:
+        return None
+    return _load_parking_table(PARKING_MODEL_PATH, mtime_ns)
+
+
+@lru_cache(maxsize=1)
+def _load_parking_table(model_path: str, mtime_ns: int):
+    # keyed on the artifact's mtime, so a retrained model's table is picked up
+    return load_table(model_path)
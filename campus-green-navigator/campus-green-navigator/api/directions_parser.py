@@ -0,0 +1,237 @@
+# api/directions_parser.py
+"""Streaming, field-selective parser for MapmyIndia directions responses.
+
+A route_adv answer carries maneuvers, instructions, annotations and names that
+the app never reads; only each route's distance, duration and geometry are
+kept. With ``ijson`` installed the body is parsed incrementally as it arrives,
+coordinates go straight into a growing flat float64 buffer and nothing else is
+materialised. Without it the body is decoded with ``json`` and the same fields
+are picked out of the result.
+
+Every route in the answer is returned (alternatives included), in order, as
+``{"distance_m", "duration_s", "geometry"}``. Route geometry may be a
+LineString, a MultiLineString (lines joined end to end) or an encoded
+polyline; without one the step geometries of every leg are joined.
+"""
+import json
+from array import array
+from typing import Any, AsyncIterable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from utils.geometry import Geometry
+
+try:
+    import ijson
+except ImportError:  # optional: fall back to a full json decode
+    ijson = None  # type: ignore[assignment]
+
+# where route objects can sit: a list of routes, or a GeoJSON FeatureCollection
+ROUTE_PREFIXES = ("routes.item", "features.item", "routes.features.item")
+
+_ROUTE_COORDS = ("geometry.coordinates.item.item", "geometry.coordinates.item.item.item")
+_STEP_COORDS = tuple("legs.item.steps.item." + p for p in _ROUTE_COORDS)
+# numbers kept, by prefix relative to the route object
+_NUMBERS = dict(
+    {p: "coords" for p in _ROUTE_COORDS},
+    **{p: "steps" for p in _STEP_COORDS},
+    **{"distance": "distance", "duration": "duration",
+       "properties.distance": "props_distance", "properties.duration": "props_duration"},
+)
+_POLYLINES = {"geometry": "coords", "legs.item.steps.item.geometry": "steps"}
+# arrays that open one [lon, lat] point (or a line of them)
+_POINT_STARTS = frozenset(p[:-5] for p in _ROUTE_COORDS + _STEP_COORDS)
+
+
+def _absolute(prefix: str) -> Tuple[Dict[str, str], Dict[str, str], frozenset]:
+    return (
+        {f"{prefix}.{k}": v for k, v in _NUMBERS.items()},
+        {f"{prefix}.{k}": v for k, v in _POLYLINES.items()},
+        frozenset(f"{prefix}.{k}" for k in _POINT_STARTS),
+    )
+
+
+_BY_ROUTE_PREFIX = {p: _absolute(p) for p in ROUTE_PREFIXES}
+
+
+class _CoordBuffer:
+    """Growing ``(lat, lon)`` rows in one flat double array.
+
+    ``array.array`` appends are cheap and over-allocate, so streamed points
+    are written in place; the finished buffer is exposed to numpy without a
+    copy.
+    """
+
+    __slots__ = ("buf",)
+
+    def __init__(self) -> None:
+        self.buf = array("d")
+
+    def __len__(self) -> int:
+        return len(self.buf) // 2
+
+    def extend(self, latlon: np.ndarray) -> None:
+        self.buf.frombytes(np.ascontiguousarray(latlon, dtype=np.float64).tobytes())
+
+    def geometry(self) -> Geometry:
+        return Geometry(np.frombuffer(self.buf, dtype=np.float64))
+
+
+class _RouteFields:
+    """Selected fields of one route while its events stream past."""
+
+    __slots__ = ("distance", "duration", "props_distance", "props_duration", "coords", "steps")
+
+    def __init__(self) -> None:
+        self.distance: Optional[float] = None
+        self.duration: Optional[float] = None
+        self.props_distance: Optional[float] = None
+        self.props_duration: Optional[float] = None
+        self.coords = _CoordBuffer()
+        self.steps = _CoordBuffer()
+
+    def result(self, top: Dict[str, float]) -> Dict[str, Any]:
+        dist = self.distance or self.props_distance or top.get("distance") or 0
+        dur = self.duration or self.props_duration or top.get("duration") or 0
+        geometry = (self.coords if len(self.coords) else self.steps).geometry()
+        return {"distance_m": float(dist), "duration_s": float(dur), "geometry": geometry}
+
+
+class _EventParser:
+    """Consumes ``(prefix, event, value)`` events from ``ijson.parse``."""
+
+    def __init__(self) -> None:
+        self.routes: List[_RouteFields] = []
+        self.top: Dict[str, float] = {}
+        self._route: Optional[_RouteFields] = None
+        self._prefix = ""
+        self._numbers: Dict[str, str] = {}
+        self._polylines: Dict[str, str] = {}
+        self._point_starts: frozenset = frozenset()
+        self._lon = 0.0
+        self._pos = 0
+
+    def feed(self, events: Iterable[Tuple[str, str, Any]]) -> None:
+        route = self._route
+        numbers, point_starts = self._numbers, self._point_starts
+        lon, pos = self._lon, self._pos
+        for prefix, event, value in events:
+            if route is None:
+                if event == "start_map" and prefix in _BY_ROUTE_PREFIX:
+                    route = self._route = _RouteFields()
+                    self._prefix = prefix
+                    numbers, self._polylines, point_starts = _BY_ROUTE_PREFIX[prefix]
+                elif event == "number" and prefix in ("distance", "duration"):
+                    self.top[prefix] = float(value)
+                continue
+            if event == "number":
+                field = numbers.get(prefix)
+                if field is None:
+                    continue
+                if field == "coords" or field == "steps":
+                    # coordinates are [lon, lat(, alt)]; store (lat, lon)
+                    if pos == 0:
+                        lon = value
+                    elif pos == 1:
+                        buf = (route.coords if field == "coords" else route.steps).buf
+                        buf.append(value)
+                        buf.append(lon)
+                    pos += 1
+                else:
+                    setattr(route, field, float(value))
+            elif event == "start_array":
+                if prefix in point_starts:
+                    pos = 0
+            elif event == "string":
+                field = self._polylines.get(prefix)
+                if field is not None:
+                    getattr(route, field).extend(Geometry.from_polyline(value).coords)
+            elif event == "end_map" and prefix == self._prefix:
+                self.routes.append(route)
+                route = self._route = None
+        self._numbers, self._point_starts = numbers, point_starts
+        self._lon, self._pos = lon, pos
+
+    def results(self) -> List[Dict[str, Any]]:
+        return [r.result(self.top) for r in self.routes]
+
+
+def _lonlat_rows(coords: Any) -> np.ndarray:
+    """``[lon, lat]`` pairs (or lists of them) as ``(lat, lon)`` rows."""
+    if not coords:
+        return np.empty((0, 2))
+    if isinstance(coords[0][0], (list, tuple)):
+        return np.concatenate([_lonlat_rows(line) for line in coords])
+    return np.asarray(coords, dtype=np.float64)[:, 1::-1]
+
+
+def _geometry_rows(geom: Any) -> Optional[np.ndarray]:
+    if isinstance(geom, str):
+        return Geometry.from_polyline(geom).coords
+    if isinstance(geom, dict) and geom.get("coordinates"):
+        return _lonlat_rows(geom["coordinates"])
+    return None
+
+
+def parse_directions_json(j: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Selected fields of every route in an already decoded response."""
+    routes = j.get("routes") or j.get("features") or []
+    if isinstance(routes, dict):
+        routes = routes.get("features") or []
+    top = {k: j[k] for k in ("distance", "duration") if isinstance(j.get(k), (int, float))}
+    out = []
+    for r in routes if isinstance(routes, list) else []:
+        fields = _RouteFields()
+        props = r.get("properties") or {}
+        fields.distance, fields.duration = r.get("distance"), r.get("duration")
+        fields.props_distance, fields.props_duration = props.get("distance"), props.get("duration")
+        rows = _geometry_rows(r.get("geometry"))
+        if rows is not None:
+            fields.coords.extend(rows)
+        else:
+            for leg in r.get("legs") or []:
+                for step in leg.get("steps") or []:
+                    rows = _geometry_rows(step.get("geometry"))
+                    if rows is not None:
+                        fields.steps.extend(rows)
+        out.append(fields.result(top))
+    return out
+
+
+def parse_directions_chunks(chunks: Iterable[bytes]) -> List[Dict[str, Any]]:
+    """Parse a response body given as an iterable of byte chunks."""
+    if ijson is None:
+        return parse_directions_json(json.loads(b"".join(chunks)))
+    parser = _EventParser()
+    events = ijson.sendable_list()
+    coro = ijson.parse_coro(events, use_float=True)
+    for chunk in chunks:
+        coro.send(chunk)
+        parser.feed(events)
+        del events[:]
+    coro.close()
+    parser.feed(events)
+    return parser.results()
+
+
+async def parse_directions_stream(chunks: AsyncIterable[bytes]) -> List[Dict[str, Any]]:
+    """Like ``parse_directions_chunks`` for an async byte stream."""
+    if ijson is None:
+        return parse_directions_json(json.loads(b"".join([c async for c in chunks])))
+    parser = _EventParser()
+    events = ijson.sendable_list()
+    coro = ijson.parse_coro(events, use_float=True)
+    async for chunk in chunks:
+        coro.send(chunk)
+        parser.feed(events)
+        del events[:]
+    coro.close()
+    parser.feed(events)
+    return parser.results()
+
+
+async def read_directions(resp: Any) -> List[Dict[str, Any]]:
+    """Parse a directions response, streaming its body when it has one to stream."""
+    if hasattr(resp, "aiter_bytes"):
+        return await parse_directions_stream(resp.aiter_bytes())
+    return parse_directions_json(resp.json())
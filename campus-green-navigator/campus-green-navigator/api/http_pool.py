@@ -0,0 +1,272 @@
+# api/http_pool.py
+"""Shared keep-alive HTTP session for backend and MapmyIndia calls.
+
+Every outbound call goes through one process-wide ``requests.Session`` so TCP
+and TLS connections are pooled and reused across route, geocode, token and
+parking requests. Each host gets its own connection pool, sized per host, and
+transient failures (connection errors, 429 and 5xx) are retried a bounded
+number of times with jittered exponential backoff; ``Retry-After`` is honoured.
+
+``pool_stats()`` / ``connection_reuse()`` report how many requests were served
+over reused connections.
+
+The asyncio side (``async_get`` / ``async_post``) uses ``httpx`` with the same
+per-host pool sizes and retry policy, one client per event loop and host.
+Blocking callers share a single background event loop through ``run_sync``,
+so sync wrappers don't need a thread per request.
+"""
+import asyncio
+import os
+import random
+import threading
+import weakref
+from typing import Any, Awaitable, Dict, Iterable, List, Optional, TypeVar
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_POOL_MAXSIZE = int(os.getenv("CGN_HTTP_POOL_MAXSIZE", "10"))
+DEFAULT_RETRIES = int(os.getenv("CGN_HTTP_RETRIES", "2"))
+# sleep before retry n is about BACKOFF_FACTOR * 2**(n-1) + uniform(0, BACKOFF_JITTER) seconds
+BACKOFF_FACTOR = 0.2
+BACKOFF_JITTER = 0.1
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# url prefix -> pool settings; a directions() call bursts two geocodes and a
+# route request, while tokens are fetched rarely
+HOST_POOLS: Dict[str, Dict[str, Any]] = {
+    "https://atlas.mapmyindia.com": {"pool_maxsize": 10},
+    "https://apis.mapmyindia.com": {"pool_maxsize": 10},
+    # token requests are the only POSTs that are safe to repeat
+    "https://outpost.mapmyindia.com": {"pool_maxsize": 2, "retry_post": True},
+}
+
+_lock = threading.Lock()
+_session: Optional[requests.Session] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+# event loop -> {url prefix: client}; httpx clients can't cross event loops
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]" = weakref.WeakKeyDictionary()
+
+T = TypeVar("T")
+
+
+def _retry(retries: int, connect_retries: Optional[int] = None, read_retries: Optional[int] = None,
+           status_retries: Optional[int] = None, retry_post: bool = False) -> Retry:
+    return Retry(
+        total=retries,
+        connect=retries if connect_retries is None else connect_retries,
+        read=retries if read_retries is None else read_retries,
+        status=retries if status_retries is None else status_retries,
+        backoff_factor=BACKOFF_FACTOR,
+        backoff_jitter=BACKOFF_JITTER,
+        status_forcelist=RETRY_STATUSES,
+        # a POST is only repeated where the host says it's safe (provider tokens)
+        allowed_methods=frozenset({"GET", "POST"} if retry_post else {"GET"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,  # hand back the last response; callers raise_for_status()
+    )
+
+
+def _adapter(pool_maxsize: int = DEFAULT_POOL_MAXSIZE, retries: int = DEFAULT_RETRIES,
+             **retry_settings: Any) -> HTTPAdapter:
+    return HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=_retry(retries, **retry_settings))
+
+
+def configure_host(prefix: str, **settings: Any) -> None:
+    """Set pool size / retries for URLs starting with ``prefix``.
+
+    Accepts ``pool_maxsize``, ``retries``, per-kind limits ``connect_retries``,
+    ``read_retries`` and ``status_retries`` (default: ``retries``), and
+    ``retry_post`` (repeat failed POSTs too; off by default). Takes effect on
+    the shared session immediately.
+    """
+    with _lock:
+        HOST_POOLS[prefix] = dict(HOST_POOLS.get(prefix, {}), **settings)
+        if _session is not None:
+            _session.mount(prefix, _adapter(**HOST_POOLS[prefix]))
+
+
+def get_session() -> requests.Session:
+    """The process-wide session, created on first use."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                session = requests.Session()
+                session.mount("http://", _adapter())
+                session.mount("https://", _adapter())
+                for prefix, settings in HOST_POOLS.items():
+                    session.mount(prefix, _adapter(**settings))
+                _session = session
+    return _session
+
+
+def reset_session() -> None:
+    """Close every pooled connection and start over (e.g. after fork)."""
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def request(method: str, url: str, **kwargs: Any) -> requests.Response:
+    return get_session().request(method, url, **kwargs)
+
+
+def get(url: str, **kwargs: Any) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs: Any) -> requests.Response:
+    return request("POST", url, **kwargs)
+
+
+def pool_stats() -> List[Dict[str, Any]]:
+    """Per-host pool counters: requests sent and new connections opened."""
+    if _session is None:
+        return []
+    out = []
+    for adapter in set(_session.adapters.values()):
+        if not isinstance(adapter, HTTPAdapter):
+            continue
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            out.append({
+                "host": f"{pool.scheme}://{pool.host}:{pool.port}",
+                "requests": pool.num_requests,
+                "new_connections": pool.num_connections,
+                "reused": max(0, pool.num_requests - pool.num_connections),
+            })
+    return out
+
+
+def connection_reuse() -> Dict[str, Any]:
+    """Totals over all pools, with the fraction of requests that reused a connection."""
+    stats = pool_stats()
+    sent = sum(s["requests"] for s in stats)
+    reused = sum(s["reused"] for s in stats)
+    return {
+        "requests": sent,
+        "new_connections": sum(s["new_connections"] for s in stats),
+        "reused": reused,
+        "reuse_ratio": reused / sent if sent else 0.0,
+    }
+
+
+def _host_prefix(url: str) -> str:
+    """Longest configured prefix matching ``url``, else its scheme."""
+    best = url.split("://", 1)[0] + "://"
+    for prefix in HOST_POOLS:
+        if url.startswith(prefix) and len(prefix) > len(best):
+            best = prefix
+    return best
+
+
+def _async_client(prefix: str) -> httpx.AsyncClient:
+    clients = _async_clients.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get(prefix)
+    if client is None:
+        size = HOST_POOLS.get(prefix, {}).get("pool_maxsize", DEFAULT_POOL_MAXSIZE)
+        client = clients[prefix] = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=size, max_keepalive_connections=size),
+        )
+    return client
+
+
+def _backoff(attempt: int) -> float:
+    return BACKOFF_FACTOR * (2 ** (attempt - 1)) + random.uniform(0, BACKOFF_JITTER)
+
+
+def _retry_after(resp: httpx.Response) -> Optional[float]:
+    try:
+        return max(0.0, float(resp.headers["Retry-After"]))
+    except (KeyError, ValueError):
+        return None
+
+
+async def async_request(method: str, url: str, stream: bool = False, **kwargs: Any) -> httpx.Response:
+    """Like ``request`` but awaitable, with the same pools and retry policy.
+
+    With ``stream=True`` the body is left unread so it can be consumed with
+    ``aiter_bytes()``; the caller must ``aclose()`` the response.
+    """
+    prefix = _host_prefix(url)
+    settings = HOST_POOLS.get(prefix, {})
+    retries = settings.get("retries", DEFAULT_RETRIES)
+    limits = {kind: retries if settings.get(f"{kind}_retries") is None else settings[f"{kind}_retries"]
+              for kind in ("connect", "read", "status")}
+    # like urllib3: a refused connection never reached the server, anything else is only repeated if safe
+    repeatable = method.upper() != "POST" or settings.get("retry_post", False)
+    client = _async_client(prefix)
+    attempt = 0
+    failures = {"connect": 0, "read": 0, "status": 0}
+    while True:
+        delay = None
+        try:
+            if stream:
+                resp = await client.send(client.build_request(method, url, **kwargs), stream=True)
+            else:
+                resp = await client.request(method, url, **kwargs)
+        except httpx.TransportError as exc:
+            kind = "connect" if isinstance(exc, httpx.ConnectError) else "read"
+            if attempt >= retries or failures[kind] >= limits[kind] or (kind == "read" and not repeatable):
+                raise
+            failures[kind] += 1
+        else:
+            if (resp.status_code not in RETRY_STATUSES or attempt >= retries or not repeatable
+                    or failures["status"] >= limits["status"]):
+                return resp
+            failures["status"] += 1
+            delay = _retry_after(resp)
+            await resp.aclose()
+        attempt += 1
+        await asyncio.sleep(_backoff(attempt) if delay is None else delay)
+
+
+async def async_get(url: str, **kwargs: Any) -> httpx.Response:
+    return await async_request("GET", url, **kwargs)
+
+
+async def async_post(url: str, **kwargs: Any) -> httpx.Response:
+    return await async_request("POST", url, **kwargs)
+
+
+async def gather_bounded(aws: Iterable[Awaitable[T]], limit: int = DEFAULT_POOL_MAXSIZE,
+                         return_exceptions: bool = False) -> List[Any]:
+    """``asyncio.gather`` with at most ``limit`` awaitables in flight."""
+    sem = asyncio.Semaphore(limit)
+
+    async def _one(aw: Awaitable[T]) -> T:
+        async with sem:
+            return await aw
+
+    return await asyncio.gather(*(_one(aw) for aw in aws), return_exceptions=return_exceptions)
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    if _loop is None:
+        with _lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="cgn-http-loop", daemon=True).start()
+                _loop = loop
+    return _loop
+
+
+def run_sync(coro: Awaitable[T]) -> T:
+    """Run ``coro`` on the shared background loop and block for its result."""
+    loop = _background_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        raise RuntimeError("run_sync() called on the HTTP loop thread; await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()  # type: ignore[arg-type]
@@ -1,13 +1,36 @@
+import asyncio
+import json
 import os
+import re
+import threading
 import time
-from typing import Dict, Any, Optional, Tuple, List
-import requests
-
-MAP_TOKEN_INFO = {
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional, Sequence, Tuple
+import httpx
+try:
+    import fcntl
+except ImportError:  # Windows: the shared token store works without the cross-process lock
+    fcntl = None  # type: ignore[assignment]
+from api import http_pool
+from api.cache import TieredCache
+from api.directions_parser import read_directions
+from routing.spatial import parse_latlon
+
+MAP_TOKEN_INFO: Dict[str, Any] = {
     "access_token": None,
     "expires_at": 0,
 }
 
+# Campus place names resolve to the same point for months; failed lookups are
+# remembered briefly so a bad name doesn't hit the (paid) API on every rerun
+GEOCODE_TTL_S = float(os.getenv("CGN_GEOCODE_TTL_S", str(30 * 24 * 3600)))
+GEOCODE_NEGATIVE_TTL_S = float(os.getenv("CGN_GEOCODE_NEGATIVE_TTL_S", "300"))
+# client errors that mean "this query will never geocode", as opposed to outages
+_PERMANENT_STATUSES = (400, 404, 422)
+
+geocode_cache = TieredCache("geocode", max_entries=1024, ttl_s=GEOCODE_TTL_S)
+
 
 def _get_token_from_env() -> Optional[Dict[str, str]]:
     client_id = os.getenv("MAPMYINDIA_CLIENT_ID")
@@ -17,80 +40,159 @@ def _get_token_from_env() -> Optional[Dict[str, str]]:
     return None
 
 
-def fetch_token() -> str:
-    """Fetch OAuth2 client_credentials token from MapmyIndia and cache it in memory."""
-    creds = _get_token_from_env()
-    if creds is None:
-        raise RuntimeError("MapmyIndia credentials not configured in env")
+# Provider hosts. CGN_MAPMYINDIA_URL points all three at one stand-in server
+# (api/mapmyindia_standin.py) for offline load tests.
+MAPMYINDIA_URL = os.getenv("CGN_MAPMYINDIA_URL", "").rstrip("/")
+OUTPOST_URL = MAPMYINDIA_URL or "https://outpost.mapmyindia.com"
+ATLAS_URL = MAPMYINDIA_URL or "https://atlas.mapmyindia.com"
+APIS_URL = MAPMYINDIA_URL or "https://apis.mapmyindia.com"
+if MAPMYINDIA_URL:
+    # token, geocode and route traffic share the stand-in's pool (and token POSTs may be retried)
+    http_pool.configure_host(MAPMYINDIA_URL, pool_maxsize=20, retry_post=True)
 
-    now = time.time()
-    if MAP_TOKEN_INFO["access_token"] and MAP_TOKEN_INFO["expires_at"] > now + 30:
-        return MAP_TOKEN_INFO["access_token"]
+TOKEN_URL = f"{OUTPOST_URL}/api/security/oauth/token"
+GEOCODE_URL = f"{ATLAS_URL}/api/places/geocode"
+ROUTE_BASE_URL = f"{APIS_URL}/advancedmaps/v1"
+# tokens are renewed in the background this long before they expire
+TOKEN_RENEW_BEFORE_S = float(os.getenv("CGN_TOKEN_RENEW_BEFORE_S", "300"))
+# optional JSON file shared by worker processes so only one of them fetches a token
+TOKEN_STORE = os.getenv("CGN_TOKEN_STORE")
 
-    token_url = "https://outpost.mapmyindia.com/api/security/oauth/token"
-    resp = requests.post(token_url, auth=(creds["client_id"], creds["client_secret"]), params={"grant_type": "client_credentials"}, timeout=5)
-    resp.raise_for_status()
-    data = resp.json()
-    access_token = data.get("access_token")
-    expires_in = data.get("expires_in", 3600)
-    MAP_TOKEN_INFO["access_token"] = access_token
-    MAP_TOKEN_INFO["expires_at"] = now + int(expires_in)
-    return access_token
+_token_lock = threading.Lock()
+_token_refresh: Optional["Future[str]"] = None
+_renew_timer: Optional[threading.Timer] = None
 
 
-def _parse_geometry_from_feature(feature: Dict[str, Any]) -> List[Tuple[float, float]]:
-    """Extract list of (lat, lon) points from a GeoJSON-like feature.
+def _token_valid(info: Dict[str, Any], margin_s: float = 30) -> bool:
+    return bool(info.get("access_token")) and float(info.get("expires_at") or 0) > time.time() + margin_s
 
-    Many MapmyIndia responses use [lon, lat] ordering. Convert to (lat, lon) tuples.
-    """
-    geom = feature.get("geometry") or {}
-    coords = geom.get("coordinates")
-    if not coords:
-        return []
 
-    # If coords is a single LineString (list of [lon,lat])
-    if isinstance(coords[0][0], (int, float)):
-        pts = [(c[1], c[0]) for c in coords]
-        return pts
+def _read_token_store() -> Optional[Dict[str, Any]]:
+    try:
+        with open(TOKEN_STORE) as f:  # type: ignore[arg-type]
+            info = json.load(f)
+        return info if isinstance(info, dict) else None
+    except (OSError, TypeError, ValueError):
+        return None
 
-    # If nested (e.g., MultiLineString), flatten first element
-    first = coords[0]
-    pts = [(c[1], c[0]) for c in first]
-    return pts
 
+def _write_token_store(info: Dict[str, Any]) -> None:
+    tmp = f"{TOKEN_STORE}.{os.getpid()}.tmp"
+    try:
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump(info, f)
+        os.replace(tmp, TOKEN_STORE)  # type: ignore[arg-type]
+    except OSError:
+        pass
+
+
+@contextmanager
+def _token_store_lock() -> Iterator[None]:
+    """Exclusive lock across processes sharing TOKEN_STORE (no-op without one)."""
+    if not TOKEN_STORE or fcntl is None:
+        yield
+        return
+    with open(f"{TOKEN_STORE}.lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _install_token(info: Dict[str, Any]) -> None:
+    """Make ``info`` the current token and schedule its background renewal."""
+    global _renew_timer
+    MAP_TOKEN_INFO["access_token"] = info["access_token"]
+    MAP_TOKEN_INFO["expires_at"] = info["expires_at"]
+    lifetime = info["expires_at"] - time.time()
+    # short-lived tokens are renewed halfway through instead
+    delay = lifetime - TOKEN_RENEW_BEFORE_S if lifetime > 2 * TOKEN_RENEW_BEFORE_S else lifetime / 2
+    delay = max(1.0, delay)
+    with _token_lock:
+        if _renew_timer is not None:
+            _renew_timer.cancel()
+        _renew_timer = threading.Timer(delay, _renew_in_background)
+        _renew_timer.daemon = True
+        _renew_timer.start()
+
+
+def _renew_in_background() -> None:
+    creds = _get_token_from_env()
+    if creds is not None:
+        _start_token_refresh(creds, force=True)
+
+
+def _refresh_token_blocking(creds: Dict[str, str], force: bool) -> str:
+    with _token_store_lock():
+        if TOKEN_STORE:
+            # another worker may have renewed while we waited for the lock
+            shared = _read_token_store()
+            if shared and _token_valid(shared, TOKEN_RENEW_BEFORE_S if force else 30):
+                _install_token(shared)
+                return shared["access_token"]
+        now = time.time()
+        resp = http_pool.post(TOKEN_URL, auth=(creds["client_id"], creds["client_secret"]), params={"grant_type": "client_credentials"}, timeout=5)
+        resp.raise_for_status()
+        data = resp.json()
+        info = {"access_token": data.get("access_token"), "expires_at": now + int(data.get("expires_in", 3600))}
+        if TOKEN_STORE:
+            _write_token_store(info)
+    _install_token(info)
+    return info["access_token"]
+
+
+def _start_token_refresh(creds: Dict[str, str], force: bool = False) -> "Future[str]":
+    """The in-flight token refresh, starting one if none is running (single flight)."""
+    global _token_refresh
+    with _token_lock:
+        if _token_refresh is not None:
+            return _token_refresh
+        fut: "Future[str]" = Future()
+        _token_refresh = fut
+
+    def _run() -> None:
+        global _token_refresh
+        try:
+            token = _refresh_token_blocking(creds, force)
+        except BaseException as e:
+            with _token_lock:
+                _token_refresh = None
+            fut.set_exception(e)
+        else:
+            with _token_lock:
+                _token_refresh = None
+            fut.set_result(token)
 
-def geocode(place: str) -> Tuple[float, float]:
-    """Resolve a place name to (lat, lon) using MapmyIndia Geocode API.
+    threading.Thread(target=_run, name="cgn-token-refresh", daemon=True).start()
+    return fut
 
-    If `place` already looks like 'lat,lon' this returns that parsed pair.
+
+async def fetch_token_async() -> str:
+    """Fetch OAuth2 client_credentials token from MapmyIndia and cache it in memory.
+
+    Concurrent callers (any thread or event loop) share one refresh, and a valid
+    token is renewed in the background before it expires.
     """
-    if "," in place:
-        try:
-            parts = [p.strip() for p in place.split(",")]
-            if len(parts) >= 2:
-                # Accept 'lat,lon' or 'lon,lat' heuristically: prefer lat in [-90,90]
-                a = float(parts[0])
-                b = float(parts[1])
-                if -90 <= a <= 90:
-                    return a, b
-                else:
-                    return b, a
-        except Exception:
-            pass
+    creds = _get_token_from_env()
+    if creds is None:
+        raise RuntimeError("MapmyIndia credentials not configured in env")
+    if _token_valid(MAP_TOKEN_INFO):
+        return MAP_TOKEN_INFO["access_token"]
+    return await asyncio.wrap_future(_start_token_refresh(creds))
+
 
+def fetch_token() -> str:
     creds = _get_token_from_env()
     if creds is None:
-        # Without creds, we cannot call MapmyIndia; raise and allow caller to fallback
-        raise RuntimeError("MapmyIndia credentials not configured for geocode")
+        raise RuntimeError("MapmyIndia credentials not configured in env")
+    if _token_valid(MAP_TOKEN_INFO):
+        return MAP_TOKEN_INFO["access_token"]
+    return _start_token_refresh(creds).result()
 
-    token = fetch_token()
-    headers = {"Authorization": "Bearer " + token}
-    url = "https://atlas.mapmyindia.com/api/places/geocode"
-    params = {"query": place}
-    resp = requests.get(url, headers=headers, params=params, timeout=5)
-    resp.raise_for_status()
-    j = resp.json()
-    # Try common places structure
+
+def _parse_geocode_response(j: Dict[str, Any]) -> Tuple[float, float]:
     try:
         # MapmyIndia may return 'suggestedLocations' or 'results'
         candidates = j.get("suggestedLocations") or j.get("results") or []
@@ -108,87 +210,131 @@ def geocode(place: str) -> Tuple[float, float]:
         raise RuntimeError(f"Failed to parse geocode response: {e}")
 
 
-def directions(start: str, end: str) -> Dict[str, Any]:
-    """Call MapmyIndia Directions API to get route and geometry from start->end.
+def normalize_geocode_query(place: str) -> str:
+    """Cache key for a place query: case-folded, punctuation dropped, whitespace collapsed."""
+    return " ".join(re.sub(r"[^\w\s]", " ", place.casefold()).split())
+
+
+async def geocode_async(place: str) -> Tuple[float, float]:
+    """Resolve a place name to (lat, lon) using MapmyIndia Geocode API.
 
-    Returns an object with 'fast' and 'eco' entries. Each entry contains
-    distance_km, time_min, and geometry (list of (lat,lon) tuples).
+    If `place` already looks like 'lat,lon' this returns that parsed pair.
+    Answers (and, briefly, definite failures) are cached per normalized query.
     """
+    pair = parse_latlon(place)
+    if pair is not None:
+        return pair
+
     creds = _get_token_from_env()
     if creds is None:
-        raise RuntimeError("MapmyIndia credentials not configured in env")
+        # Without creds, we cannot call MapmyIndia; raise and allow caller to fallback
+        raise RuntimeError("MapmyIndia credentials not configured for geocode")
 
-    # Resolve coordinates
-    try:
-        s_lat, s_lon = geocode(start)
-    except Exception:
-        # allow start to be a raw 'lat,lon' pair already — geocode will parse that
-        s_lat, s_lon = geocode(start)
+    key = normalize_geocode_query(place)
+    # the cache's SQLite tier blocks; keep it off the shared event loop
+    cached = await asyncio.to_thread(geocode_cache.get, key)
+    if cached is not None:
+        if "error" in cached:
+            raise RuntimeError(f"Geocode failed (cached): {cached['error']}")
+        return cached["lat"], cached["lon"]
 
+    token = await fetch_token_async()
+    headers = {"Authorization": "Bearer " + token}
+    params = {"query": place}
+    resp = await http_pool.async_get(GEOCODE_URL, headers=headers, params=params, timeout=5)
     try:
-        e_lat, e_lon = geocode(end)
-    except Exception:
-        e_lat, e_lon = geocode(end)
+        resp.raise_for_status()
+        lat, lon = _parse_geocode_response(resp.json())
+    except (RuntimeError, httpx.HTTPStatusError) as e:
+        permanent = not isinstance(e, httpx.HTTPStatusError) or e.response.status_code in _PERMANENT_STATUSES
+        if permanent:
+            await asyncio.to_thread(geocode_cache.set, key, {"error": str(e)}, ttl_s=GEOCODE_NEGATIVE_TTL_S)
+        raise
+    await asyncio.to_thread(geocode_cache.set, key, {"lat": lat, "lon": lon})
+    return lat, lon
+
+
+def geocode(place: str) -> Tuple[float, float]:
+    return http_pool.run_sync(geocode_async(place))
+
+
+async def directions_async(start: str, end: str) -> Dict[str, Any]:
+    """Call MapmyIndia Directions API to get route and geometry from start->end.
+
+    Both endpoints are geocoded concurrently. Returns an object with 'fast' and
+    'eco' entries plus every route the provider offered under 'alternatives'.
+    Each entry contains distance_km, time_min, and geometry (a Geometry of
+    (lat, lon) points).
+    """
+    creds = _get_token_from_env()
+    if creds is None:
+        raise RuntimeError("MapmyIndia credentials not configured in env")
+
+    # Token first (cached afterwards) so the two geocodes don't both fetch one
+    token = await fetch_token_async()
+    # Resolve coordinates; raw 'lat,lon' pairs are parsed without a request.
+    # Transient failures are retried by the HTTP layer.
+    (s_lat, s_lon), (e_lat, e_lon) = await asyncio.gather(geocode_async(start), geocode_async(end))
 
     # Build request — using the advanced maps route endpoint (account-specific id may be required)
-    token = fetch_token()
     headers = {"Authorization": f"Bearer {token}"}
     client_id = os.getenv("MAPMYINDIA_CLIENT_ID")
-    base = "https://apis.mapmyindia.com/advancedmaps/v1"
     # The API expects lon,lat pairs separated by semicolon
     s_pair = f"{s_lon},{s_lat}"
     e_pair = f"{e_lon},{e_lat}"
-    url = f"{base}/{client_id}/route_adv/driving/{s_pair};{e_pair}"
+    url = f"{ROUTE_BASE_URL}/{client_id}/route_adv/driving/{s_pair};{e_pair}"
 
-    resp = requests.get(url, headers=headers, timeout=8)
-    resp.raise_for_status()
-    j = resp.json()
-
-    # Defensive parse for several possible structures
+    # the body is parsed as it streams in; only distance, duration and geometry are kept
+    resp = await http_pool.async_get(url, headers=headers, timeout=8, stream=True)
     try:
-        # Prefer top-level 'routes' list
-        routes = j.get("routes") or j.get("features") or []
-        if isinstance(routes, dict):
-            # sometimes returned as GeoJSON FeatureCollection
-            routes = routes.get("features") or []
-
-        if isinstance(routes, list) and len(routes) > 0:
-            r0 = routes[0]
-            # distance/duration keys may be in route or properties
-            dist_m = r0.get("distance") or r0.get("properties", {}).get("distance") or j.get("distance") or 0
-            dur_s = r0.get("duration") or r0.get("properties", {}).get("duration") or j.get("duration") or 0
-
-            # try to extract geometry
-            geometry = []
-            if r0.get("geometry"):
-                geometry = _parse_geometry_from_feature(r0)
-            elif r0.get("legs"):
-                # try legs -> steps -> geometry
-                legs = r0.get("legs")
-                if isinstance(legs, list) and len(legs) > 0:
-                    first_leg = legs[0]
-                    if first_leg.get("steps"):
-                        # try collect step geometries
-                        coords = []
-                        for step in first_leg.get("steps"):
-                            if step.get("geometry"):
-                                coords.extend(_parse_geometry_from_feature(step))
-                        geometry = coords
-            else:
-                # fallback to features array geometry
-                if j.get("features") and isinstance(j.get("features"), list) and len(j.get("features")) > 0:
-                    geometry = _parse_geometry_from_feature(j.get("features")[0])
-
-            distance_km = float(dist_m) / 1000.0 if dist_m else 0.0
-            time_min = float(dur_s) / 60.0 if dur_s else 0.0
-
-            fast_obj = {"distance_km": round(distance_km, 2), "time_min": int(round(time_min)), "geometry": geometry}
-            # basic eco alternative heuristic: slightly shorter distance but slower speed
-            eco_obj = {"distance_km": round(distance_km * 0.95, 2), "time_min": max(1, int(round(time_min * 1.05))), "geometry": geometry}
-
-            return {"from_loc": start, "to_loc": end, "provider": "mapmyindia", "fast": fast_obj, "eco": eco_obj}
-
-        # If we get here, no route found
-        raise RuntimeError("No routes found in response")
+        resp.raise_for_status()
+        routes = await read_directions(resp)
+    except httpx.HTTPStatusError:
+        raise
     except Exception as e:
         raise RuntimeError(f"Failed to parse MapmyIndia directions response: {e}")
+    finally:
+        if hasattr(resp, "aclose"):
+            await resp.aclose()
+    if not routes:
+        raise RuntimeError("Failed to parse MapmyIndia directions response: No routes found in response")
+    return _directions_payload(routes, start, end)
+
+
+def directions(start: str, end: str) -> Dict[str, Any]:
+    return http_pool.run_sync(directions_async(start, end))
+
+
+async def directions_many(pairs: Sequence[Tuple[str, str]], limit: int = http_pool.DEFAULT_POOL_MAXSIZE) -> List[Any]:
+    """Directions for many (start, end) pairs, at most `limit` in flight.
+
+    Failed pairs come back as the exception instead of a route.
+    """
+    return await http_pool.gather_bounded((directions_async(s, e) for s, e in pairs), limit, return_exceptions=True)
+
+
+def _leg(route: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "distance_km": round(route["distance_m"] / 1000.0, 2),
+        "time_min": int(round(route["duration_s"] / 60.0)),
+        "geometry": route["geometry"],
+    }
+
+
+def _directions_payload(routes: List[Dict[str, Any]], start: str, end: str) -> Dict[str, Any]:
+    legs = [_leg(r) for r in routes]
+    fast_obj = legs[0]
+    shortest = min(legs, key=lambda leg: leg["distance_km"])
+    if shortest["distance_km"] < fast_obj["distance_km"]:
+        # the provider offered a genuinely shorter alternative
+        eco_obj = shortest
+    else:
+        # basic eco alternative heuristic: slightly shorter distance but slower speed
+        # (both legs share the same geometry object)
+        eco_obj = {
+            "distance_km": round(routes[0]["distance_m"] / 1000.0 * 0.95, 2),
+            "time_min": max(1, int(round(routes[0]["duration_s"] / 60.0 * 1.05))),
+            "geometry": fast_obj["geometry"],
+        }
+    return {"from_loc": start, "to_loc": end, "provider": "mapmyindia", "fast": fast_obj, "eco": eco_obj,
+            "alternatives": legs}
@@ -0,0 +1,291 @@
+# api/mapmyindia_standin.py
+"""Local stand-in for the MapmyIndia token, geocode and route_adv endpoints.
+
+Lets the provider path (token refresh, geocode cache, breakers, pooled HTTP,
+the streaming directions parser) be load-tested offline without spending
+quota. Point the client at it with ``CGN_MAPMYINDIA_URL``:
+
+    uvicorn api.mapmyindia_standin:app --port 8100
+    CGN_MAPMYINDIA_URL=http://localhost:8100 streamlit run app.py
+
+Answers come from a cassette of recorded responses when one matches the
+request, otherwise they are synthesized (campus names geocode to their campus
+coordinates; routes are gently curved lines with a few alternatives). Every
+answer passes through the configured provider behaviour first: a latency
+distribution per endpoint, an injected error rate and a token-bucket rate
+limit answered with 429 + ``Retry-After``.
+
+In record mode (``CGN_STANDIN_MODE=record``) requests are forwarded to the
+real MapmyIndia hosts and each answer is saved to the cassette (access tokens
+redacted), to be replayed later.
+
+The behaviour profile is ``DEFAULT_PROFILE`` updated from the JSON file at
+``CGN_STANDIN_PROFILE``. Latencies are written ``"fixed:MS"``,
+``"uniform:LO_MS:HI_MS"``, ``"lognormal:MEDIAN_MS:P95_MS"`` or ``"none"``.
+``GET /__standin/stats`` reports what was served.
+"""
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+from data.campus_data import LOCATIONS
+from routing.graph import haversine_km
+from utils.polyline import encode
+
+ENDPOINTS = ("token", "geocode", "route")
+
+DEFAULT_PROFILE: Dict[str, Any] = {
+    "mode": "replay",  # or "record"
+    "cassette": os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "cassettes",
+                             "mapmyindia.json"),
+    "latency_ms": {"token": "lognormal:80:250", "geocode": "lognormal:60:200", "route": "lognormal:150:600"},
+    "error_rate": {"token": 0.0, "geocode": 0.01, "route": 0.02},
+    "error_status": 503,
+    # token bucket shared by all endpoints; None disables the limit
+    "rate_limit_rps": 50.0,
+    "rate_limit_burst": 50,
+    "token_ttl_s": 86400,
+    # synthetic routes
+    "alternatives": 2,
+    "route_points": 200,
+    "speed_kmh": 25.0,
+    "seed": None,
+    # where record mode forwards to
+    "upstream": {
+        "token": "https://outpost.mapmyindia.com",
+        "geocode": "https://atlas.mapmyindia.com",
+        "route": "https://apis.mapmyindia.com",
+    },
+}
+
+# lognormal quantile of p95
+_Z95 = 1.6448536269514722
+
+
+def load_profile(overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """``DEFAULT_PROFILE`` updated from ``CGN_STANDIN_*`` and then ``overrides``.
+
+    Dict-valued settings (latency, error rates, upstreams) are merged per endpoint.
+    """
+    layers: List[Dict[str, Any]] = []
+    path = os.getenv("CGN_STANDIN_PROFILE")
+    if path:
+        with open(path) as f:
+            layers.append(json.load(f))
+    env = {k: os.getenv(f"CGN_STANDIN_{k.upper()}") for k in ("mode", "cassette")}
+    layers.append({k: v for k, v in env.items() if v})
+    layers.append(overrides or {})
+    profile = json.loads(json.dumps(DEFAULT_PROFILE))
+    for layer in layers:
+        for key, value in layer.items():
+            if isinstance(profile.get(key), dict) and isinstance(value, dict):
+                profile[key].update(value)
+            else:
+                profile[key] = value
+    return profile
+
+
+def latency_sampler(spec: str, rng: random.Random) -> Callable[[], float]:
+    """Seconds-returning sampler for a latency spec such as ``"lognormal:150:600"``."""
+    kind, *args = spec.split(":")
+    ms = [float(a) for a in args]
+    if kind == "none":
+        return lambda: 0.0
+    if kind == "fixed":
+        return lambda: ms[0] / 1000.0
+    if kind == "uniform":
+        return lambda: rng.uniform(ms[0], ms[1]) / 1000.0
+    if kind == "lognormal":
+        mu, sigma = math.log(ms[0]), math.log(ms[1] / ms[0]) / _Z95
+        return lambda: rng.lognormvariate(mu, sigma) / 1000.0
+    raise ValueError(f"Unknown latency distribution: {spec!r}")
+
+
+class TokenBucket:
+    """``rate`` requests per second with bursts of up to ``burst``."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self) -> float:
+        """0 if a request may proceed, else seconds until one may."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+
+class Cassette:
+    """Recorded answers keyed by endpoint and request, stored as one JSON file."""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self._lock = threading.Lock()
+        self.interactions: Dict[str, Dict[str, Any]] = {}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                for item in json.load(f).get("interactions", []):
+                    self.interactions[self.key(item["endpoint"], item["request"])] = item
+
+    @staticmethod
+    def key(endpoint: str, request: str) -> str:
+        return f"{endpoint} {request}"
+
+    def get(self, endpoint: str, request: str) -> Optional[Dict[str, Any]]:
+        return self.interactions.get(self.key(endpoint, request))
+
+    def put(self, endpoint: str, request: str, status: int, body: Any) -> None:
+        item = {"endpoint": endpoint, "request": request, "status": status, "body": body}
+        with self._lock:
+            self.interactions[self.key(endpoint, request)] = item
+            if self.path:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                tmp = f"{self.path}.tmp"
+                with open(tmp, "w") as f:
+                    json.dump({"interactions": list(self.interactions.values())}, f, indent=1)
+                os.replace(tmp, self.path)
+
+
+def geocode_request_key(query: str) -> str:
+    return " ".join(query.casefold().split())
+
+
+def synthetic_geocode(query: str) -> Dict[str, Any]:
+    """Campus names resolve to their coordinates; anything else to a stable point nearby."""
+    key = geocode_request_key(query)
+    for name, loc in LOCATIONS.items():
+        if name.casefold() == key:
+            return {"suggestedLocations": [{"placeName": name, "lat": loc["lat"], "lon": loc["lon"]}]}
+    digest = hashlib.sha1(key.encode()).digest()
+    lat = 12.965 + digest[0] / 255 * 0.015
+    lon = 77.588 + digest[1] / 255 * 0.015
+    return {"suggestedLocations": [{"placeName": query, "lat": round(lat, 6), "lon": round(lon, 6)}]}
+
+
+def synthetic_route(waypoints: str, profile: Dict[str, Any], polyline: bool = False) -> Dict[str, Any]:
+    """route_adv-shaped answer between the first and last ``lon,lat`` waypoints."""
+    pts = [tuple(float(v) for v in p.split(",")) for p in waypoints.split(";")]
+    (lon0, lat0), (lon1, lat1) = pts[0], pts[-1]
+    n = max(2, int(profile["route_points"]))
+    routes = []
+    for alt in range(1 + int(profile["alternatives"])):
+        # each alternative bows out a little further from the straight line
+        bow = 0.15 * alt
+        line = []
+        for i in range(n):
+            t = i / (n - 1)
+            off = bow * math.sin(math.pi * t)
+            line.append((lat0 + t * (lat1 - lat0) + off * (lon1 - lon0), lon0 + t * (lon1 - lon0) - off * (lat1 - lat0)))
+        km = sum(haversine_km(*a, *b) for a, b in zip(line, line[1:]))
+        duration = km / profile["speed_kmh"] * 3600
+        geometry: Any = encode(line) if polyline else {
+            "type": "LineString", "coordinates": [[round(lon, 6), round(lat, 6)] for lat, lon in line],
+        }
+        routes.append({
+            "geometry": geometry, "distance": round(km * 1000, 1), "duration": round(duration, 1),
+            "weight": round(duration, 1), "weight_name": "duration",
+            "legs": [{"distance": round(km * 1000, 1), "duration": round(duration, 1), "summary": "", "steps": []}],
+        })
+    return {"code": "Ok", "routes": routes,
+            "waypoints": [{"location": [lon0, lat0], "name": ""}, {"location": [lon1, lat1], "name": ""}]}
+
+
+def create_app(profile: Optional[Dict[str, Any]] = None) -> FastAPI:
+    """Stand-in app for ``profile`` (see ``load_profile``)."""
+    profile = profile if profile is not None else load_profile()
+    rng = random.Random(profile.get("seed"))
+    latency = {ep: latency_sampler(profile["latency_ms"].get(ep, "none"), rng) for ep in ENDPOINTS}
+    rps = profile.get("rate_limit_rps")
+    bucket = TokenBucket(rps, int(profile.get("rate_limit_burst") or max(1, rps))) if rps else None
+    cassette = Cassette(profile.get("cassette"))
+    recording = profile.get("mode") == "record"
+    stats: Dict[str, Dict[str, int]] = {
+        ep: {"requests": 0, "replayed": 0, "synthetic": 0, "recorded": 0, "errors": 0, "rate_limited": 0}
+        for ep in ENDPOINTS
+    }
+    app = FastAPI(title="MapmyIndia stand-in")
+
+    async def _record(endpoint: str, key: str, request: Request) -> Response:
+        url = profile["upstream"][endpoint] + request.url.path
+        headers = {k: v for k, v in request.headers.items() if k.lower() in ("authorization", "content-type")}
+        async with httpx.AsyncClient(timeout=15) as client:
+            upstream = await client.request(request.method, url, params=request.query_params, headers=headers,
+                                            content=await request.body())
+        try:
+            body = upstream.json()
+        except ValueError:
+            body = {"raw": upstream.text}
+        stored = dict(body, access_token="recorded-token") if endpoint == "token" and isinstance(body, dict) else body
+        cassette.put(endpoint, key, upstream.status_code, stored)
+        stats[endpoint]["recorded"] += 1
+        return JSONResponse(body, status_code=upstream.status_code)
+
+    async def _serve(endpoint: str, key: str, request: Request, synthesize: Callable[[], Any]) -> Response:
+        counts = stats[endpoint]
+        counts["requests"] += 1
+        if recording:
+            return await _record(endpoint, key, request)
+        if bucket is not None:
+            wait = bucket.take()
+            if wait:
+                counts["rate_limited"] += 1
+                return JSONResponse({"error": "rate limit exceeded"}, status_code=429,
+                                    headers={"Retry-After": str(max(1, math.ceil(wait)))})
+        await asyncio.sleep(latency[endpoint]())
+        if rng.random() < profile["error_rate"].get(endpoint, 0.0):
+            counts["errors"] += 1
+            return JSONResponse({"error": "injected failure"}, status_code=int(profile["error_status"]))
+        hit = cassette.get(endpoint, key)
+        if hit is not None:
+            counts["replayed"] += 1
+            return JSONResponse(hit["body"], status_code=hit["status"])
+        counts["synthetic"] += 1
+        return JSONResponse(synthesize())
+
+    @app.post("/api/security/oauth/token")
+    async def token(request: Request):
+        ttl = int(profile["token_ttl_s"])
+        return await _serve("token", "client_credentials", request, lambda: {
+            "access_token": f"standin-{rng.getrandbits(64):016x}", "token_type": "bearer", "expires_in": ttl,
+        })
+
+    @app.get("/api/places/geocode")
+    async def geocode(request: Request, query: str = ""):
+        return await _serve("geocode", geocode_request_key(query), request, lambda: synthetic_geocode(query))
+
+    @app.get("/advancedmaps/v1/{client_id}/route_adv/{resource}/{waypoints}")
+    async def route_adv(request: Request, client_id: str, resource: str, waypoints: str, geometries: str = "geojson"):
+        return await _serve("route", f"{resource}/{waypoints}", request,
+                            lambda: synthetic_route(waypoints, profile, polyline=geometries == "polyline"))
+
+    @app.get("/")
+    def root():
+        """Answers the client's circuit-breaker probe."""
+        return {"status": "ok"}
+
+    @app.get("/__standin/stats")
+    def get_stats():
+        return stats
+
+    return app
+
+
+app = create_app()
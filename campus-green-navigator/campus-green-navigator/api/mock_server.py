@@ -1,11 +1,52 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import Any, Dict
-from data import campus_data
-import pandas as pd
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from api.singleflight import SingleFlight, coalescing_stats
+from ml.model_registry import parking_models
+from ml.online import online_parking
+from routing.graph import find_route
+from routing.matrix import get_route_matrix, iter_batch_rows
+from routing.pareto import find_pareto_routes
+from routing.spatial import resolve_location
+from routing.timedep import campus_td_router, find_route_at
+from utils.geometry import jsonable_route
+import json
 import numpy as np
 
-app = FastAPI(title="Campus Green Navigator - Mock API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # load (or rebuild, if campus_data changed) the all-pairs route matrix before serving,
+    # not on import: building it writes data/route_matrix/
+    get_route_matrix()
+    # and the peak-hour time-dependent trees, so the first request with `depart` doesn't pay for them
+    campus_td_router()
+    yield
+
+
+app = FastAPI(title="Campus Green Navigator - Mock API", lifespan=lifespan)
+
+# load the parking model now rather than on the first /parking request
+parking_models().current()
+
+# identical concurrent requests (lecture changeovers) share one lookup / model run
+route_flights = SingleFlight("server.route")
+parking_flights = SingleFlight("server.parking")
+
+
+@app.get("/health")
+def health():
+    """Liveness check used by the clients' circuit-breaker probes."""
+    return {"status": "ok"}
+
+
+@app.get("/metrics/coalescing")
+def get_coalescing_metrics():
+    """How many requests were served by another identical in-flight request."""
+    return coalescing_stats()
 
 
 class RouteResponse(BaseModel):
@@ -16,18 +57,71 @@ class RouteResponse(BaseModel):
 
 
 @app.get("/route", response_model=RouteResponse)
-def get_route(start: str, end: str):
-    """Return fast/eco route between campus locations using local campus_data."""
-    # try to find matching route
-    for r in campus_data.ROUTES:
-        if (r["from"] == start and r["to"] == end) or (r["from"] == end and r["to"] == start):
-            return {
-                "from_loc": start,
-                "to_loc": end,
-                "fast": r["fast"],
-                "eco": r["eco"],
-            }
-    raise HTTPException(status_code=404, detail="Route not found")
+def get_route(start: str, end: str, geometry: str = "coords", depart: Optional[datetime] = None):
+    """Return fast/eco route between campus locations from the precomputed route matrix.
+
+    Either end may also be a raw 'lat,lon' string; it is snapped to the nearest campus node.
+    With `geometry=polyline` each leg's geometry is sent as an encoded-polyline string.
+    With `depart` (ISO datetime) travel times follow the hour-of-week congestion profiles.
+    """
+    route = route_flights.do((start.strip(), end.strip(), depart), lambda: _lookup_route(start, end, depart))
+    if route is None:
+        raise HTTPException(status_code=404, detail="Route not found")
+    # geometry stays a packed array until here, where it is serialized once
+    return jsonable_route(dict(route, from_loc=start, to_loc=end), geometry)
+
+
+def _lookup_route(start: str, end: str, depart: Optional[datetime]) -> Optional[Dict[str, Any]]:
+    s = resolve_location(start) or start
+    e = resolve_location(end) or end
+    if depart is not None:
+        return find_route_at(s, e, depart)
+    return get_route_matrix().route(s, e) or find_route(s, e)
+
+
+@app.get("/route/pareto")
+def get_route_pareto(start: str, end: str, vehicle: str = "Car"):
+    """Return every non-dominated (time, CO2) route between two campus locations, fastest first."""
+    out = find_pareto_routes(start, end, vehicle)
+    if out is None:
+        raise HTTPException(status_code=404, detail="Route not found")
+    return jsonable_route(out)
+
+
+class BatchPair(BaseModel):
+    start: str
+    end: str
+    vehicle: Optional[str] = None
+
+
+class BatchRouteRequest(BaseModel):
+    pairs: List[BatchPair]
+    vehicle: str = "Car"  # used for pairs that don't set their own
+    stream: bool = False  # stream results back as NDJSON, one pair per line
+
+
+@app.post("/routes/batch")
+def post_routes_batch(req: BatchRouteRequest):
+    """Return fast/eco distance, time and CO2 for many pairs, computed in one vectorized matrix lookup."""
+    starts = [p.start for p in req.pairs]
+    ends = [p.end for p in req.pairs]
+    vehicles = [p.vehicle or req.vehicle for p in req.pairs]
+    columns = get_route_matrix().lookup_batch(starts, ends, vehicles, resolve=resolve_location)
+    rows = iter_batch_rows(starts, ends, vehicles, columns)
+    if req.stream:
+        def _ndjson(chunk_rows: int = 1000):
+            buf = []
+            for row in rows:
+                buf.append(json.dumps(row))
+                if len(buf) >= chunk_rows:
+                    yield "\n".join(buf) + "\n"
+                    buf = []
+            if buf:
+                yield "\n".join(buf) + "\n"
+
+        return StreamingResponse(_ndjson(), media_type="application/x-ndjson")
+    # rows are already plain JSON types; skip FastAPI's per-field encoder pass
+    return JSONResponse({"results": list(rows)})
 
 
 class ParkingRow(BaseModel):
@@ -37,62 +131,81 @@ class ParkingRow(BaseModel):
 
 
 @app.get("/parking")
-def get_parking(hours: int = 6):
+def get_parking(hours: int = 6, model_version: Optional[str] = None):
     """Return a simple next-N-hour occupancy forecast using the existing ML code (synthetic data).
     If the model isn't trained/available, return a simple sinusoidal mock.
+    `model_version` pins one of the resident model versions (see /models/parking); pinned
+    forecasts are the model's alone, without the live readings from /parking/observations.
     """
+    if model_version is not None:
+        try:
+            parking_models().get(model_version)
+        except KeyError:
+            raise HTTPException(status_code=404, detail=f"Model version {model_version!r} is not loaded")
+    return parking_flights.do((hours, model_version), lambda: _parking_forecast(hours, model_version))
+
+
+@app.get("/models/parking")
+def get_parking_models():
+    """Loaded parking model version, load time and the versions kept resident."""
+    registry = parking_models()
+    registry.current()  # picks up a retrained artifact
+    return dict(registry.info(), versions=registry.versions(), online=online_parking().info())
+
+
+class ParkingObservation(BaseModel):
+    occupancy: float
+    timestamp: Optional[datetime] = None  # server's local time when missing
+    is_exam: int = Field(0, ge=0, le=1)
+
+
+class ParkingObservations(BaseModel):
+    observations: List[ParkingObservation]
+
+
+def _local_time(ts: Optional[datetime], now: datetime) -> datetime:
+    if ts is None:
+        return now
+    return ts.astimezone().replace(tzinfo=None) if ts.tzinfo is not None else ts
+
+
+@app.post("/parking/observations")
+def post_parking_observations(req: ParkingObservations):
+    """Fold live occupancy readings into the online statistics; the next /parking forecast uses them."""
+    loaded = parking_models().current()
+    if loaded is None:
+        raise HTTPException(status_code=503, detail="No parking model loaded")
+    now = datetime.now()
+    online = online_parking()
+    used = online.observe(
+        loaded.model,
+        [_local_time(o.timestamp, now) for o in req.observations],
+        [o.occupancy for o in req.observations],
+        [o.is_exam for o in req.observations],
+        now=now,
+    )
+    return dict(online.info(), accepted=used)
+
+
+def _parking_forecast(hours: int, model_version: Optional[str] = None) -> Dict[str, Any]:
     try:
-        # generate features for next `hours` and call the model if available
-        now = pd.Timestamp.now()
-        rows = []
-        for i in range(hours):
-            t = now + pd.Timedelta(hours=i)
-            hour = t.hour
-            weekday = t.weekday()
-            hour_sin = np.sin(2 * np.pi * hour / 24.0)
-            hour_cos = np.cos(2 * np.pi * hour / 24.0)
-            day_sin = np.sin(2 * np.pi * weekday / 7.0)
-            day_cos = np.cos(2 * np.pi * weekday / 7.0)
-            is_weekend = int(weekday >= 5)
-            is_exam = 0
-            rows.append({
-                "hour_sin": hour_sin,
-                "hour_cos": hour_cos,
-                "day_sin": day_sin,
-                "day_cos": day_cos,
-                "is_weekend": is_weekend,
-                "is_exam": is_exam,
-                "hour_str": t.strftime("%Y-%m-%d %H:%M"),
-            })
-        X_df = pd.DataFrame(rows)
-        # try to load model
-        from joblib import load
-        import os
-
-        model_path = os.path.join(os.path.dirname(__file__), "..", "ml", "parking_model.joblib")
-        model_path = os.path.abspath(model_path)
-        if os.path.exists(model_path):
-            model = load(model_path)
-            preds = model.predict(X_df[["hour_sin", "hour_cos", "day_sin", "day_cos", "is_weekend", "is_exam"]])
-            try:
-                all_preds = np.vstack([est.predict(X_df[["hour_sin", "hour_cos", "day_sin", "day_cos", "is_weekend", "is_exam"]].to_numpy()) for est in model.estimators_])
-                stds = np.std(all_preds, axis=0)
-            except Exception:
-                stds = np.zeros_like(preds)
-            out = []
-            for i in range(len(preds)):
-                out.append({
-                    "hour": X_df.loc[i, "hour_str"],
-                    "predicted_occupancy": float(preds[i]),
-                    "uncertainty_std": float(stds[i]),
-                })
-            return {"hours": out}
+        now = datetime.now()
+        # warm model from the registry; a retrained artifact is swapped in without a restart
+        registry = parking_models()
+        loaded = registry.get(model_version) if model_version is not None else registry.current()
+        if loaded is not None:
+            # hour-of-week table lookup, or the model when it has no table (see ml/forecast_table.py)
+            if model_version is not None:
+                return {"hours": loaded.model.forecast(now, hours), "model_version": loaded.version}
+            # adjusted by the live readings posted to /parking/observations (see ml/online.py)
+            return {"hours": online_parking().forecast(loaded.model, now, hours), "model_version": loaded.version}
         else:
             # fallback sinusoidal mock
             out = []
             for i in range(hours):
                 val = 0.5 + 0.4 * np.sin(2 * np.pi * (i % 24) / 24.0)
-                out.append({"hour": X_df.loc[i, "hour_str"], "predicted_occupancy": float(val), "uncertainty_std": 0.05})
+                t = now + timedelta(hours=i)
+                out.append({"hour": t.strftime("%Y-%m-%d %H:%M"), "predicted_occupancy": float(val), "uncertainty_std": 0.05})
             return {"hours": out}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
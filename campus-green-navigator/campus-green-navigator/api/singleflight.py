@@ -0,0 +1,81 @@
+# api/singleflight.py
+"""Request coalescing: identical in-flight calls share one upstream call.
+
+The first caller for a key runs the work; callers arriving with the same key
+while it is in flight wait for that result (or exception) instead of issuing
+their own request. Works across threads and event loops, since the shared
+result is a ``concurrent.futures.Future``. Nothing is cached once the call
+completes; that's the route cache's job.
+"""
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, TypeVar
+
+T = TypeVar("T")
+
+_groups: List["SingleFlight"] = []
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key, with call/collapse counters."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, "Future[Any]"] = {}
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {"calls": 0, "collapsed": 0}
+        _groups.append(self)
+
+    def _join(self, key: Hashable) -> "tuple[Future[Any], bool]":
+        with self._lock:
+            self.counters["calls"] += 1
+            fut = self._inflight.get(key)
+            if fut is not None:
+                self.counters["collapsed"] += 1
+                return fut, False
+            fut = self._inflight[key] = Future()
+            return fut, True
+
+    def _finish(self, key: Hashable) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """Run ``fn()`` unless an identical call is in flight; either way return its result."""
+        fut, leader = self._join(key)
+        if not leader:
+            return fut.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key)
+            fut.set_exception(e)
+            raise
+        self._finish(key)
+        fut.set_result(result)
+        return result
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Awaitable ``do``: ``fn`` returns the coroutine to await."""
+        fut, leader = self._join(key)
+        if not leader:
+            return await asyncio.wrap_future(fut)
+        try:
+            result = await fn()
+        except BaseException as e:
+            self._finish(key)
+            fut.set_exception(e)
+            raise
+        self._finish(key)
+        fut.set_result(result)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.counters, in_flight=len(self._inflight))
+
+
+def coalescing_stats() -> Dict[str, Dict[str, Any]]:
+    """Counters of every coalescing group in this process."""
+    return {g.name: g.stats() for g in _groups}
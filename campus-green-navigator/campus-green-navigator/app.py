@@ -1,13 +1,16 @@
 # app.py
 import os
-import joblib
 import json
 import pandas as pd
 import streamlit as st
 
 from data import campus_data
 from utils.helpers import calculate_co2_grams, format_minutes
-from api.client import get_route, get_parking
+from utils.geometry import Geometry, as_geometry
+from utils.polyline import encode_levels
+from api.client import get_route, get_route_alternatives, get_parking, provider_status, request_coalescing_stats, route_cache_stats
+from routing.graph import find_route
+from ml.model_registry import parking_models
 from components.points_system import init_points, redeem_reward, REWARDS
 from streamlit.components.v1 import html as components_html
 
@@ -109,6 +112,12 @@ def render():
     st.sidebar.markdown('<div style="height:12px"></div>', unsafe_allow_html=True)
     with st.sidebar.expander('Developer Details', expanded=False):
         st.text('Route source: ' + str(st.session_state.get('route_source', 'unknown')))
+        for name, b in provider_status().items():
+            st.text(f"  {name}: {b['state']} ({b['failures']} failed / {b['successes']} ok, {b['rejected']} skipped)")
+        rc = route_cache_stats()
+        st.text(f"Route cache: {rc['memory_hits']} mem / {rc['disk_hits']} disk hits, {rc['misses']} misses, {rc['evictions']} evictions")
+        for name, c in request_coalescing_stats().items():
+            st.text(f"  {name}: {c['collapsed']} of {c['calls']} calls coalesced")
         st.button('Show raw payload (console)')
         st.markdown('Last run logs:')
         st.text_area('Logs', value='No logs yet', height=120)
@@ -127,15 +136,6 @@ def render():
             else:
                 st.sidebar.warning(msg)
 
-    # Find route combos
-    def find_route(start, end):
-        for r in campus_data.ROUTES:
-            if r["from"] == start and r["to"] == end:
-                return r
-            if r["from"] == end and r["to"] == start:
-                return r
-        return None
-
     if page == "Home":
         # Page title + compact header
         st.markdown("<h1 style='margin-bottom:4px'>Campus Green Navigator</h1><p style='color:#666;margin-top:0'>Eco-routing & smart parking demo</p>", unsafe_allow_html=True)
@@ -188,11 +188,12 @@ def render():
             route_resp = get_route(start, end)
             fast = route_resp.get('fast')
             eco = route_resp.get('eco')
+            route_source = route_resp.get('source', 'provider') + (' (cached)' if route_resp.get('cached') else '')
         except Exception:
             route_source = 'local'
             route = find_route(start, end)
             if route is None:
-                st.warning('No pre-defined route between selected points.')
+                st.warning('No route found between selected points.')
                 fast = None
                 eco = None
             else:
@@ -200,6 +201,7 @@ def render():
                 eco = route['eco']
 
         # Debug: show which source provided the route
+        st.session_state['route_source'] = route_source
         st.sidebar.write(f"Route source: {route_source}")
 
         with right:
@@ -212,36 +214,39 @@ def render():
             if st.button('Clear Highlight'):
                 st.session_state['highlight'] = None
             st.markdown('</div>', unsafe_allow_html=True)
-            # Prepare geometries for the map (list of [lat, lon]) and markers for origin/destination
-            fast_geom = []
-            eco_geom = []
+            # Prepare geometries for the map (packed Geometry arrays; decoded if the provider
+            # sent an encoded polyline) and markers for origin/destination
+            fast_geom = Geometry()
+            eco_geom = Geometry()
             origin_marker = None
             dest_marker = None
             try:
-                if fast and isinstance(fast.get('geometry'), (list, tuple)):
-                    fast_geom = [[float(p[0]), float(p[1])] for p in fast.get('geometry')]
-                    # origin/destination from first/last points
-                    if len(fast_geom) >= 2:
-                        origin_marker = fast_geom[0]
-                        dest_marker = fast_geom[-1]
+                if fast:
+                    fast_geom = as_geometry(fast.get('geometry'))
+                # origin/destination from first/last points
+                if len(fast_geom) >= 2:
+                    origin_marker = fast_geom[0]
+                    dest_marker = fast_geom[-1]
             except Exception:
-                fast_geom = []
+                fast_geom = Geometry()
             try:
-                if eco and isinstance(eco.get('geometry'), (list, tuple)):
-                    eco_geom = [[float(p[0]), float(p[1])] for p in eco.get('geometry')]
-                    if not origin_marker and len(eco_geom) >= 2:
-                        origin_marker = eco_geom[0]
-                        dest_marker = eco_geom[-1]
+                if eco:
+                    eco_geom = as_geometry(eco.get('geometry'))
+                if not origin_marker and len(eco_geom) >= 2:
+                    origin_marker = eco_geom[0]
+                    dest_marker = eco_geom[-1]
             except Exception:
-                eco_geom = []
+                eco_geom = Geometry()
 
             # default center if no geometry
             default_center = [28.6139, 77.2090]
 
             highlight = st.session_state.get('highlight')
+            # Lines travel as encoded polylines, pre-simplified per zoom level; the
+            # page decodes them and swaps levels as the user zooms.
             map_payload = {
-                'fast': fast_geom,
-                'eco': eco_geom,
+                'fast': encode_levels(fast_geom),
+                'eco': encode_levels(eco_geom),
                 'center': fast_geom[0] if len(fast_geom) else (eco_geom[0] if len(eco_geom) else default_center),
                 'highlight': highlight,
                 'origin': origin_marker,
@@ -270,9 +275,41 @@ def render():
                 attribution: '© OpenStreetMap'
             }).addTo(map);
 
-            function drawLine(coords, color, label, highlight) {
-                if (!coords || coords.length === 0) return null;
-                const latlngs = coords.map(c => [c[0], c[1]]);
+            // Decode a Google encoded polyline (precision 5) into [[lat, lon], ...]
+            function decodePolyline(str) {
+                const coords = [];
+                let index = 0, lat = 0, lon = 0;
+                while (index < str.length) {
+                    for (let k = 0; k < 2; k++) {
+                        let shift = 0, result = 0, b;
+                        do {
+                            b = str.charCodeAt(index++) - 63;
+                            result |= (b & 0x1f) << shift;
+                            shift += 5;
+                        } while (b >= 0x20);
+                        const delta = (result & 1) ? ~(result >> 1) : (result >> 1);
+                        if (k === 0) { lat += delta; } else { lon += delta; }
+                    }
+                    coords.push([lat / 1e5, lon / 1e5]);
+                }
+                return coords;
+            }
+
+            // Pick the simplification level for a zoom: the finest level whose
+            // minimum zoom has been reached (coarsest level below that).
+            const decoded = {};
+            function levelFor(levels, zoom) {
+                const keys = Object.keys(levels).map(Number).sort((a, b) => a - b);
+                let pick = keys[0];
+                for (const k of keys) { if (k <= zoom) pick = k; }
+                const cacheKey = levels[pick];
+                if (!(cacheKey in decoded)) decoded[cacheKey] = decodePolyline(cacheKey);
+                return decoded[cacheKey];
+            }
+
+            function drawLine(levels, color, label, highlight) {
+                if (!levels || Object.keys(levels).length === 0) return null;
+                const latlngs = levelFor(levels, map.getZoom());
                 const isHighlighted = highlight === label;
                 const opts = {
                     color: color,
@@ -280,6 +317,7 @@ def render():
                     opacity: isHighlighted ? 1.0 : 0.7,
                 };
                 const line = L.polyline(latlngs, opts).addTo(map);
+                map.on('zoomend', () => line.setLatLngs(levelFor(levels, map.getZoom())));
                 return line;
             }
 
@@ -348,11 +386,12 @@ def render():
             route_resp = get_route(start, end)
             fast = route_resp.get('fast')
             eco = route_resp.get('eco')
+            route_source = route_resp.get('source', 'provider') + (' (cached)' if route_resp.get('cached') else '')
         except Exception:
             route_source = 'local'
             route = find_route(start, end)
             if route is None:
-                st.warning('No pre-defined route between selected points.')
+                st.warning('No route found between selected points.')
                 fast = None
                 eco = None
             else:
@@ -360,6 +399,7 @@ def render():
                 eco = route['eco']
 
         # Debug: show which source provided the route
+        st.session_state['route_source'] = route_source
         st.sidebar.write(f"Route source: {route_source}")
 
         # compute CO2 and time comparisons for UI
@@ -405,60 +445,41 @@ def render():
             else:
                 st.markdown("<div class='card' style='background:#fff'><strong>Environmental Impact</strong><p style='margin:4px 0'>No CO₂ savings available for the selected trip.</p></div>", unsafe_allow_html=True)
 
+            # Fastest <-> greenest trade-off. The whole Pareto set is fetched once per
+            # (start, end, vehicle) and kept in session state, so moving the slider
+            # doesn't trigger another backend call.
+            alt_key = (start, end, vehicle)
+            if st.session_state.get('_alternatives_key') != alt_key:
+                try:
+                    st.session_state['_alternatives'] = get_route_alternatives(start, end, vehicle).get('routes', [])
+                except Exception:
+                    st.session_state['_alternatives'] = []
+                st.session_state['_alternatives_key'] = alt_key
+            alternatives = st.session_state.get('_alternatives', [])
+            if len(alternatives) > 1:
+                pos = st.select_slider('Fastest ↔ Greenest', options=list(range(len(alternatives))), value=0, format_func=lambda i: 'Fastest' if i == 0 else ('Greenest' if i == len(alternatives) - 1 else f'Option {i + 1}'), key='ui_tradeoff_page')
+                alt = alternatives[pos]
+                st.markdown(f"<div class='card'><div class='small'><strong>Time:</strong> {format_minutes(alt['time_min'])} &nbsp; <strong>Distance:</strong> {alt['distance_km']} km &nbsp; <strong>CO2:</strong> {alt['co2_g']:.0f} g</div><div class='small muted'>Via {' → '.join(alt['path'])}</div></div>", unsafe_allow_html=True)
+
     elif page == "Parking":
         st.title("Campus Green Navigator — Parking Predictions")
         # Keep the ML parking block here
-        MODEL_PATH = "ml/parking_model.joblib"
-        if os.path.exists(MODEL_PATH):
+        # the registry keeps the model warm across reruns and picks up a retrained artifact
+        registry = parking_models()
+        if os.path.exists(registry.path):
             try:
                 with st.spinner("Loading parking model..."):
-                    model = joblib.load(MODEL_PATH)
-                st.success("Parking model loaded.")
-
-                from datetime import datetime, timedelta
-                import numpy as np
-
-                now = datetime.now()
-                feature_rows = []
-                hours = []
-                for i in range(6):
-                    t = now + timedelta(hours=i)
-                    hour = t.hour
-                    weekday = t.weekday()
-                    hour_sin = np.sin(2 * np.pi * hour / 24.0)
-                    hour_cos = np.cos(2 * np.pi * hour / 24.0)
-                    day_sin = np.sin(2 * np.pi * weekday / 7.0)
-                    day_cos = np.cos(2 * np.pi * weekday / 7.0)
-                    is_weekend = int(weekday >= 5)
-                    is_exam = 0
-                    feature_rows.append({
-                        "hour_sin": hour_sin,
-                        "hour_cos": hour_cos,
-                        "day_sin": day_sin,
-                        "day_cos": day_cos,
-                        "is_weekend": is_weekend,
-                        "is_exam": is_exam,
-                    })
-                    hours.append(t.strftime("%Y-%m-%d %H:%M"))
-
-                X_df = pd.DataFrame(feature_rows)
+                    loaded = registry.current()
+                if loaded is None:
+                    raise RuntimeError("model file could not be loaded")
+                model = loaded.model
+                from datetime import datetime
+                st.success(f"Parking model {loaded.version} loaded (took {loaded.load_s:.2f} s, "
+                           f"{datetime.fromtimestamp(loaded.loaded_at):%H:%M:%S}).")
 
                 try:
-                    preds = model.predict(X_df)
-                    try:
-                        import warnings
-                        with warnings.catch_warnings():
-                            warnings.filterwarnings("ignore", message="X has feature names", category=UserWarning)
-                            all_preds = np.vstack([est.predict(X_df.to_numpy()) for est in model.estimators_])
-                        stds = np.std(all_preds, axis=0)
-                    except Exception:
-                        stds = np.zeros_like(preds)
-
-                    df_out = pd.DataFrame({
-                        "hour": hours,
-                        "predicted_occupancy": preds,
-                        "uncertainty_std": stds
-                    })
+                    # hour-of-week table lookup when the model has one (see ml/forecast_table.py)
+                    df_out = pd.DataFrame(model.forecast(datetime.now(), 6))
 
                     st.subheader("6-hour occupancy forecast")
                     st.table(df_out.round(3))
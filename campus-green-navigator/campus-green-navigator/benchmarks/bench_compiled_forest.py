@@ -0,0 +1,79 @@
+"""Benchmark parking forecast inference: sklearn vs the compiled forest.
+
+The sklearn path is what serving did before: ``model.predict`` plus one
+``est.predict`` per tree for the uncertainty. The compiled path is
+``CompiledForest.predict_with_std`` on the flat node arrays. Both are timed
+at the app's batch size (6 hours), a week (168) and a large batch, and their
+outputs are checked for equality.
+
+Run from the project root:
+
+    python benchmarks/bench_compiled_forest.py --model ml/parking_model.joblib
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from ml.compiled_forest import CompiledForest  # noqa: E402
+from ml.features import FEATURES, time_feature_matrix  # noqa: E402
+
+
+def features(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    weekday = rng.integers(0, 7, n)
+    X = time_feature_matrix(rng.integers(0, 24, n), weekday, (weekday >= 5).astype(int), rng.integers(0, 2, n))
+    return pd.DataFrame(X, columns=FEATURES)
+
+
+def sklearn_predict_with_std(model, X: pd.DataFrame):
+    preds = model.predict(X)
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="X has feature names", category=UserWarning)
+        stds = np.std(np.vstack([est.predict(X.to_numpy()) for est in model.estimators_]), axis=0)
+    return preds, stds
+
+
+def best_of(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--model", default="ml/parking_model.joblib")
+    ap.add_argument("--batches", default="6,168,10000")
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    model = joblib.load(args.model)
+    t0 = time.perf_counter()
+    forest = CompiledForest.from_sklearn(model)
+    print(f"compiled {forest.n_estimators} trees, {forest.n_nodes:,} nodes, depth {forest.depth} "
+          f"in {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+    for n in (int(b) for b in args.batches.split(",")):
+        X = features(n)
+        ref_mean, ref_std = sklearn_predict_with_std(model, X)
+        mean, std = forest.predict_with_std(X)
+        assert np.array_equal(mean, ref_mean) and np.allclose(std, ref_std, rtol=0, atol=1e-12)
+        repeat = max(3, args.repeat if n <= 1000 else args.repeat // 4)
+        t_sk = best_of(lambda: sklearn_predict_with_std(model, X), repeat)
+        t_cf = best_of(lambda: forest.predict_with_std(X), repeat)
+        print(f"{n:>6,} rows: sklearn {t_sk * 1000:8.2f} ms, compiled {t_cf * 1000:8.2f} ms, "
+              f"{t_sk / t_cf:5.1f}x, same output")
+
+
+if __name__ == "__main__":
+    main()
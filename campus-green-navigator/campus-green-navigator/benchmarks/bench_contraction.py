@@ -0,0 +1,106 @@
+"""Benchmark contraction-hierarchy queries against plain Dijkstra and A*.
+
+Builds synthetic campus-like grid graphs (perturbed lat/lon lattice, two edges
+per node plus a few diagonals) and reports preprocessing cost and mean query
+latency for each routing mode.
+
+Run from the project root:
+
+    python benchmarks/bench_contraction.py --sizes 10000,100000
+
+Preprocessing is pure Python: about 5 s at 10k edges and 3 min at 100k on a
+laptop. 1M-edge graphs work too (``--sizes 1000000``) but take well over an hour
+to contract, so they are not in the default run.
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from routing.contraction import ContractionHierarchy  # noqa: E402
+from routing.graph import RoutingGraph, haversine_km  # noqa: E402
+
+
+def synthetic_graph(edges: int, seed: int = 0) -> RoutingGraph:
+    """Grid graph with roughly ``edges`` segments and fast/eco weights."""
+    rnd = random.Random(seed)
+    side = max(2, int(math.sqrt(edges / 2.2)))
+    locations = {}
+    for r in range(side):
+        for c in range(side):
+            locations[f"n{r}_{c}"] = {
+                "lat": 12.90 + r * 0.0005 + rnd.uniform(-0.0001, 0.0001),
+                "lon": 77.50 + c * 0.0005 + rnd.uniform(-0.0001, 0.0001),
+            }
+
+    routes = []
+
+    def add(a, b):
+        la, lb = locations[a], locations[b]
+        km = haversine_km(la["lat"], la["lon"], lb["lat"], lb["lon"]) * rnd.uniform(1.0, 1.4)
+        routes.append({
+            "from": a,
+            "to": b,
+            "fast": {"distance_km": km, "time_min": km / rnd.uniform(15, 40) * 60},
+            "eco": {"distance_km": km * rnd.uniform(0.9, 1.1), "time_min": km / 12 * 60},
+        })
+
+    for r in range(side):
+        for c in range(side):
+            if c + 1 < side:
+                add(f"n{r}_{c}", f"n{r}_{c + 1}")
+            if r + 1 < side:
+                add(f"n{r}_{c}", f"n{r + 1}_{c}")
+            if r + 1 < side and c + 1 < side and rnd.random() < 0.2:
+                add(f"n{r}_{c}", f"n{r + 1}_{c + 1}")
+    return RoutingGraph(locations, routes)
+
+
+def _mean_ms(fn, pairs):
+    t0 = time.perf_counter()
+    for s, t in pairs:
+        fn(s, t)
+    return (time.perf_counter() - t0) / len(pairs) * 1000.0
+
+
+def run(size: int, queries: int, metric: str) -> None:
+    g = synthetic_graph(size)
+    rnd = random.Random(1)
+    pairs = [tuple(rnd.sample(range(len(g.nodes)), 2)) for _ in range(queries)]
+
+    t0 = time.perf_counter()
+    ch = ContractionHierarchy(g, metric)
+    prep_s = time.perf_counter() - t0
+
+    # sanity check a few answers against plain Dijkstra
+    for s, t in pairs[:5]:
+        a = ch.query(s, t)
+        b = g.shortest_path_tree(s, metric)[0][t]
+        assert a is not None and abs(a[0] - b) < 1e-6 * max(1.0, b)
+
+    dijkstra_ms = _mean_ms(lambda s, t: g.shortest_path_tree(s, metric), pairs[: max(1, queries // 10)])
+    astar_ms = _mean_ms(lambda s, t: g.shortest_path(s, t, metric), pairs)
+    ch_ms = _mean_ms(ch.query, pairs)
+    print(
+        f"{len(g.edges):>9} edges {len(g.nodes):>8} nodes | CH prep {prep_s:8.2f}s "
+        f"{ch.shortcut_count:>8} shortcuts | query ms: dijkstra {dijkstra_ms:9.3f} "
+        f"a* {astar_ms:9.3f} ch {ch_ms:7.3f} ({astar_ms / ch_ms:5.1f}x vs a*)"
+    )
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", default="10000,100000", help="comma-separated target edge counts")
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--metric", default="fast", choices=["fast", "eco"])
+    args = ap.parse_args()
+    for size in (int(s) for s in args.sizes.split(",")):
+        run(size, args.queries, args.metric)
+
+
+if __name__ == "__main__":
+    main()
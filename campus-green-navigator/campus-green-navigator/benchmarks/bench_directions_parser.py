@@ -0,0 +1,105 @@
+"""Benchmark the streaming directions parser against a full JSON decode.
+
+Scales ``tests/data/sample_mapmyindia.json`` up to a route_adv-sized answer
+(several alternatives, long geometries, per-step maneuvers and names) and
+times three ways of reading it:
+
+* ``json+lists``: the previous approach, ``json.loads`` of the whole body and
+  a Geometry built from the first route's coordinate lists;
+* ``json fallback``: ``parse_directions_json`` (all routes, no ijson);
+* ``streaming``: ``parse_directions_chunks`` over 64 KiB chunks (needs ijson).
+
+Peak Python allocations per parse are measured with ``tracemalloc``.
+
+Run from the project root:
+
+    python benchmarks/bench_directions_parser.py --routes 3 --points 20000
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from api import directions_parser as dp  # noqa: E402
+from utils.geometry import Geometry  # noqa: E402
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tests", "data", "sample_mapmyindia.json")
+
+
+def scaled_response(routes: int, points: int, steps: int) -> Dict[str, Any]:
+    """The sample route repeated as ``routes`` alternatives of ``points`` points each."""
+    with open(SAMPLE) as f:
+        base = json.load(f)["routes"][0]
+    (lon0, lat0), (lon1, lat1) = base["geometry"]["coordinates"][:2]
+    out: List[Dict[str, Any]] = []
+    for r in range(routes):
+        coords = [[round(lon0 + i * (lon1 - lon0) + r * 1e-4, 6), round(lat0 + i * (lat1 - lat0), 6)]
+                  for i in range(points)]
+        per = max(1, points // steps)
+        out.append({
+            "distance": base["distance"] * (1 + r / 10), "duration": base["duration"] * (1 + r / 20),
+            "weight": 1.0, "weight_name": "routability",
+            "geometry": {"type": "LineString", "coordinates": coords},
+            "legs": [{"summary": "", "distance": base["distance"], "steps": [
+                {"distance": 5.0, "duration": 1.0, "name": f"Road {s}", "mode": "driving",
+                 "maneuver": {"type": "turn", "modifier": "left", "location": coords[s * per]},
+                 "intersections": [{"location": coords[s * per], "bearings": [0, 90, 180], "entry": [True, True, False]}]}
+                for s in range(steps)
+            ]}],
+        })
+    return {"code": "Ok", "routes": out, "waypoints": [{"location": [lon0, lat0]}, {"location": [lon1, lat1]}]}
+
+
+def legacy_parse(body: bytes) -> Geometry:
+    j = json.loads(body)
+    return Geometry.from_lonlat(j["routes"][0]["geometry"]["coordinates"])
+
+
+def measure(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"ms": statistics.median(times) * 1000, "peak_mb": peak / 1e6}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--routes", type=int, default=3)
+    ap.add_argument("--points", type=int, default=20000)
+    ap.add_argument("--steps", type=int, default=400)
+    ap.add_argument("--chunk", type=int, default=64 * 1024)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    body = json.dumps(scaled_response(args.routes, args.points, args.steps)).encode()
+    chunks = [body[i:i + args.chunk] for i in range(0, len(body), args.chunk)]
+    print(f"body: {len(body) / 1e6:.1f} MB, {args.routes} routes x {args.points} points")
+
+    cases = {
+        "json+lists (routes[0])": lambda: legacy_parse(body),
+        "json fallback (all routes)": lambda: dp.parse_directions_json(json.loads(body)),
+    }
+    if dp.ijson is not None:
+        print(f"ijson backend: {dp.ijson.backend}")
+        cases["streaming (all routes)"] = lambda: dp.parse_directions_chunks(chunks)
+    else:
+        print("ijson not installed; skipping the streaming parser")
+    for name, fn in cases.items():
+        r = measure(fn, args.repeat)
+        print(f"{name:28s} {r['ms']:8.1f} ms   peak {r['peak_mb']:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Benchmark a parking forecast: table lookup vs running the model.
+
+Times one ``hours``-long forecast (what ``/parking`` and the Parking page
+build) three ways: the original per-request path (a feature DataFrame, then
+sklearn ``predict`` plus one ``est.predict`` per tree), the compiled forest,
+and the hour-of-week table. The outputs are checked for equality.
+
+Run from the project root:
+
+    python benchmarks/bench_forecast_table.py --model ml/parking_model.joblib
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+from datetime import datetime, timedelta
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from ml.compiled_forest import CompiledForest  # noqa: E402
+from ml.forecast_table import ForecastTable, ParkingForecaster  # noqa: E402
+
+
+def sklearn_forecast(model, start: datetime, hours: int):
+    rows, labels = [], []
+    for i in range(hours):
+        t = start + timedelta(hours=i)
+        rows.append({
+            "hour_sin": np.sin(2 * np.pi * t.hour / 24.0), "hour_cos": np.cos(2 * np.pi * t.hour / 24.0),
+            "day_sin": np.sin(2 * np.pi * t.weekday() / 7.0), "day_cos": np.cos(2 * np.pi * t.weekday() / 7.0),
+            "is_weekend": int(t.weekday() >= 5), "is_exam": 0,
+        })
+        labels.append(t.strftime("%Y-%m-%d %H:%M"))
+    X_df = pd.DataFrame(rows)
+    preds = model.predict(X_df)
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="X has feature names", category=UserWarning)
+        stds = np.std(np.vstack([est.predict(X_df.to_numpy()) for est in model.estimators_]), axis=0)
+    return [{"hour": h, "predicted_occupancy": float(m), "uncertainty_std": float(s)}
+            for h, m, s in zip(labels, preds, stds)]
+
+
+def best_of(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--model", default="ml/parking_model.joblib")
+    ap.add_argument("--hours", default="6,168")
+    ap.add_argument("--repeat", type=int, default=50)
+    args = ap.parse_args()
+
+    model = joblib.load(args.model)
+    compiled = ParkingForecaster(CompiledForest.from_sklearn(model))
+    t0 = time.perf_counter()
+    built = ForecastTable.build(compiled.model)
+    print(f"built the {len(built.mean)}-slot table in {(time.perf_counter() - t0) * 1000:.1f} ms")
+    table = ParkingForecaster(compiled.model, built)
+
+    start = datetime.now()
+    for hours in (int(h) for h in args.hours.split(",")):
+        ref = sklearn_forecast(model, start, hours)
+        assert compiled.forecast(start, hours) == table.forecast(start, hours)
+        assert [r["predicted_occupancy"] for r in table.forecast(start, hours)] == [r["predicted_occupancy"] for r in ref]
+        t_sk = best_of(lambda: sklearn_forecast(model, start, hours), args.repeat)
+        t_cf = best_of(lambda: compiled.forecast(start, hours), args.repeat)
+        t_tb = best_of(lambda: table.forecast(start, hours), args.repeat)
+        print(f"{hours:>4} hours: sklearn {t_sk * 1000:7.2f} ms, compiled {t_cf * 1000:6.2f} ms, "
+              f"table {t_tb * 1000:6.3f} ms ({t_sk / t_tb:,.0f}x), same forecast")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Benchmark pooled keep-alive requests against a new connection per call.
+
+Sends the same GET with bare ``requests.get`` (new TCP/TLS connection every
+time) and through the shared ``api.http_pool`` session, then prints the pool's
+connection-reuse counters. By default it targets a local keep-alive server;
+pass ``--url`` to measure a real provider endpoint, where the TLS handshake
+saved per call is much larger.
+
+Run from the project root:
+
+    python benchmarks/bench_http_pool.py --requests 200
+    python benchmarks/bench_http_pool.py --url https://example.com/ --requests 20
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from api import http_pool  # noqa: E402
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    wbufsize = -1  # one write per response; avoids Nagle/delayed-ACK stalls
+
+    def do_GET(self):
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--requests", type=int, default=200)
+    ap.add_argument("--url", default=None, help="endpoint to hit (default: a local keep-alive server)")
+    args = ap.parse_args()
+
+    url = args.url
+    server = None
+    if url is None:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    t0 = time.perf_counter()
+    for _ in range(args.requests):
+        requests.get(url, timeout=10).raise_for_status()
+    bare_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for _ in range(args.requests):
+        http_pool.get(url, timeout=10).raise_for_status()
+    pooled_s = time.perf_counter() - t0
+
+    n = args.requests
+    print(f"{n} requests | new connection each {bare_s / n * 1000:.2f} ms/req | pooled {pooled_s / n * 1000:.2f} ms/req")
+    print(f"connection reuse: {http_pool.connection_reuse()}")
+    if server is not None:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
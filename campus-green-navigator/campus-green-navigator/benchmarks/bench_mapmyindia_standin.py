@@ -0,0 +1,99 @@
+"""Load-test the MapmyIndia client path against the local stand-in server.
+
+Starts ``api/mapmyindia_standin.py`` in-process with a provider behaviour
+profile (latency distributions, error rates, rate limit), points
+``api/mapmyindia.py`` at it and pushes ``--requests`` directions lookups
+through ``directions_many`` with at most ``--concurrency`` in flight. Prints
+throughput, end-to-end latency percentiles, failures, what the stand-in
+served and the HTTP pool's connection reuse.
+
+Run from the project root:
+
+    python benchmarks/bench_mapmyindia_standin.py --requests 300 --concurrency 20
+    python benchmarks/bench_mapmyindia_standin.py --profile my_profile.json --no-geocode-cache
+"""
+import argparse
+import itertools
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from typing import List
+
+import uvicorn
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from api import mapmyindia_standin as standin  # noqa: E402
+from data.campus_data import LOCATIONS  # noqa: E402
+
+
+def start_standin(profile):
+    server = uvicorn.Server(uvicorn.Config(standin.create_app(profile), host="127.0.0.1", port=0, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, f"http://127.0.0.1:{server.servers[0].sockets[0].getsockname()[1]}"
+
+
+async def timed(mod, start, end, latencies):
+    t0 = time.perf_counter()
+    try:
+        return await mod.directions_async(start, end)
+    finally:
+        latencies.append(time.perf_counter() - t0)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--requests", type=int, default=200)
+    ap.add_argument("--concurrency", type=int, default=10)
+    ap.add_argument("--profile", help="JSON file merged over the stand-in's DEFAULT_PROFILE")
+    ap.add_argument("--no-geocode-cache", action="store_true", help="geocode both ends on every lookup")
+    args = ap.parse_args()
+
+    overrides = {"cassette": None, "seed": 0}
+    if args.profile:
+        with open(args.profile) as f:
+            overrides.update(json.load(f))
+    profile = standin.load_profile(overrides)
+    server, url = start_standin(profile)
+
+    os.environ["CGN_MAPMYINDIA_URL"] = url
+    os.environ.setdefault("MAPMYINDIA_CLIENT_ID", "standin")
+    os.environ.setdefault("MAPMYINDIA_CLIENT_SECRET", "standin")
+    os.environ.pop("CGN_TOKEN_STORE", None)
+    from api import http_pool, mapmyindia  # noqa: E402  (reads CGN_MAPMYINDIA_URL at import)
+    mapmyindia.geocode_cache = mapmyindia.TieredCache(
+        "geocode", db_path=None, max_entries=0 if args.no_geocode_cache else 1024)
+
+    names = list(LOCATIONS)
+    pairs = list(itertools.islice(((a, b) for a in names for b in names if a != b), 10 ** 6))
+    pairs = [pairs[i % len(pairs)] for i in range(args.requests)]
+    latencies: List[float] = []
+
+    async def run():
+        return await http_pool.gather_bounded((timed(mapmyindia, s, e, latencies) for s, e in pairs),
+                                              args.concurrency, return_exceptions=True)
+
+    t0 = time.perf_counter()
+    results = http_pool.run_sync(run())
+    wall = time.perf_counter() - t0
+    failures = [r for r in results if isinstance(r, Exception)]
+
+    lat_ms = sorted(x * 1000 for x in latencies)
+    print(f"profile: latency {profile['latency_ms']}, errors {profile['error_rate']}, "
+          f"rate limit {profile['rate_limit_rps']}/s")
+    print(f"{args.requests} lookups, {args.concurrency} in flight: {wall:.2f} s, {args.requests / wall:.1f} lookups/s")
+    print(f"latency p50 {statistics.median(lat_ms):.0f} ms, p95 {lat_ms[int(0.95 * (len(lat_ms) - 1))]:.0f} ms, "
+          f"max {lat_ms[-1]:.0f} ms")
+    print(f"failed: {len(failures)}" + (f" (e.g. {failures[0]!r})" if failures else ""))
+    print("stand-in served:", json.dumps(http_pool.get(f"{url}/__standin/stats").json()))
+    print("sync pool reuse:", http_pool.connection_reuse())
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
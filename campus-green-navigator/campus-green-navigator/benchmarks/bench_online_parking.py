@@ -0,0 +1,80 @@
+"""Benchmark online parking updates.
+
+Feeds a simulated sensor stream (one reading per lot every 5 minutes) into
+``OnlineParkingModel`` on top of the committed model and reports the cost of
+each update by micro-batch size, the forecast latency with the online
+statistics applied, and how the next-hours forecast reacts to a simulated
+closure (every lot reported full).
+
+Run from the project root:
+
+    python benchmarks/bench_online_parking.py --lots 50 --days 14
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from ml.forecast_table import load_parking_forecaster  # noqa: E402
+from ml.online import OnlineParkingModel  # noqa: E402
+from ml.parking_predictor import generate_synthetic_parking  # noqa: E402
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--model", default="ml/parking_model.joblib")
+    ap.add_argument("--lots", type=int, default=50)
+    ap.add_argument("--days", type=int, default=14)
+    ap.add_argument("--batches", default="1,100,5000")
+    args = ap.parse_args()
+
+    base = load_parking_forecaster(args.model)
+    start = datetime(2024, 3, 4)
+    df = generate_synthetic_parking(days=args.days, lots=args.lots, resolution_min=5, start=start)
+    times = df["datetime"].to_numpy()
+    occ = df["occupancy"].to_numpy()
+    exam = df["is_exam"].to_numpy()
+    print(f"{len(df):,} readings ({args.lots} lots, {args.days} days, 5-minute), served from the {base.source}")
+
+    for batch in (int(b) for b in args.batches.split(",")):
+        online = OnlineParkingModel(readings_per_hour=12 * args.lots)
+        n = min(len(occ), batch * 200)
+        t0 = time.perf_counter()
+        for i in range(0, n, batch):
+            online.observe(base, times[i:i + batch], occ[i:i + batch], exam[i:i + batch])
+        took = time.perf_counter() - t0
+        updates = -(-n // batch)
+        print(f"batch {batch:>5}: {took / updates * 1000:7.3f} ms per update, "
+              f"{n / took:>12,.0f} readings/s")
+
+    online = OnlineParkingModel(readings_per_hour=12 * args.lots)
+    online.observe(base, times, occ, exam)
+    now = datetime.fromisoformat(str(times[-1])[:19]) + timedelta(minutes=5)
+    print(f"6-hour forecast with online statistics: {timed_ms(lambda: online.forecast(base, now, 6)):.3f} ms "
+          f"(table alone: {timed_ms(lambda: base.forecast(now, 6)):.3f} ms)")
+
+    before = [r["predicted_occupancy"] for r in online.forecast(base, now, 4)]
+    for minutes in range(5, 35, 5):
+        # one round of readings with every lot full
+        at = now + timedelta(minutes=minutes)
+        online.observe(base, [at] * args.lots, np.ones(args.lots))
+        if minutes in (5, 15, 30):
+            after = [r["predicted_occupancy"] for r in online.forecast(base, at, 4)]
+            print(f"{minutes:>2} min into a closure: next 4 h "
+                  + " ".join(f"{b:.2f}->{a:.2f}" for b, a in zip(before, after)))
+
+
+def timed_ms(fn, repeat: int = 1000) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1000
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Compare in-memory and out-of-core training of the parking model.
+
+Writes synthetic occupancy history (``--lots`` lots, ``--days`` days at
+``--resolution`` minutes) as chunked ``.npy`` or Parquet files, one chunk per
+``--chunk-days``, then trains with ``train_out_of_core`` and reports MAE,
+wall time and peak memory. With ``--in-memory`` the same history is also
+loaded as one DataFrame and passed to ``train_model`` for comparison (only
+sensible for sizes that fit in RAM).
+
+Run from the project root:
+
+    python benchmarks/bench_out_of_core_training.py --lots 50 --days 180 --in-memory
+    python benchmarks/bench_out_of_core_training.py --lots 300 --days 730 --resolution 5 --format parquet
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from ml import out_of_core  # noqa: E402
+from ml.parking_predictor import generate_synthetic_parking, train_model  # noqa: E402
+
+
+def history(args):
+    start = datetime(2024, 1, 1)
+    for i, day0 in enumerate(range(0, args.days, args.chunk_days)):
+        yield generate_synthetic_parking(days=min(args.chunk_days, args.days - day0), seed=i, lots=args.lots,
+                                         resolution_min=args.resolution, start=start + timedelta(days=day0),
+                                         compact=True)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--lots", type=int, default=50)
+    ap.add_argument("--days", type=int, default=180)
+    ap.add_argument("--resolution", type=int, default=15, help="minutes per row")
+    ap.add_argument("--chunk-days", type=int, default=14)
+    ap.add_argument("--format", choices=["npy", "parquet"], default="npy")
+    ap.add_argument("--sample-size", type=int, default=200_000)
+    ap.add_argument("--in-memory", action="store_true", help="also run train_model on the full DataFrame")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        chunks = os.path.join(tmp, "chunks")
+        t0 = time.perf_counter()
+        writer = out_of_core.write_npy_chunks if args.format == "npy" else out_of_core.write_parquet_chunks
+        n_chunks = len(writer(history(args), chunks))
+        print(f"wrote {n_chunks} {args.format} chunks in {time.perf_counter() - t0:.1f} s")
+
+        info = out_of_core.train_out_of_core(chunks, model_path=os.path.join(tmp, "ooc.joblib"),
+                                             sample_size=args.sample_size)
+        print(f"out-of-core: {info['rows']:,} rows, fit on {info['sample_rows']:,}, scored on "
+              f"{info['test_rows']:,}: MAE {info['mae']:.4f}, {info['seconds']:.1f} s, "
+              f"peak {info['peak_mem_mb']:,.0f} MB traced, max RSS {info['max_rss_mb']:,.0f} MB")
+
+        if args.in_memory:
+            tracemalloc.start()
+            t0 = time.perf_counter()
+            df = pd.concat(history(args), ignore_index=True)
+            res = train_model(df, model_path=os.path.join(tmp, "mem.joblib"))
+            seconds = time.perf_counter() - t0
+            peak = tracemalloc.get_traced_memory()[1] / 1e6
+            tracemalloc.stop()
+            print(f"in-memory:   {len(df):,} rows: MAE {res['mae']:.4f}, {seconds:.1f} s, "
+                  f"peak {peak:,.0f} MB traced, max RSS {out_of_core._peak_rss_mb():,.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
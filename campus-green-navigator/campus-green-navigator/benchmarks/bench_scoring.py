@@ -0,0 +1,62 @@
+"""Benchmark vectorized trip scoring against the scalar per-trip loop.
+
+Scores a synthetic month of trip logs (CO2 for fast and eco legs, savings and
+points) both ways and checks the results are identical.
+
+Run from the project root:
+
+    python benchmarks/bench_scoring.py --trips 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from components.points_system import calculate_points, score_trips  # noqa: E402
+from utils.helpers import calculate_co2_grams  # noqa: E402
+
+
+def synthetic_trips(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    fast_km = rng.uniform(0.5, 15.0, n)
+    return pd.DataFrame({
+        "vehicle": rng.choice(["Car", "EV", "Bike", "Walk"], size=n, p=[0.5, 0.2, 0.2, 0.1]),
+        "fast_km": fast_km,
+        "eco_km": fast_km * rng.uniform(0.8, 1.1, n),
+        "extra_min": rng.integers(0, 6, n).astype(float),
+    })
+
+
+def scalar_loop(df: pd.DataFrame) -> list:
+    points = []
+    for v, f, e, m in zip(df["vehicle"].tolist(), df["fast_km"].tolist(), df["eco_km"].tolist(), df["extra_min"].tolist()):
+        savings = max(0, calculate_co2_grams(v, f) - calculate_co2_grams(v, e))
+        points.append(calculate_points(savings, m))
+    return points
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--trips", type=int, default=1_000_000)
+    args = ap.parse_args()
+    df = synthetic_trips(args.trips)
+
+    t0 = time.perf_counter()
+    expected = scalar_loop(df)
+    scalar_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    out = score_trips(df["vehicle"], df["fast_km"], df["eco_km"], df["extra_min"])
+    vector_s = time.perf_counter() - t0
+
+    assert out["points"].tolist() == expected
+    print(f"{args.trips} trips | scalar loop {scalar_s:.3f}s | vectorized {vector_s:.3f}s | {scalar_s / vector_s:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
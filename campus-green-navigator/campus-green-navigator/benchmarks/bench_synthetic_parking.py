@@ -0,0 +1,78 @@
+"""Benchmark synthetic parking history generation.
+
+Times ``generate_synthetic_parking`` against the original row-by-row loop
+(one ``rng.normal`` call and one dict per row) at the default size, then
+times the vectorized generator alone at sensor-history scale.
+
+Run from the project root:
+
+    python benchmarks/bench_synthetic_parking.py --days 365 --lots 100 --resolution 5
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from ml.parking_predictor import generate_synthetic_parking  # noqa: E402
+
+
+def loop_generate(days: int, seed: int, start: datetime) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    rows = []
+    for d in range(days):
+        date = start + timedelta(days=d)
+        is_exam = (d % 30) in (10, 11, 12)
+        for h in range(24):
+            dt = date + timedelta(hours=h)
+            base = 0.2
+            if 8 <= h <= 10 or 14 <= h <= 16:
+                base += 0.5
+            if h < 6 or h >= 22:
+                base -= 0.15
+            if dt.weekday() >= 5:
+                base -= 0.25
+            if is_exam:
+                base -= 0.4
+            occ = np.clip(base + rng.normal(0, 0.05), 0.0, 1.0)
+            rows.append({"datetime": dt, "hour": h, "weekday": dt.weekday(), "is_weekend": int(dt.weekday() >= 5),
+                         "is_exam": int(is_exam), "occupancy": occ})
+    return pd.DataFrame(rows)
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--days", type=int, default=365)
+    ap.add_argument("--lots", type=int, default=100)
+    ap.add_argument("--resolution", type=int, default=5, help="minutes per row")
+    ap.add_argument("--loop-days", type=int, default=365, help="size of the loop-vs-vectorized comparison")
+    args = ap.parse_args()
+
+    start = datetime(2024, 1, 1)
+    old, t_old = timed(lambda: loop_generate(args.loop_days, 42, start))
+    new, t_new = timed(lambda: generate_synthetic_parking(days=args.loop_days, start=start))
+    pd.testing.assert_frame_equal(new, old, check_exact=True)
+    print(f"{len(new):,} rows (defaults): loop {t_old * 1000:.0f} ms, vectorized {t_new * 1000:.1f} ms, "
+          f"{t_old / t_new:.0f}x, identical output")
+
+    for compact in (False, True):
+        df, t = timed(lambda: generate_synthetic_parking(days=args.days, lots=args.lots,
+                                                         resolution_min=args.resolution, start=start, compact=compact))
+        print(f"{len(df):,} rows ({args.lots} lots, {args.days} days, {args.resolution}-min, compact={compact}): "
+              f"{t:.2f} s, {df.memory_usage().sum() / 1e6:,.0f} MB")
+        del df
+
+
+if __name__ == "__main__":
+    main()
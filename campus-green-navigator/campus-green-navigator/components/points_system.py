@@ -1,6 +1,9 @@
 # components/points_system.py
+import numpy as np
 import streamlit as st
 
+from utils.helpers import emission_factors_array, require_finite
+
 REWARDS = {
     "Free Coffee": 50,
     "Library Priority": 100,
@@ -30,6 +33,42 @@ def calculate_points(co2_savings_g: float, extra_minutes: float) -> int:
     return pts
 
 
+def calculate_points_array(co2_savings_g, extra_minutes) -> np.ndarray:
+    """Vectorized `calculate_points` over arrays (or pandas columns).
+
+    np.round rounds half to even like the builtin round, so results match the
+    scalar function exactly. NaN or infinite inputs raise ValueError rather
+    than being cast to garbage integers.
+    """
+    savings = np.asarray(co2_savings_g, dtype=np.float64)
+    minutes = np.asarray(extra_minutes, dtype=np.float64)
+    require_finite("co2_savings_g", savings)
+    require_finite("extra_minutes", minutes)
+    co2_kg = savings / 1000.0
+    base = co2_kg * 2.0
+    penalty = minutes * 5.0
+    raw = base - penalty
+    return np.maximum(10, np.round(raw)).astype(np.int64)
+
+
+def score_trips(vehicle_types, fast_km, eco_km, extra_minutes) -> dict:
+    """Score a batch of eco-route trips in one pass.
+
+    Returns arrays ``co2_fast_g``, ``co2_eco_g``, ``co2_savings_g`` (clipped at 0,
+    as on the Home page) and ``points``.
+    """
+    factors = emission_factors_array(vehicle_types)
+    co2_fast = factors * np.asarray(fast_km, dtype=np.float64)
+    co2_eco = factors * np.asarray(eco_km, dtype=np.float64)
+    savings = np.maximum(0.0, co2_fast - co2_eco)
+    return {
+        "co2_fast_g": co2_fast,
+        "co2_eco_g": co2_eco,
+        "co2_savings_g": savings,
+        "points": calculate_points_array(savings, extra_minutes),
+    }
+
+
 def add_points(points: int, reason: str = ""):
     init_points()
     st.session_state.points += points
@@ -0,0 +1,220 @@
+# ml/compiled_forest.py
+"""RandomForest compiled into flat NumPy node arrays for serving.
+
+``CompiledForest.from_sklearn`` concatenates the nodes of every tree into
+contiguous ``feature`` / ``threshold`` / ``left`` / ``right`` / ``value``
+arrays (child indices are global; leaves point at themselves). Prediction
+walks all trees for all distinct input rows at once, one vectorized step per
+tree level, and returns the forest mean together with the spread across trees;
+no per-tree Python loop and no sklearn input validation.
+
+The arrays are saved next to the joblib artifact as ``<model>.forest.npz``
+together with a digest of the artifact they were compiled from, so serving
+processes load them with NumPy alone and never serve arrays of another model.
+
+Results match ``model.predict`` exactly: inputs are compared as float32 like
+sklearn does, and tree outputs are summed in tree order.
+"""
+import hashlib
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+def forest_path(model_path: str) -> str:
+    """Where the compiled arrays of the model at ``model_path`` are stored."""
+    return os.path.splitext(model_path)[0] + ".forest.npz"
+
+
+def file_digest(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class CompiledForest:
+    """A regression forest as flat node arrays."""
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray, right: np.ndarray,
+                 value: np.ndarray, roots: np.ndarray, depth: int, feature_names: Optional[List[str]] = None,
+                 feature_importances: Optional[np.ndarray] = None, source_digest: Optional[str] = None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.depth = depth
+        self.feature_names = feature_names
+        self.feature_importances_ = feature_importances
+        self.source_digest = source_digest  # of the joblib artifact this was compiled from
+
+    @property
+    def n_estimators(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    @classmethod
+    def from_sklearn(cls, model: Any) -> "CompiledForest":
+        """Flatten a fitted single-output forest (``estimators_`` of decision trees)."""
+        feature, threshold, left, right, value, roots = [], [], [], [], [], []
+        offset = depth = 0
+        for est in model.estimators_:
+            t = est.tree_
+            n = t.node_count
+            leaf = t.children_left < 0
+            own = np.arange(offset, offset + n, dtype=np.int32)
+            feature.append(np.where(leaf, 0, t.feature).astype(np.int32))
+            threshold.append(np.where(leaf, np.inf, t.threshold))
+            left.append(np.where(leaf, own, t.children_left + offset).astype(np.int32))
+            right.append(np.where(leaf, own, t.children_right + offset).astype(np.int32))
+            value.append(t.value[:, 0, 0])
+            roots.append(offset)
+            offset += n
+            depth = max(depth, int(t.max_depth))
+        names = getattr(model, "feature_names_in_", None)
+        return cls(
+            np.concatenate(feature), np.concatenate(threshold), np.concatenate(left), np.concatenate(right),
+            np.concatenate(value).astype(np.float64), np.asarray(roots, dtype=np.int32), depth,
+            feature_names=None if names is None else [str(n) for n in names],
+            feature_importances=getattr(model, "feature_importances_", None),
+        )
+
+    def save(self, path: str) -> None:
+        """Write the arrays to ``path`` (.npz) atomically."""
+        arrays: Dict[str, Any] = dict(feature=self.feature, threshold=self.threshold, left=self.left, right=self.right,
+                                      value=self.value, roots=self.roots, depth=np.asarray(self.depth))
+        if self.feature_names is not None:
+            arrays["feature_names"] = np.asarray(self.feature_names)
+        if self.feature_importances_ is not None:
+            arrays["feature_importances"] = np.asarray(self.feature_importances_)
+        if self.source_digest is not None:
+            arrays["source_digest"] = np.asarray(self.source_digest)
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "CompiledForest":
+        with np.load(path) as z:
+            return cls(
+                z["feature"], z["threshold"], z["left"], z["right"], z["value"], z["roots"], int(z["depth"]),
+                feature_names=z["feature_names"].tolist() if "feature_names" in z else None,
+                feature_importances=z["feature_importances"] if "feature_importances" in z else None,
+                source_digest=str(z["source_digest"]) if "source_digest" in z else None,
+            )
+
+    def _inputs(self, X: Any) -> np.ndarray:
+        if self.feature_names is not None and hasattr(X, "columns"):
+            X = X[self.feature_names]
+        # sklearn trees compare float32 inputs against float64 thresholds
+        return np.ascontiguousarray(X, dtype=np.float32)
+
+    def _leaves(self, X: Any) -> Tuple[np.ndarray, np.ndarray]:
+        """Leaf reached in every tree by every distinct row, and each row's distinct-row index.
+
+        Serving batches repeat the same few time features, so each distinct
+        row is walked once. All (tree, row) pairs step down one level per
+        iteration; pairs that reached a leaf drop out of the active set.
+        """
+        X = self._inputs(X)
+        n_rows, n_features = X.shape
+        rows = X.view(np.dtype((np.void, X.dtype.itemsize * n_features))).ravel()
+        _, first, inverse = np.unique(rows, return_index=True, return_inverse=True)
+        flat = X[first].ravel()
+        n = len(first)
+        node = np.repeat(self.roots, n)
+        offset = np.tile(np.arange(n, dtype=np.int64) * n_features, len(self.roots))
+        active = np.flatnonzero(self.left[node] != node)
+        for _ in range(self.depth):
+            if not len(active):
+                break
+            at = node[active]
+            go_left = flat[offset[active] + self.feature[at]] <= self.threshold[at]
+            at = np.where(go_left, self.left[at], self.right[at])
+            node[active] = at
+            active = active[self.left[at] != at]
+        return node.reshape(len(self.roots), n), inverse.ravel()
+
+    def tree_predictions(self, X: Any) -> np.ndarray:
+        """``(n_estimators, n_rows)`` per-tree predictions."""
+        leaves, inverse = self._leaves(X)
+        return self.value[leaves][:, inverse]
+
+    def predict_with_std(self, X: Any) -> Tuple[np.ndarray, np.ndarray]:
+        """Forest mean and the standard deviation across trees, per row."""
+        leaves, inverse = self._leaves(X)
+        per_tree = self.value[leaves]
+        mean = np.zeros(per_tree.shape[1])
+        for row in per_tree:  # same summation order as RandomForestRegressor.predict
+            mean += row
+        mean /= len(per_tree)
+        return mean[inverse], np.std(per_tree, axis=0)[inverse]
+
+    def predict(self, X: Any) -> np.ndarray:
+        return self.predict_with_std(X)[0]
+
+
+class _EstimatorModel:
+    """Adapter giving a non-forest estimator the ``predict_with_std`` interface (zero spread)."""
+
+    def __init__(self, model: Any):
+        self.model = model
+        self.feature_importances_ = getattr(model, "feature_importances_", None)
+
+    def predict(self, X: Any) -> np.ndarray:
+        return np.asarray(self.model.predict(X), dtype=np.float64)
+
+    def predict_with_std(self, X: Any) -> Tuple[np.ndarray, np.ndarray]:
+        preds = self.predict(X)
+        return preds, np.zeros_like(preds)
+
+
+def servable(model: Any) -> Any:
+    """``model`` with the ``predict_with_std`` interface: compiled if it is a forest."""
+    if hasattr(model, "estimators_"):
+        return CompiledForest.from_sklearn(model)
+    return _EstimatorModel(model)
+
+
+def export_forest(model: Any, model_path: str) -> str:
+    """Compile the forest saved at ``model_path`` and write it next to it; returns the .npz path."""
+    forest = CompiledForest.from_sklearn(model)
+    forest.source_digest = file_digest(model_path)
+    path = forest_path(model_path)
+    forest.save(path)
+    return path
+
+
+def load_parking_model(model_path: str, digest: Optional[str] = None) -> Any:
+    """Servable model for a joblib artifact: its compiled arrays when they match it.
+
+    Falls back to loading the joblib file (which imports sklearn) and
+    compiling it in memory when there are no arrays for this artifact.
+    """
+    digest = digest or file_digest(model_path)
+    try:
+        forest = CompiledForest.load(forest_path(model_path))
+        if forest.source_digest == digest:
+            return forest
+    except (OSError, KeyError, ValueError):
+        pass
+    import joblib
+
+    return servable(joblib.load(model_path))
+
+
+if __name__ == "__main__":
+    # compile an existing artifact: python -m ml.compiled_forest ml/parking_model.joblib
+    import sys
+
+    import joblib
+
+    for path in sys.argv[1:]:
+        print(export_forest(joblib.load(path), path))
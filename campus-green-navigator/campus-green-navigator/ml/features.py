@@ -0,0 +1,25 @@
+# ml/features.py
+"""Parking model inputs derived from the calendar (no sklearn needed here)."""
+import numpy as np
+
+FEATURES = ["hour_sin", "hour_cos", "day_sin", "day_cos", "is_weekend", "is_exam"]
+
+
+def time_feature_matrix(hour, weekday, is_weekend, is_exam, dtype=np.float64):
+    """Model inputs as one ``(n, 6)`` array, in ``FEATURES`` order.
+
+    Reads the source columns (e.g. memory-mapped arrays) without copying them;
+    the trig terms are looked up from 24- and 7-entry tables.
+    """
+    hour = np.asarray(hour)
+    weekday = np.asarray(weekday)
+    hour_angle = 2 * np.pi * np.arange(24) / 24.0
+    day_angle = 2 * np.pi * np.arange(7) / 7.0
+    X = np.empty((len(hour), len(FEATURES)), dtype=dtype)
+    X[:, 0] = np.sin(hour_angle)[hour]
+    X[:, 1] = np.cos(hour_angle)[hour]
+    X[:, 2] = np.sin(day_angle)[weekday]
+    X[:, 3] = np.cos(day_angle)[weekday]
+    X[:, 4] = is_weekend
+    X[:, 5] = is_exam
+    return X
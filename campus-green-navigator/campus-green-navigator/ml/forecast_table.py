@@ -0,0 +1,171 @@
+# ml/forecast_table.py
+"""Hour-of-week forecast table for the parking model.
+
+The model's inputs (``ml/features.py``) are all derived from hour of day,
+weekday and the exam flag, so there are only 24 x 7 x 2 distinct inputs.
+``save_model`` predicts every one of them once and writes the mean and the
+spread across trees next to the artifact as ``<model>.table.npz`` (tagged with
+the artifact's digest and the feature list it covers). A forecast is then two
+array lookups by ``hour_of_week_index``.
+
+``ParkingForecaster`` is what the serving code gets from the model registry:
+it answers from the table when there is one for this artifact and feature set,
+and runs the model itself otherwise (no table written yet, or a model whose
+inputs are no longer a small discrete space).
+"""
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from ml.compiled_forest import file_digest, load_parking_model, servable
+from ml.features import FEATURES, time_feature_matrix
+
+N_SLOTS = 24 * 7 * 2
+
+
+def table_path(model_path: str) -> str:
+    """Where the forecast table of the model at ``model_path`` is stored."""
+    return os.path.splitext(model_path)[0] + ".table.npz"
+
+
+def hour_of_week_index(hour: Any, weekday: Any, is_exam: Any) -> np.ndarray:
+    """Table slot of each (hour, weekday, is_exam): ``(weekday * 24 + hour) * 2 + is_exam``."""
+    return (np.asarray(weekday, dtype=np.int64) * 24 + np.asarray(hour)) * 2 + np.asarray(is_exam)
+
+
+def _slots() -> Dict[str, np.ndarray]:
+    slot = np.arange(N_SLOTS)
+    weekday, rest = np.divmod(slot, 48)
+    hour, is_exam = np.divmod(rest, 2)
+    return {"hour": hour, "weekday": weekday, "is_weekend": (weekday >= 5).astype(np.int64), "is_exam": is_exam}
+
+
+def covers(feature_names: Optional[Sequence[str]]) -> bool:
+    """Whether a model with these inputs can be tabulated (only the calendar features)."""
+    return feature_names is not None and list(feature_names) == FEATURES
+
+
+class ForecastTable:
+    """Predicted occupancy and its spread for every hour-of-week slot."""
+
+    def __init__(self, mean: np.ndarray, std: np.ndarray, features: List[str], source_digest: Optional[str] = None):
+        self.mean = mean
+        self.std = std
+        self.features = features
+        self.source_digest = source_digest
+
+    @classmethod
+    def build(cls, model: Any) -> "ForecastTable":
+        """Tabulate a model with ``predict_with_std`` over all ``N_SLOTS`` inputs."""
+        s = _slots()
+        X = time_feature_matrix(s["hour"], s["weekday"], s["is_weekend"], s["is_exam"])
+        mean, std = model.predict_with_std(pd.DataFrame(X, columns=FEATURES))
+        return cls(np.asarray(mean, dtype=np.float64), np.asarray(std, dtype=np.float64), list(FEATURES))
+
+    def save(self, path: str) -> None:
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, mean=self.mean, std=self.std, features=np.asarray(self.features),
+                 source_digest=np.asarray(self.source_digest or ""))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "ForecastTable":
+        with np.load(path) as z:
+            return cls(z["mean"], z["std"], z["features"].tolist(), str(z["source_digest"]) or None)
+
+    def lookup(self, hour: Any, weekday: Any, is_exam: Any = 0):
+        """``(mean, std)`` arrays for the given hours of the week."""
+        slot = hour_of_week_index(hour, weekday, is_exam)
+        return self.mean[slot], self.std[slot]
+
+    def forecast(self, start: Any, hours: int, is_exam: int = 0) -> List[Dict[str, Any]]:
+        """``hours`` hourly forecasts from ``start`` (see ``ParkingForecaster.forecast``)."""
+        t = hours_ahead(start, hours)
+        return forecast_rows(t["label"], *self.lookup(t["hour"], t["weekday"], is_exam))
+
+
+def export_table(model: Any, model_path: str) -> Optional[str]:
+    """Write the table for the artifact at ``model_path``; None if its inputs aren't tabulable."""
+    if not covers(getattr(model, "feature_names_in_", None)):
+        return None
+    table = ForecastTable.build(servable(model))
+    table.source_digest = file_digest(model_path)
+    path = table_path(model_path)
+    table.save(path)
+    return path
+
+
+def load_table(model_path: str, digest: Optional[str] = None) -> Optional[ForecastTable]:
+    """The table for the artifact at ``model_path`` if there is a current one for ``FEATURES``."""
+    try:
+        table = ForecastTable.load(table_path(model_path))
+    except (OSError, KeyError, ValueError):
+        return None
+    if table.features != FEATURES or table.source_digest != (digest or file_digest(model_path)):
+        return None
+    return table
+
+
+def calendar(t: np.ndarray):
+    """Hour of day and weekday (Monday = 0) of ``datetime64`` values."""
+    midnight = t.astype("datetime64[D]")
+    hour = ((t - midnight) // np.timedelta64(1, "h")).astype(np.int64)
+    return hour, (midnight.astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday
+
+
+def hours_ahead(start: Any, hours: int) -> Dict[str, Any]:
+    """Times, labels, hours and weekdays of ``hours`` hourly steps from ``start`` (to the minute)."""
+    t = np.datetime64(pd.Timestamp(start).to_pydatetime(), "m") + np.arange(hours) * np.timedelta64(60, "m")
+    hour, weekday = calendar(t)
+    return {
+        "time": t,
+        "label": [s.replace("T", " ") for s in np.datetime_as_string(t, unit="m")],
+        "hour": hour,
+        "weekday": weekday,
+    }
+
+
+def forecast_rows(labels: List[str], mean: np.ndarray, std: np.ndarray) -> List[Dict[str, Any]]:
+    return [
+        {"hour": label, "predicted_occupancy": float(m), "uncertainty_std": float(s)}
+        for label, m, s in zip(labels, mean, std)
+    ]
+
+
+class ParkingForecaster:
+    """Hourly occupancy forecasts from the table, or from the model when there is none."""
+
+    def __init__(self, model: Any, table: Optional[ForecastTable] = None):
+        self.model = model
+        self.table = table
+        self.feature_importances_ = getattr(model, "feature_importances_", None)
+
+    @property
+    def source(self) -> str:
+        return "table" if self.table is not None else "model"
+
+    def predict_with_std(self, X: Any):
+        return self.model.predict_with_std(X)
+
+    def forecast_arrays(self, hour: Any, weekday: Any, is_exam: Any = 0):
+        """``(mean, std)`` for arrays of hours and weekdays."""
+        if self.table is not None:
+            return self.table.lookup(hour, weekday, is_exam)
+        hour = np.asarray(hour)
+        weekday = np.asarray(weekday)
+        X = time_feature_matrix(hour, weekday, (weekday >= 5).astype(np.int64), np.broadcast_to(is_exam, hour.shape))
+        return self.model.predict_with_std(pd.DataFrame(X, columns=FEATURES))
+
+    def forecast(self, start: Any, hours: int, is_exam: int = 0) -> List[Dict[str, Any]]:
+        """``hours`` hourly forecasts from ``start``, as the /parking endpoint returns them."""
+        t = hours_ahead(start, hours)
+        mean, std = self.forecast_arrays(t["hour"], t["weekday"], is_exam)
+        return forecast_rows(t["label"], mean, std)
+
+
+def load_parking_forecaster(model_path: str) -> ParkingForecaster:
+    """Registry loader: the servable model plus its forecast table when it has a current one."""
+    digest = file_digest(model_path)
+    return ParkingForecaster(load_parking_model(model_path, digest), load_table(model_path, digest))
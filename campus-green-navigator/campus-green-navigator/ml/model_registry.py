@@ -0,0 +1,185 @@
+# ml/model_registry.py
+"""Warm model registry: load a joblib model once, hot-swap it when it changes.
+
+Serving code asks ``registry.current()`` for the model instead of calling
+``joblib.load`` per request. The artifact (and its optional ``.version`` file)
+is stat-ed at most every ``check_interval_s``; when it changes the new model
+is loaded in a background thread while requests keep using the old one, and
+then swapped in with a single reference assignment, so no request waits for
+or sees a half-loaded model. A failed load (e.g. a file still being written)
+keeps the old model and is retried on the next check.
+
+The version is the contents of ``<model>.version`` (written by ``train_model``
+after the artifact), or the artifact's mtime when there is no current one.
+The last ``keep`` versions stay resident and can be pinned with
+``registry.get(version)``, e.g. to compare a new model against the previous one.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import joblib
+
+from ml.forecast_table import load_parking_forecaster
+
+PARKING_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "parking_model.joblib")
+
+
+def version_path(model_path: str) -> str:
+    """The version file written next to a model artifact."""
+    return model_path + ".version"
+
+
+class LoadedModel:
+    """A resident model and where it came from."""
+
+    __slots__ = ("model", "version", "path", "mtime", "loaded_at", "load_s")
+
+    def __init__(self, model: Any, version: str, path: str, mtime: float, loaded_at: float, load_s: float):
+        self.model = model
+        self.version = version
+        self.path = path
+        self.mtime = mtime
+        self.loaded_at = loaded_at
+        self.load_s = load_s
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "path": self.path,
+            "mtime": self.mtime,
+            "loaded_at": self.loaded_at,
+            "load_s": round(self.load_s, 4),
+        }
+
+
+class ModelRegistry:
+    """Keeps the model at ``path`` loaded and current, plus the previous ``keep - 1`` versions."""
+
+    def __init__(self, path: str, keep: int = 3, check_interval_s: float = 2.0,
+                 loader: Callable[[str], Any] = joblib.load):
+        self.path = path
+        self.keep = max(1, keep)
+        self.check_interval_s = check_interval_s
+        self._loader = loader
+        self._current: Optional[LoadedModel] = None
+        self._resident: "OrderedDict[str, LoadedModel]" = OrderedDict()
+        self._signature: Optional[Tuple[Any, ...]] = None  # of the artifact behind _current
+        self._checked_at = 0.0
+        self._loading = False
+        self._lock = threading.Lock()
+        self._first_load = threading.Lock()
+        self.counters: Dict[str, int] = {"loads": 0, "failed_loads": 0, "swaps": 0}
+
+    def _stat(self) -> Optional[Tuple[Any, ...]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        try:
+            vst = os.stat(version_path(self.path))
+            vsig: Tuple[Any, ...] = (vst.st_mtime_ns, vst.st_size)
+        except OSError:
+            vsig = ()
+        return (st.st_mtime_ns, st.st_size) + vsig
+
+    def _version(self, sig: Tuple[Any, ...]) -> str:
+        # a version file older than the artifact describes the previous model
+        if len(sig) > 2 and sig[2] >= sig[0]:
+            try:
+                with open(version_path(self.path)) as f:
+                    version = f.read().strip()
+                if version:
+                    return version
+            except OSError:
+                pass
+        return time.strftime("mtime-%Y%m%dT%H%M%S", time.localtime(sig[0] / 1e9))
+
+    def load(self) -> Optional[LoadedModel]:
+        """Load the artifact now and make it current; None if it can't be loaded."""
+        sig = self._stat()
+        if sig is None:
+            return None
+        t0 = time.perf_counter()
+        try:
+            model = self._loader(self.path)
+        except Exception:
+            with self._lock:
+                self.counters["failed_loads"] += 1
+            return None
+        loaded = LoadedModel(model, self._version(sig), self.path, sig[0] / 1e9, time.time(), time.perf_counter() - t0)
+        with self._lock:
+            self.counters["loads"] += 1
+            if self._current is not None:
+                self.counters["swaps"] += 1
+            self._resident.pop(loaded.version, None)
+            self._resident[loaded.version] = loaded
+            while len(self._resident) > self.keep:
+                self._resident.popitem(last=False)
+            self._current = loaded
+            self._signature = sig
+        return loaded
+
+    def _reload_in_background(self) -> None:
+        try:
+            self.load()
+        finally:
+            with self._lock:
+                self._loading = False
+
+    def current(self) -> Optional[LoadedModel]:
+        """The newest loaded model; None if there is no usable artifact yet.
+
+        Loads synchronously only when nothing is loaded; later changes are
+        picked up in the background.
+        """
+        now = time.monotonic()
+        with self._lock:
+            current = self._current
+            if current is not None and now - self._checked_at < self.check_interval_s:
+                return current
+            self._checked_at = now
+        sig = self._stat()
+        if current is None:
+            if sig is None:
+                return None
+            with self._first_load:  # concurrent first callers share one load
+                return self._current or self.load()
+        if sig is not None and sig != self._signature:
+            with self._lock:
+                start, self._loading = not self._loading, True
+            if start:
+                threading.Thread(target=self._reload_in_background, name="cgn-model-reload", daemon=True).start()
+        return current
+
+    def get(self, version: str) -> LoadedModel:
+        """A resident model by version; raises KeyError if it isn't loaded."""
+        with self._lock:
+            return self._resident[version]
+
+    def versions(self) -> List[Dict[str, Any]]:
+        """Resident versions, oldest first."""
+        with self._lock:
+            return [m.info() for m in self._resident.values()]
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            current = self._current
+            return dict(
+                self.counters,
+                current=current.info() if current is not None else None,
+                resident=[m.version for m in self._resident.values()],
+                reloading=self._loading,
+            )
+
+
+@lru_cache(maxsize=None)
+def parking_models() -> ModelRegistry:
+    """Process-wide registry for the parking occupancy model.
+
+    Models are served as ``ParkingForecaster`` (see ``ml/forecast_table.py``).
+    """
+    return ModelRegistry(PARKING_MODEL_PATH, loader=load_parking_forecaster)
@@ -0,0 +1,176 @@
+# ml/online.py
+"""Online updates of the parking forecast from streaming occupancy readings.
+
+The forest is retrained in batch; between retrains ``OnlineParkingModel``
+folds live readings into two sets of exponentially decayed statistics and
+adjusts the forest's forecast (``ParkingForecaster.forecast_arrays``, i.e.
+usually the hour-of-week table) with them:
+
+* per hour-of-week slot (24 x 7 x 2, as in ``ml/forecast_table.py``), the
+  decayed weight, sum and sum of squares of observed occupancy (half-life
+  ``slot_half_life_s``). Weights are in hours of readings (a reading counts
+  ``1 / readings_per_hour``). A slot's forecast is the forest's, blended with
+  its observed mean as if the forest were worth ``prior_hours`` of readings,
+  so the weekly pattern drifts toward what the sensors report;
+* a short-memory level (half-life ``level_half_life_s``): the decayed mean
+  residual of recent readings against that slot forecast, trusted once it
+  rests on ``level_prior_hours`` of readings. It is added to the next hours'
+  forecasts, fading with the same half-life, so an event or a closure shows
+  up in the forecast on the next request.
+
+Every statistic is a decayed sum, so a micro-batch is a few ``np.bincount``
+calls: each update costs O(batch + slots) whatever the history length, and
+large inputs are applied in slices of at most ``max_batch`` readings. Times
+are event times, so replaying a stream gives the same state. A reading dated
+in the future would move the clock ahead for good and make every real one
+count for nothing, so readings later than now plus ``max_clock_skew_s`` are
+dropped.
+"""
+import threading
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from ml.forecast_table import N_SLOTS, calendar, forecast_rows, hour_of_week_index, hours_ahead
+
+
+def _seconds(t: np.ndarray) -> np.ndarray:
+    return t.astype("datetime64[us]").astype(np.int64) / 1e6
+
+
+def _timestamps(values: Any) -> np.ndarray:
+    return np.asarray(values, dtype="datetime64[us]").ravel()
+
+
+class OnlineParkingModel:
+    """Decayed per-slot occupancy statistics and a recent-residual level; see the module docstring."""
+
+    def __init__(self, slot_half_life_s: float = 7 * 86400.0, level_half_life_s: float = 3600.0,
+                 readings_per_hour: float = 12.0, prior_hours: float = 4.0, level_prior_hours: float = 0.25,
+                 max_batch: int = 5000, max_clock_skew_s: float = 300.0):
+        self.slot_half_life_s = slot_half_life_s
+        self.level_half_life_s = level_half_life_s
+        self.reading_weight = 1.0 / readings_per_hour
+        self.prior_hours = prior_hours
+        self.level_prior_hours = level_prior_hours
+        self.max_batch = max(1, max_batch)
+        self.max_clock_skew_s = max_clock_skew_s
+        self.slot_weight = np.zeros(N_SLOTS)
+        self.slot_sum = np.zeros(N_SLOTS)
+        self.slot_sq = np.zeros(N_SLOTS)
+        self.level_sum = 0.0
+        self.level_weight = 0.0
+        self.clock: Optional[float] = None  # event time (epoch seconds) the sums are decayed to
+        self.counters: Dict[str, int] = {"observations": 0, "updates": 0, "dropped": 0}
+        self._lock = threading.Lock()
+
+    def _decay_to(self, clock: float) -> None:
+        if self.clock is not None and clock > self.clock:
+            dt = clock - self.clock
+            f = 0.5 ** (dt / self.slot_half_life_s)
+            self.slot_weight *= f
+            self.slot_sum *= f
+            self.slot_sq *= f
+            g = 0.5 ** (dt / self.level_half_life_s)
+            self.level_sum *= g
+            self.level_weight *= g
+        if self.clock is None or clock > self.clock:
+            self.clock = clock
+
+    def _slot_forecast(self, base_mean: np.ndarray, base_std: np.ndarray, slot: np.ndarray, decay: float = 1.0):
+        w = self.slot_weight[slot] * decay
+        seen = w > 0
+        safe_w = np.where(seen, self.slot_weight[slot], 1.0)
+        m = self.slot_sum[slot] / safe_w
+        sd = np.sqrt(np.maximum(self.slot_sq[slot] / safe_w - m * m, 0.0))
+        k = self.prior_hours
+        mean = np.where(seen, (k * base_mean + w * m) / (k + w), base_mean)
+        std = np.where(seen, (k * base_std + w * sd) / (k + w), base_std)
+        return mean, std
+
+    def observe(self, base: Any, timestamps: Any, occupancy: Any, is_exam: Any = 0, now: Any = None) -> int:
+        """Fold readings (occupancy in [0, 1] at local ``timestamps``) into the statistics.
+
+        ``base`` is the served ``ParkingForecaster``; residuals for the level
+        are taken against its forecast. Returns how many readings were used
+        (non-finite occupancy, missing times, times more than
+        ``max_clock_skew_s`` after ``now`` (default: the local time) and an
+        ``is_exam`` other than 0 or 1 are dropped).
+        """
+        t = _timestamps(timestamps)
+        occ = np.asarray(occupancy, dtype=np.float64).ravel()
+        exam = np.broadcast_to(np.asarray(is_exam, dtype=np.int64), occ.shape)
+        latest = _timestamps([datetime.now() if now is None else now])[0]
+        latest = latest + np.timedelta64(int(self.max_clock_skew_s * 1e6), "us")
+        ok = np.isfinite(occ) & ~np.isnat(t) & (t <= latest) & ((exam == 0) | (exam == 1))
+        if not ok.all():
+            with self._lock:
+                self.counters["dropped"] += int((~ok).sum())
+            t, occ, exam = t[ok], occ[ok], exam[ok]
+        for i in range(0, len(occ), self.max_batch):
+            self._update(base, t[i:i + self.max_batch], np.clip(occ[i:i + self.max_batch], 0.0, 1.0),
+                         exam[i:i + self.max_batch])
+        return len(occ)
+
+    def _update(self, base: Any, t: np.ndarray, occ: np.ndarray, exam: np.ndarray) -> None:
+        hour, weekday = calendar(t)
+        slot = hour_of_week_index(hour, weekday, exam)
+        base_mean, base_std = base.forecast_arrays(hour, weekday, exam)
+        secs = _seconds(t)
+        with self._lock:
+            self._decay_to(float(secs.max()))
+            age = self.clock - secs  # readings older than the clock count for less
+            ws = self.reading_weight * 0.5 ** (age / self.slot_half_life_s)
+            wl = self.reading_weight * 0.5 ** (age / self.level_half_life_s)
+            self.slot_weight += np.bincount(slot, ws, N_SLOTS)
+            self.slot_sum += np.bincount(slot, ws * occ, N_SLOTS)
+            self.slot_sq += np.bincount(slot, ws * occ * occ, N_SLOTS)
+            # the level is what the updated slot statistics don't explain
+            expected = self._slot_forecast(base_mean, base_std, slot)[0]
+            self.level_sum += float(np.dot(wl, occ - expected))
+            self.level_weight += float(wl.sum())
+            self.counters["observations"] += len(occ)
+            self.counters["updates"] += 1
+
+    def forecast_arrays(self, base: Any, hour: Any, weekday: Any, is_exam: Any, at: np.ndarray, now: Any):
+        """``(mean, std)`` for the hours of the week at times ``at``, as seen at ``now``."""
+        hour = np.asarray(hour)
+        weekday = np.asarray(weekday)
+        base_mean, base_std = base.forecast_arrays(hour, weekday, is_exam)
+        slot = hour_of_week_index(hour, weekday, np.broadcast_to(is_exam, hour.shape))
+        now_s = float(_seconds(_timestamps([now]))[0])
+        with self._lock:
+            if self.clock is None:
+                return base_mean, base_std
+            idle = max(now_s - self.clock, 0.0)
+            mean, std = self._slot_forecast(base_mean, base_std, slot, 0.5 ** (idle / self.slot_half_life_s))
+            level_weight = self.level_weight * 0.5 ** (idle / self.level_half_life_s)
+            level = self.level_sum / self.level_weight if self.level_weight > 0 else 0.0
+        if level_weight > 0:
+            ahead = np.maximum(_seconds(_timestamps(at)) - now_s, 0.0)
+            shrink = level_weight / (level_weight + self.level_prior_hours)
+            mean = np.clip(mean + shrink * level * 0.5 ** (ahead / self.level_half_life_s), 0.0, 1.0)
+        return mean, std
+
+    def forecast(self, base: Any, start: Any, hours: int, is_exam: int = 0) -> List[Dict[str, Any]]:
+        """Like ``ParkingForecaster.forecast``, with the online statistics applied as of ``start``."""
+        t = hours_ahead(start, hours)
+        return forecast_rows(t["label"], *self.forecast_arrays(base, t["hour"], t["weekday"], is_exam, t["time"], start))
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(
+                self.counters,
+                clock=None if self.clock is None else str(np.datetime64(int(self.clock * 1e6), "us")),
+                slots_observed=int((self.slot_weight > 1e-3 * self.reading_weight).sum()),
+                level=round(self.level_sum / self.level_weight, 4) if self.level_weight > 0 else 0.0,
+                level_weight=round(self.level_weight, 3),
+            )
+
+
+@lru_cache(maxsize=None)
+def online_parking() -> OnlineParkingModel:
+    """Process-wide online statistics for the parking model."""
+    return OnlineParkingModel()
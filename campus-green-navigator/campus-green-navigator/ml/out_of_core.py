@@ -0,0 +1,206 @@
+# ml/out_of_core.py
+"""Out-of-core training for the parking model.
+
+Occupancy history is stored as partitioned chunks, either a directory of
+Parquet files (needs ``pyarrow``) or ``part-NNNNN/`` directories holding one
+``.npy`` file per column, which are memory-mapped. Chunks are read one at a
+time and turned into model features with ``time_feature_matrix`` (the source
+columns are only read, never copied into a DataFrame), so memory is bounded by
+one chunk plus what the learner keeps:
+
+* ``train_out_of_core`` (default) fits the usual RandomForest on a stratified
+  reservoir sample: a uniform sample of at most ``sample_size`` rows, split
+  evenly over the 24 x 7 x 2 (hour, weekday, exam) strata so rare strata such
+  as exam-week nights are represented.
+* With ``estimator=`` any regressor with ``partial_fit`` is trained chunk by
+  chunk instead.
+
+A deterministic ``test_size`` share of every chunk is held out and scored in a
+second streaming pass, so MAE is reported without materializing a test set.
+Peak memory is reported alongside it.
+"""
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, Iterator, List
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+
+from ml.features import FEATURES, time_feature_matrix
+from ml.parking_predictor import save_model
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # optional: .npy chunks work without it
+    pq = None  # type: ignore[assignment]
+
+COLUMNS = ["hour", "weekday", "is_weekend", "is_exam", "occupancy"]
+N_STRATA = 24 * 7 * 2
+
+
+def write_npy_chunks(frames: Any, out_dir: str) -> List[str]:
+    """Write DataFrames (one per chunk) as ``part-NNNNN/<column>.npy`` directories."""
+    parts = []
+    for i, df in enumerate(frames):
+        part = os.path.join(out_dir, f"part-{i:05d}")
+        os.makedirs(part, exist_ok=True)
+        for col in COLUMNS:
+            np.save(os.path.join(part, f"{col}.npy"), np.ascontiguousarray(df[col].to_numpy()))
+        parts.append(part)
+    return parts
+
+
+def write_parquet_chunks(frames: Any, out_dir: str) -> List[str]:
+    """Write DataFrames (one per chunk) as ``part-NNNNN.parquet`` files."""
+    if pq is None:
+        raise RuntimeError("pyarrow is required for Parquet chunks")
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for i, df in enumerate(frames):
+        path = os.path.join(out_dir, f"part-{i:05d}.parquet")
+        df[COLUMNS].to_parquet(path, index=False)
+        paths.append(path)
+    return paths
+
+
+def iter_chunks(source: str) -> Iterator[Dict[str, np.ndarray]]:
+    """Column arrays of each chunk under ``source``, in order.
+
+    ``.npy`` columns are memory-mapped; Parquet files are read one row group
+    at a time, only the needed columns.
+    """
+    names = sorted(os.listdir(source))
+    parquet = [n for n in names if n.endswith(".parquet")]
+    if parquet:
+        if pq is None:
+            raise RuntimeError("pyarrow is required to read Parquet chunks")
+        for name in parquet:
+            f = pq.ParquetFile(os.path.join(source, name))
+            for i in range(f.num_row_groups):
+                table = f.read_row_group(i, columns=COLUMNS)
+                yield {col: table.column(col).to_numpy() for col in COLUMNS}
+        return
+    for name in names:
+        part = os.path.join(source, name)
+        if name.startswith("part-") and os.path.isdir(part):
+            yield {col: np.load(os.path.join(part, f"{col}.npy"), mmap_mode="r") for col in COLUMNS}
+
+
+def _stratum(chunk: Dict[str, np.ndarray]) -> np.ndarray:
+    return (np.asarray(chunk["weekday"], dtype=np.int64) * 24 + chunk["hour"]) * 2 + chunk["is_exam"]
+
+
+def _holdout_mask(n: int, chunk_index: int, test_size: float, seed: int) -> np.ndarray:
+    # the same rows are held out in both passes
+    return np.random.default_rng([seed, chunk_index]).random(n) < test_size
+
+
+class StratifiedReservoir:
+    """Uniform sample of up to ``per_stratum`` rows from each stratum of a stream.
+
+    Every row gets a random key and each stratum keeps its smallest keys,
+    which is a uniform sample without replacement (a vectorized reservoir).
+    """
+
+    def __init__(self, per_stratum: int, n_features: int, seed: int = 0):
+        self.per_stratum = per_stratum
+        self.rng = np.random.default_rng(seed)
+        self.keys = np.empty(0)
+        self.strata = np.empty(0, dtype=np.int64)
+        self.X = np.empty((0, n_features), dtype=np.float32)
+        self.y = np.empty(0, dtype=np.float32)
+        self.seen = 0
+
+    def add(self, X: np.ndarray, y: np.ndarray, strata: np.ndarray) -> None:
+        self.seen += len(y)
+        keys = np.concatenate([self.keys, self.rng.random(len(y))])
+        all_strata = np.concatenate([self.strata, strata])
+        order = np.lexsort((keys, all_strata))
+        s_sorted = all_strata[order]
+        starts = np.searchsorted(s_sorted, s_sorted, side="left")
+        keep = np.sort(order[np.arange(len(order)) - starts < self.per_stratum])
+        # kept rows: the surviving sample first, then the new rows, without concatenating the whole chunk
+        old = len(self.y)
+        split = np.searchsorted(keep, old)
+        keep_old, keep_new = keep[:split], keep[split:] - old
+        self.keys = keys[keep]
+        self.strata = all_strata[keep]
+        self.X = np.concatenate([self.X[keep_old], X[keep_new]])
+        self.y = np.concatenate([self.y[keep_old], y[keep_new]])
+
+
+def _peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1e6 if sys.platform == "darwin" else rss / 1e3  # bytes on macOS, KiB elsewhere
+
+
+def _fit(source: str, sample_size: int, estimator: Any, test_size: float, seed: int) -> Dict[str, Any]:
+    rows = train_rows = 0
+    reservoir = StratifiedReservoir(max(1, sample_size // N_STRATA), len(FEATURES), seed)
+    for i, chunk in enumerate(iter_chunks(source)):
+        n = len(chunk["occupancy"])
+        rows += n
+        train = ~_holdout_mask(n, i, test_size, seed)
+        train_rows += int(train.sum())
+        X = time_feature_matrix(chunk["hour"][train], chunk["weekday"][train], chunk["is_weekend"][train],
+                                chunk["is_exam"][train], dtype=np.float32)
+        y = np.asarray(chunk["occupancy"][train], dtype=np.float32)
+        if estimator is not None:
+            estimator.partial_fit(X, y)
+        else:
+            reservoir.add(X, y, _stratum(chunk)[train])
+    if estimator is not None:
+        return {"model": estimator, "rows": rows, "train_rows": train_rows, "sample_rows": train_rows}
+    model = RandomForestRegressor(n_estimators=100, random_state=seed)
+    # fit on a named frame so serving code can keep passing DataFrames
+    model.fit(pd.DataFrame(reservoir.X, columns=FEATURES), reservoir.y)
+    return {"model": model, "rows": rows, "train_rows": train_rows, "sample_rows": len(reservoir.y)}
+
+
+def _holdout_mae(source: str, model: Any, test_size: float, seed: int) -> Dict[str, Any]:
+    named = hasattr(model, "feature_names_in_")
+    abs_err = 0.0
+    test_rows = 0
+    for i, chunk in enumerate(iter_chunks(source)):
+        test = _holdout_mask(len(chunk["occupancy"]), i, test_size, seed)
+        if not test.any():
+            continue
+        X = time_feature_matrix(chunk["hour"][test], chunk["weekday"][test], chunk["is_weekend"][test],
+                                chunk["is_exam"][test], dtype=np.float32)
+        preds = model.predict(pd.DataFrame(X, columns=FEATURES) if named else X)
+        abs_err += float(np.abs(preds - chunk["occupancy"][test]).sum())
+        test_rows += int(test.sum())
+    return {"mae": abs_err / test_rows if test_rows else float("nan"), "test_rows": test_rows}
+
+
+def train_out_of_core(source: str, model_path: str = "ml/parking_model.joblib", sample_size: int = 200_000,
+                      estimator: Any = None, test_size: float = 0.2, seed: int = 42,
+                      track_memory: bool = True) -> Dict[str, Any]:
+    """Train the parking model from the chunks under ``source``; see the module docstring.
+
+    Returns the same keys as ``train_model`` plus row counts, ``seconds``,
+    ``peak_mem_mb`` (peak traced Python/NumPy allocations while training and
+    scoring) and ``max_rss_mb`` (the process's peak resident set so far).
+    """
+    if estimator is not None and not hasattr(estimator, "partial_fit"):
+        raise ValueError("estimator must support partial_fit")
+    if track_memory:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    try:
+        info = _fit(source, sample_size, estimator, test_size, seed)
+        info.update(_holdout_mae(source, info["model"], test_size, seed))
+        peak = tracemalloc.get_traced_memory()[1] / 1e6 if track_memory else None
+    finally:
+        if track_memory:
+            tracemalloc.stop()
+    info["seconds"] = round(time.perf_counter() - t0, 2)
+    info["peak_mem_mb"] = None if peak is None else round(peak, 1)
+    info["max_rss_mb"] = round(_peak_rss_mb(), 1)
+    info["version"] = save_model(info["model"], model_path)
+    info["model_path"] = model_path
+    return info
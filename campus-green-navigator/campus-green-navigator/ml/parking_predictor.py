@@ -5,39 +5,86 @@ from sklearn.ensemble import RandomForestRegressor
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error
 import joblib
+from ml.compiled_forest import export_forest
+from ml.features import FEATURES
+from ml.forecast_table import export_table
 import os
-from datetime import datetime, timedelta
+from datetime import datetime
 
-def generate_synthetic_parking(days=30, seed=42):
+def generate_synthetic_parking(days=30, seed=42, lots=None, resolution_min=60, start=None, compact=False):
+    """Synthetic occupancy history: one row per timestamp (and lot), built column-wise.
+
+    ``resolution_min`` must divide a day; ``lots`` adds a ``lot`` column with a
+    per-lot occupancy offset (rows are ordered by time, then lot). ``start``
+    defaults to midnight ``days`` days ago. ``compact`` stores the integer
+    columns as int8/int16 and occupancy as float32 for large runs. With the
+    defaults the output matches the original row-by-row generator exactly:
+    the noise is drawn in one batch from the same stream.
+    """
+    if resolution_min <= 0 or 1440 % resolution_min:
+        raise ValueError(f"resolution_min must divide a day, got {resolution_min}")
     rng = np.random.default_rng(seed)
-    start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - pd.Timedelta(days=days)
-    rows = []
-    for d in range(days):
-        date = start + timedelta(days=d)
-        is_exam = (d % 30) in (10, 11, 12)
-        for h in range(24):
-            dt = date + timedelta(hours=h)
-            base = 0.2
-            if 8 <= h <= 10 or 14 <= h <= 16:
-                base += 0.5
-            if h < 6 or h >= 22:
-                base -= 0.15
-            if dt.weekday() >= 5:
-                base -= 0.25
-            if is_exam:
-                base -= 0.4
-            noise = rng.normal(0, 0.05)
-            occ = np.clip(base + noise, 0.0, 1.0)
-            rows.append({
-                "datetime": dt,
-                "hour": h,
-                "weekday": dt.weekday(),
-                "is_weekend": int(dt.weekday() >= 5),
-                "is_exam": int(is_exam),
-                "occupancy": occ
-            })
-    df = pd.DataFrame(rows)
-    return df
+    if start is None:
+        start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - pd.Timedelta(days=days)
+    per_day = 1440 // resolution_min
+    n_lots = 1 if lots is None else int(lots)
+
+    day = np.repeat(np.arange(days), per_day)
+    offset_min = day * 1440 + np.tile(np.arange(per_day) * resolution_min, days)
+    dt = np.datetime64(start, "us") + offset_min.astype("timedelta64[m]")
+    midnight = dt.astype("datetime64[D]")
+    hour = ((dt - midnight) // np.timedelta64(1, "h")).astype(np.int64)
+    weekday = (midnight.astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday
+    is_weekend = weekday >= 5
+    is_exam = np.isin(day % 30, (10, 11, 12))
+
+    # same sequence of float operations as the per-row rules, so values match bit for bit
+    base = np.full(len(dt), 0.2)
+    base[((hour >= 8) & (hour <= 10)) | ((hour >= 14) & (hour <= 16))] += 0.5
+    base[(hour < 6) | (hour >= 22)] -= 0.15
+    base[is_weekend] -= 0.25
+    base[is_exam] -= 0.4
+
+    noise = rng.normal(0, 0.05, size=len(dt) * n_lots)
+    if lots is not None:
+        # lots differ in popularity; drawn after the noise so the shared stream is unchanged
+        base = (base[:, None] + rng.normal(0, 0.08, size=n_lots)).ravel()
+    occ = np.clip(base + noise, 0.0, 1.0)
+
+    def rows(a):
+        return np.repeat(a, n_lots) if n_lots > 1 else a
+
+    small = np.int8 if compact else np.int64
+    columns = {
+        "datetime": rows(dt),
+        "hour": rows(hour.astype(small)),
+        "weekday": rows(weekday.astype(small)),
+        "is_weekend": rows(is_weekend.astype(small)),
+        "is_exam": rows(is_exam.astype(small)),
+        "occupancy": occ.astype(np.float32) if compact else occ,
+    }
+    if lots is not None:
+        columns["lot"] = np.tile(np.arange(n_lots, dtype=np.int16 if compact else np.int64), len(dt))
+    return pd.DataFrame(columns)
+
+
+def save_model(model, model_path):
+    """Write the artifact atomically, its compiled forest, forecast table and version file; returns the version."""
+    os.makedirs(os.path.dirname(model_path) or ".", exist_ok=True)
+    # write then rename, so a serving process hot-reloading the model never reads a partial file
+    tmp_path = model_path + ".tmp"
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, model_path)
+    if hasattr(model, "estimators_"):
+        # flat node arrays for serving without sklearn
+        export_forest(model, model_path)
+    # hour-of-week forecast table, when the inputs are only calendar features
+    export_table(model, model_path)
+    version = datetime.now().strftime("%Y%m%d-%H%M%S")
+    with open(model_path + ".version", "w") as f:
+        f.write(version + "\n")
+    return version
+
 
 def add_time_features(df):
     df = df.copy()
@@ -49,13 +96,12 @@ def add_time_features(df):
 
 def train_model(df, model_path="ml/parking_model.joblib"):
     df = add_time_features(df)
-    X = df[["hour_sin", "hour_cos", "day_sin", "day_cos", "is_weekend", "is_exam"]]
+    X = df[FEATURES]
     y = df["occupancy"]
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
     model = RandomForestRegressor(n_estimators=100, random_state=42)
     model.fit(X_train, y_train)
     preds = model.predict(X_test)
     mae = mean_absolute_error(y_test, preds)
-    os.makedirs(os.path.dirname(model_path) or ".", exist_ok=True)
-    joblib.dump(model, model_path)
-    return {"model_path": model_path, "mae": mae, "model": model}
+    version = save_model(model, model_path)
+    return {"model_path": model_path, "mae": mae, "model": model, "version": version}
@@ -0,0 +1,233 @@
+# routing/contraction.py
+"""Contraction-hierarchy preprocessing for the routing graph.
+
+Nodes are contracted one at a time in order of importance (edge difference
+plus contracted-neighbour count, updated lazily). Contracting a node adds a
+shortcut between two of its neighbours unless a bounded witness search finds
+a path that is at least as short without it. Queries then run a bidirectional
+Dijkstra that only climbs to higher-ranked nodes, touching a tiny part of the
+graph, and shortcuts are unpacked back into original ROUTES segments.
+
+A hierarchy is built per metric (``fast``/``eco``) because the witness
+searches depend on the edge weights.
+"""
+import heapq
+import math
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from routing.graph import METRICS, RoutingGraph, campus_graph
+
+# key (min node, max node) -> (is_shortcut, middle node or original edge id)
+_Via = Tuple[bool, int]
+
+
+def _key(a: int, b: int) -> Tuple[int, int]:
+    return (a, b) if a < b else (b, a)
+
+
+class ContractionHierarchy:
+    """Contraction hierarchy for one metric of a :class:`RoutingGraph`.
+
+    ``settle_limit`` bounds each witness search. A smaller limit preprocesses
+    faster but may add redundant shortcuts; query results stay exact either way.
+    """
+
+    def __init__(self, graph: RoutingGraph, metric: str = "fast", settle_limit: int = 50):
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        self.graph = graph
+        self.metric = metric
+        self.settle_limit = settle_limit
+        n = len(graph.nodes)
+        weights = graph.weights[metric]
+
+        self._adj: List[Dict[int, float]] = [{} for _ in range(n)]
+        self._via: Dict[Tuple[int, int], _Via] = {}
+        for eid, (u, v, _) in enumerate(graph.edges):
+            if u == v:
+                continue
+            w = weights[eid]
+            if w < self._adj[u].get(v, math.inf):
+                self._adj[u][v] = w
+                self._adj[v][u] = w
+                self._via[_key(u, v)] = (False, eid)
+
+        self.rank: List[int] = [-1] * n
+        # up[u] lists (v, weight) for every neighbour v ranked above u
+        self.up: List[List[Tuple[int, float]]] = [[] for _ in range(n)]
+        self.shortcut_count = 0
+        self._deleted = [0] * n
+        self._contract_all()
+        del self._adj
+
+    # -- preprocessing -------------------------------------------------
+
+    def _witness(self, source: int, skip: int, max_dist: float, targets: Dict[int, float]) -> Dict[int, float]:
+        """Bounded Dijkstra from ``source`` avoiding ``skip``."""
+        adj = self._adj
+        dist = {source: 0.0}
+        heap = [(0.0, source)]
+        settled = 0
+        remaining = len(targets)
+        while heap and settled < self.settle_limit:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            if d > max_dist:
+                break
+            settled += 1
+            if u in targets:
+                remaining -= 1
+                if remaining == 0:
+                    break
+            for v, w in adj[u].items():
+                if v == skip:
+                    continue
+                nd = d + w
+                if nd < dist.get(v, math.inf):
+                    dist[v] = nd
+                    heapq.heappush(heap, (nd, v))
+        return dist
+
+    def _shortcuts(self, v: int) -> List[Tuple[int, int, float]]:
+        neighbours = list(self._adj[v].items())
+        out = []
+        for i, (u, wu) in enumerate(neighbours):
+            targets = {w: wu + ww for w, ww in neighbours[i + 1:]}
+            if not targets:
+                continue
+            found = self._witness(u, v, max(targets.values()), targets)
+            for w, via_v in targets.items():
+                if found.get(w, math.inf) > via_v:
+                    out.append((u, w, via_v))
+        return out
+
+    def _priority(self, v: int) -> int:
+        return len(self._shortcuts(v)) - len(self._adj[v]) + self._deleted[v]
+
+    def _contract_all(self) -> None:
+        heap = [(self._priority(v), v) for v in range(len(self.rank))]
+        heapq.heapify(heap)
+        order = 0
+        while heap:
+            _, v = heapq.heappop(heap)
+            if self.rank[v] >= 0:
+                continue
+            # lazy update: re-evaluate and defer if no longer the cheapest node
+            prio = self._priority(v)
+            if heap and prio > heap[0][0]:
+                heapq.heappush(heap, (prio, v))
+                continue
+            for u, w, weight in self._shortcuts(v):
+                if weight < self._adj[u].get(w, math.inf):
+                    self._adj[u][w] = weight
+                    self._adj[w][u] = weight
+                    self._via[_key(u, w)] = (True, v)
+                    self.shortcut_count += 1
+            for u, weight in self._adj[v].items():
+                self.up[v].append((u, weight))
+                del self._adj[u][v]
+                self._deleted[u] += 1
+            self._adj[v] = {}
+            self.rank[v] = order
+            order += 1
+
+    # -- queries -------------------------------------------------------
+
+    def query(self, source: int, target: int) -> Optional[Tuple[float, List[int], List[int]]]:
+        """Bidirectional upward search between node indices.
+
+        Returns ``(cost, node_path, edge_path)`` like
+        :meth:`RoutingGraph.shortest_path`, or None when unreachable.
+        """
+        if source == target:
+            return 0.0, [source], []
+        up = self.up
+        dist = ({source: 0.0}, {target: 0.0})
+        parent: Tuple[Dict[int, int], Dict[int, int]] = ({}, {})
+        heaps = ([(0.0, source)], [(0.0, target)])
+        best = math.inf
+        meet = -1
+        side = 0
+        while True:
+            live = [s for s in (0, 1) if heaps[s] and heaps[s][0][0] < best]
+            if not live:
+                break
+            side = side ^ 1 if side ^ 1 in live else live[0]
+            d, u = heapq.heappop(heaps[side])
+            mine = dist[side]
+            if d > mine[u]:
+                continue
+            other = dist[side ^ 1].get(u)
+            if other is not None and d + other < best:
+                best = d + other
+                meet = u
+            # stall-on-demand: a higher neighbour already reaches u more cheaply
+            if any(mine.get(x, math.inf) + w < d for x, w in up[u]):
+                continue
+            for v, w in up[u]:
+                nd = d + w
+                if nd < mine.get(v, math.inf):
+                    mine[v] = nd
+                    parent[side][v] = u
+                    heapq.heappush(heaps[side], (nd, v))
+        if meet < 0:
+            return None
+
+        fwd = [meet]
+        while fwd[-1] != source:
+            fwd.append(parent[0][fwd[-1]])
+        fwd.reverse()
+        bwd = []
+        u = meet
+        while u != target:
+            u = parent[1][u]
+            bwd.append(u)
+        return best, *self._unpack(fwd + bwd)
+
+    def _unpack(self, hops: List[int]) -> Tuple[List[int], List[int]]:
+        nodes = [hops[0]]
+        edges: List[int] = []
+        for a, b in zip(hops, hops[1:]):
+            stack = [(a, b)]
+            while stack:
+                x, y = stack.pop()
+                is_shortcut, val = self._via[_key(x, y)]
+                if is_shortcut:
+                    # push in reverse so (x, mid) is expanded first
+                    stack.append((val, y))
+                    stack.append((x, val))
+                else:
+                    edges.append(val)
+                    nodes.append(y)
+        return nodes, edges
+
+
+class HierarchyRouter:
+    """Fast/eco route payloads answered from per-metric contraction hierarchies."""
+
+    def __init__(self, graph: RoutingGraph, settle_limit: int = 50):
+        self.graph = graph
+        self.hierarchies = {metric: ContractionHierarchy(graph, metric, settle_limit) for metric in METRICS}
+
+    def route(self, start: str, end: str) -> Optional[Dict[str, Any]]:
+        """Same payload as :meth:`RoutingGraph.route`."""
+        s = self.graph.index.get(start)
+        e = self.graph.index.get(end)
+        if s is None or e is None:
+            return None
+        out: Dict[str, Any] = {"from_loc": start, "to_loc": end}
+        for metric, (profile, _) in METRICS.items():
+            found = self.hierarchies[metric].query(s, e)
+            if found is None:
+                return None
+            _, nodes, edge_path = found
+            out[metric] = self.graph.leg(nodes, edge_path, profile)
+        return out
+
+
+@lru_cache(maxsize=1)
+def campus_hierarchy() -> HierarchyRouter:
+    """Process-wide hierarchy over the campus graph, built on first use."""
+    return HierarchyRouter(campus_graph())
@@ -0,0 +1,268 @@
+# routing/graph.py
+"""Graph-based routing over the campus path network.
+
+Locations in ``campus_data.LOCATIONS`` are nodes and every entry in
+``campus_data.ROUTES`` is an undirected segment carrying a ``fast`` and an
+``eco`` profile. Shortest paths are found with A* (haversine lower bound), so
+pairs without a direct entry in ``ROUTES`` are routed through intermediate
+locations instead of failing.
+
+Keep this module import-safe (no Streamlit) so tests and the API can use it.
+"""
+import heapq
+import math
+import os
+from functools import lru_cache
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+from data import campus_data
+from utils.geometry import Geometry
+
+EARTH_RADIUS_KM = 6371.0088
+
+# "astar" searches the graph per request; "ch" answers from contraction hierarchies
+ROUTING_MODE = os.getenv("CGN_ROUTING_MODE", "astar")
+
+# metric name -> (segment profile, attribute minimised by the search)
+METRICS: Dict[str, Tuple[str, str]] = {
+    "fast": ("fast", "time_min"),
+    "eco": ("eco", "distance_km"),
+}
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in kilometers between two lat/lon points."""
+    p1 = math.radians(lat1)
+    p2 = math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lon2 - lon1)
+    a = math.sin(dp / 2.0) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2.0) ** 2
+    return 2.0 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def coord_for(value: Any) -> Optional[Tuple[float, float]]:
+    """Return (lat, lon) for a LOCATIONS entry, or None if it has no coordinates.
+
+    Accepts ``[lat, lon]`` sequences and ``{'lat':.., 'lon':..}`` style dicts.
+    """
+    if isinstance(value, (list, tuple)) and len(value) >= 2:
+        return float(value[0]), float(value[1])
+    if isinstance(value, dict):
+        lat = value.get('lat') or value.get('latitude') or value.get('y')
+        lon = value.get('lon') or value.get('longitude') or value.get('x')
+        if lat is not None and lon is not None:
+            return float(lat), float(lon)
+    return None
+
+
+class RoutingGraph:
+    """Adjacency-indexed undirected graph with per-metric edge weights.
+
+    Nodes are addressed by integer index internally; ``index`` maps location
+    names to those indices. ``edges[i]`` is ``(u, v, segment)`` where
+    ``segment`` is the original ROUTES-style dict.
+    """
+
+    def __init__(self, locations: Mapping[str, Any], routes: Sequence[Mapping[str, Any]]):
+        self.nodes: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.coords: List[Optional[Tuple[float, float]]] = []
+        self.edges: List[Tuple[int, int, Mapping[str, Any]]] = []
+        self.adj: List[List[Tuple[int, int]]] = []
+
+        for name, value in locations.items():
+            self._add_node(name, coord_for(value))
+        for seg in routes:
+            u = self._add_node(seg["from"], None)
+            v = self._add_node(seg["to"], None)
+            eid = len(self.edges)
+            self.edges.append((u, v, seg))
+            self.adj[u].append((v, eid))
+            self.adj[v].append((u, eid))
+
+        self.weights: Dict[str, List[float]] = {}
+        for metric, (profile, attr) in METRICS.items():
+            self.weights[metric] = [float(seg[profile][attr]) for _, _, seg in self.edges]
+
+        # A* heuristic: scale * haversine(node, target) must never exceed the
+        # true remaining cost, so take the smallest weight per straight-line km
+        # over all edges. That keeps the heuristic consistent for any data.
+        self._has_all_coords = all(c is not None for c in self.coords)
+        self._h_scale: Dict[str, float] = {}
+        for metric, weights in self.weights.items():
+            scale = math.inf
+            if self._has_all_coords:
+                for (u, v, _), w in zip(self.edges, weights):
+                    d = haversine_km(*self.coords[u], *self.coords[v])  # type: ignore[misc]
+                    if d > 0:
+                        scale = min(scale, w / d)
+            self._h_scale[metric] = 0.0 if math.isinf(scale) else max(0.0, scale)
+
+    @classmethod
+    def from_campus_data(cls, data: Any = campus_data) -> "RoutingGraph":
+        return cls(data.LOCATIONS, data.ROUTES)
+
+    def _add_node(self, name: str, coords: Optional[Tuple[float, float]]) -> int:
+        idx = self.index.get(name)
+        if idx is None:
+            idx = len(self.nodes)
+            self.index[name] = idx
+            self.nodes.append(name)
+            self.coords.append(coords)
+            self.adj.append([])
+        elif coords is not None and self.coords[idx] is None:
+            self.coords[idx] = coords
+        return idx
+
+    def _heuristic(self, metric: str, target: int):
+        scale = self._h_scale[metric]
+        if scale <= 0 or not self._has_all_coords:
+            return lambda n: 0.0
+        t_lat, t_lon = self.coords[target]  # type: ignore[misc]
+        coords = self.coords
+        return lambda n: scale * haversine_km(coords[n][0], coords[n][1], t_lat, t_lon)  # type: ignore[index]
+
+    def shortest_path(self, source: int, target: int, metric: str = "fast") -> Optional[Tuple[float, List[int], List[int]]]:
+        """A* search between node indices.
+
+        Returns ``(cost, node_path, edge_path)`` or None when unreachable.
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        if source == target:
+            return 0.0, [source], []
+        weights = self.weights[metric]
+        h = self._heuristic(metric, target)
+        dist = {source: 0.0}
+        parent: Dict[int, Tuple[int, int]] = {}
+        closed = set()
+        heap = [(h(source), 0.0, source)]
+        while heap:
+            _, d, u = heapq.heappop(heap)
+            if u in closed:
+                continue
+            if u == target:
+                nodes = [u]
+                edge_path = []
+                while u != source:
+                    u, eid = parent[u]
+                    nodes.append(u)
+                    edge_path.append(eid)
+                nodes.reverse()
+                edge_path.reverse()
+                return d, nodes, edge_path
+            closed.add(u)
+            for v, eid in self.adj[u]:
+                if v in closed:
+                    continue
+                nd = d + weights[eid]
+                if nd < dist.get(v, math.inf):
+                    dist[v] = nd
+                    parent[v] = (u, eid)
+                    heapq.heappush(heap, (nd + h(v), nd, v))
+        return None
+
+    def shortest_path_tree(self, source: int, metric: str = "fast") -> Tuple[List[float], List[Optional[Tuple[int, int]]]]:
+        """One-to-all Dijkstra from ``source``.
+
+        Returns ``(dist, parent)`` lists indexed by node; ``parent[n]`` is the
+        ``(previous_node, edge_id)`` on the shortest path, None for the source
+        and for unreachable nodes (whose dist is ``inf``).
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        weights = self.weights[metric]
+        dist = [math.inf] * len(self.nodes)
+        parent: List[Optional[Tuple[int, int]]] = [None] * len(self.nodes)
+        dist[source] = 0.0
+        heap = [(0.0, source)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            for v, eid in self.adj[u]:
+                nd = d + weights[eid]
+                if nd < dist[v]:
+                    dist[v] = nd
+                    parent[v] = (u, eid)
+                    heapq.heappush(heap, (nd, v))
+        return dist, parent
+
+    def leg(self, node_path: Sequence[int], edge_path: Sequence[int], profile: Union[str, Sequence[str]]) -> Dict[str, Any]:
+        """Summarise a path as a route leg.
+
+        ``profile`` is one segment profile for the whole path, or one per edge
+        when a route mixes fast and eco segments.
+        """
+        profiles = [profile] * len(edge_path) if isinstance(profile, str) else list(profile)
+        distance = 0.0
+        minutes: float = 0
+        geometry: List[List[float]] = []
+        for i, eid in enumerate(edge_path):
+            u, v, seg = self.edges[eid]
+            attrs = seg[profiles[i]]
+            distance += float(attrs["distance_km"])
+            minutes += attrs["time_min"]
+            forward = node_path[i] == u
+            pts = self._segment_geometry(u, v, attrs)
+            if not forward:
+                pts = pts[::-1]
+            if geometry and pts and geometry[-1] == pts[0]:
+                pts = pts[1:]
+            geometry.extend(pts)
+        if not edge_path and node_path and self.coords[node_path[0]] is not None:
+            geometry = [list(self.coords[node_path[0]])]  # type: ignore[arg-type]
+        return {
+            "distance_km": round(distance, 2),
+            "time_min": minutes,
+            "geometry": Geometry(geometry),
+            "path": [self.nodes[n] for n in node_path],
+        }
+
+    def _segment_geometry(self, u: int, v: int, attrs: Mapping[str, Any]) -> List[List[float]]:
+        geom = attrs.get("geometry")
+        if isinstance(geom, (list, tuple)) and len(geom) > 0:
+            return [[float(p[0]), float(p[1])] for p in geom]
+        s = self.coords[u]
+        e = self.coords[v]
+        # synthesize a 3-point polyline if we have both endpoints
+        if s and e:
+            mid = [(s[0] + e[0]) / 2.0, (s[1] + e[1]) / 2.0]
+            return [list(s), mid, list(e)]
+        if s:
+            return [list(s)]
+        return []
+
+    def route(self, start: str, end: str) -> Optional[Dict[str, Any]]:
+        """Return a fast/eco route payload between two location names, or None."""
+        s = self.index.get(start)
+        e = self.index.get(end)
+        if s is None or e is None:
+            return None
+        out: Dict[str, Any] = {"from_loc": start, "to_loc": end}
+        for metric, (profile, _) in METRICS.items():
+            found = self.shortest_path(s, e, metric)
+            if found is None:
+                return None
+            _, nodes, edge_path = found
+            out[metric] = self.leg(nodes, edge_path, profile)
+        return out
+
+
+@lru_cache(maxsize=1)
+def campus_graph() -> RoutingGraph:
+    """Process-wide graph built from ``data.campus_data`` on first use."""
+    return RoutingGraph.from_campus_data()
+
+
+def find_route(start: str, end: str) -> Optional[Dict[str, Any]]:
+    """Fast/eco route between campus locations, or None when there is no path.
+
+    With ``CGN_ROUTING_MODE=ch`` the query runs on the preprocessed
+    contraction hierarchy instead of a per-request A* search.
+    """
+    if ROUTING_MODE == "ch":
+        from routing.contraction import campus_hierarchy
+
+        return campus_hierarchy().route(start, end)
+    return campus_graph().route(start, end)
@@ -0,0 +1,320 @@
+# routing/matrix.py
+"""Precomputed all-pairs route matrix with an on-disk, memory-mappable cache.
+
+``build_route_matrix`` runs one Dijkstra tree per origin and metric and packs
+distance, time, CO2 (per vehicle type) and geometry for every origin/destination
+pair into NumPy arrays. The bundle is written as a directory of ``.npy`` files
+plus ``meta.json`` so it can be opened with ``mmap_mode='r'``; route queries are
+then an index lookup.
+
+The bundle records a fingerprint of the source campus data and is rebuilt
+automatically by ``load_or_build`` when ``campus_data`` changes.
+
+Rebuild manually with ``python -m routing.matrix``.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Literal, Mapping, Optional, Sequence
+
+import numpy as np
+
+from data import campus_data
+from routing.graph import METRICS, RoutingGraph
+from utils.geometry import Geometry
+from utils.helpers import DEFAULT_EMISSION_FACTOR_G_PER_KM
+
+FORMAT_VERSION = 1
+DEFAULT_MATRIX_DIR = os.getenv(
+    "CGN_ROUTE_MATRIX_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "route_matrix"),
+)
+
+_ARRAYS = ("distance_km", "time_min", "co2_g", "geom_offsets", "geom_coords", "path_offsets", "path_nodes")
+
+
+def source_fingerprint(data: Any = campus_data) -> str:
+    """Stable hash of the campus data the matrix is derived from."""
+    payload = {
+        "version": FORMAT_VERSION,
+        "locations": data.LOCATIONS,
+        "routes": data.ROUTES,
+        "emission_factors": getattr(data, "EMISSION_FACTORS_G_PER_KM", {}),
+    }
+    blob = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()
+
+
+def _num(x: float) -> Any:
+    """Render matrix values the way the source data writes them (4, not 4.0)."""
+    x = float(x)
+    return int(x) if x.is_integer() else x
+
+
+class RouteMatrix:
+    """Dense origin x destination route tables for the ``fast`` and ``eco`` profiles.
+
+    ``arrays[metric][name]`` holds ``distance_km``/``time_min`` as (N, N),
+    ``co2_g`` as (V, N, N) and CSR-style packed geometry/paths where pair
+    ``(i, j)`` lives at ``offsets[i * N + j]:offsets[i * N + j + 1]``.
+    Unreachable pairs have NaN distance.
+    """
+
+    def __init__(self, meta: Dict[str, Any], arrays: Dict[str, Dict[str, np.ndarray]]):
+        self.meta = meta
+        self.nodes: List[str] = list(meta["nodes"])
+        self.vehicles: List[str] = list(meta["vehicles"])
+        self.index = {name: i for i, name in enumerate(self.nodes)}
+        self.vehicle_index = {name: i for i, name in enumerate(self.vehicles)}
+        self.arrays = arrays
+
+    @property
+    def fingerprint(self) -> str:
+        return self.meta["fingerprint"]
+
+    def _pair(self, metric: str, i: int, j: int) -> Optional[Dict[str, Any]]:
+        a = self.arrays[metric]
+        dist = a["distance_km"][i, j]
+        if np.isnan(dist):
+            return None
+        k = i * len(self.nodes) + j
+        g0, g1 = a["geom_offsets"][k], a["geom_offsets"][k + 1]
+        p0, p1 = a["path_offsets"][k], a["path_offsets"][k + 1]
+        return {
+            "distance_km": round(float(dist), 2),
+            "time_min": _num(a["time_min"][i, j]),
+            # a view into the (possibly memory-mapped) packed coordinates; no copy
+            "geometry": Geometry(a["geom_coords"][g0:g1]),
+            "path": [self.nodes[n] for n in a["path_nodes"][p0:p1]],
+        }
+
+    def route(self, start: str, end: str) -> Optional[Dict[str, Any]]:
+        """Fast/eco route payload between two location names, or None."""
+        i = self.index.get(start)
+        j = self.index.get(end)
+        if i is None or j is None:
+            return None
+        out: Dict[str, Any] = {"from_loc": start, "to_loc": end}
+        for metric in METRICS:
+            leg = self._pair(metric, i, j)
+            if leg is None:
+                return None
+            out[metric] = leg
+        return out
+
+    def co2_grams(self, start: str, end: str, vehicle_type: str, metric: str = "fast") -> Optional[float]:
+        """CO2 for a pair and vehicle type; unknown vehicles use the default factor."""
+        i = self.index.get(start)
+        j = self.index.get(end)
+        if i is None or j is None:
+            return None
+        v = self.vehicle_index.get(vehicle_type)
+        if v is None:
+            dist = self.arrays[metric]["distance_km"][i, j]
+            return None if np.isnan(dist) else DEFAULT_EMISSION_FACTOR_G_PER_KM * float(dist)
+        val = self.arrays[metric]["co2_g"][v, i, j]
+        return None if np.isnan(val) else float(val)
+
+    def _lookup(self, names: Sequence[str], index: Mapping[str, int], resolve: Optional[Callable[[str], Optional[str]]]) -> np.ndarray:
+        """Map names to indices (-1 if unknown), resolving each distinct name once."""
+        uniq, inverse = np.unique(np.asarray(list(names), dtype=str), return_inverse=True)
+        idx = np.empty(len(uniq), dtype=np.int64)
+        for k, name in enumerate(uniq.tolist()):
+            if resolve is not None and name not in index:
+                name = resolve(name) or name
+            idx[k] = index.get(name, -1)
+        return idx[inverse.reshape(-1)]
+
+    def lookup_batch(self, starts: Sequence[str], ends: Sequence[str], vehicles: Sequence[str],
+                     resolve: Optional[Callable[[str], Optional[str]]] = None) -> Dict[str, np.ndarray]:
+        """Fast/eco distance, time and CO2 for many pairs in one vectorized pass.
+
+        Returns column arrays: ``found`` plus ``{metric}_distance_km``,
+        ``{metric}_time_min`` and ``{metric}_co2_g`` per metric. Unknown or
+        unreachable pairs have ``found=False`` and NaN values. ``resolve``
+        optionally maps names the matrix doesn't know (e.g. raw 'lat,lon').
+        """
+        i = self._lookup(starts, self.index, resolve)
+        j = self._lookup(ends, self.index, resolve)
+        v = self._lookup(vehicles, self.vehicle_index, None)
+        found = (i >= 0) & (j >= 0)
+        ii, jj, vv = np.where(found, i, 0), np.where(found, j, 0), np.maximum(v, 0)
+        out: Dict[str, np.ndarray] = {}
+        for metric in self.arrays:
+            a = self.arrays[metric]
+            dist = np.where(found, a["distance_km"][ii, jj], np.nan)
+            found &= ~np.isnan(dist)
+            out[f"{metric}_distance_km"] = dist
+            out[f"{metric}_time_min"] = a["time_min"][ii, jj]
+            if len(self.vehicles):
+                known = a["co2_g"][vv, ii, jj]
+            else:
+                known = np.full(len(dist), np.nan)
+            out[f"{metric}_co2_g"] = np.where(v >= 0, known, DEFAULT_EMISSION_FACTOR_G_PER_KM * dist)
+        # unknown names read index 0 above; blank every column of a pair that isn't found
+        out = {name: np.where(found, col, np.nan) for name, col in out.items()}
+        out["found"] = found
+        return out
+
+    def save(self, path: str) -> None:
+        """Write the bundle so readers never see a partial or missing matrix.
+
+        The arrays go to a new versioned directory next to ``path`` and
+        ``path`` becomes a symlink to it, swapped with a rename. The previous
+        version is kept for readers still opening it; older ones are removed.
+        Where symlinks are unavailable (unprivileged Windows) the directory is
+        replaced in place instead, which leaves a brief window without one.
+        """
+        path = os.path.abspath(path)
+        parent, base = os.path.split(path)
+        os.makedirs(parent, exist_ok=True)
+        version = tempfile.mkdtemp(prefix=f".{base}-", dir=parent)
+        link = version + ".link"
+        try:
+            for metric, arrays in self.arrays.items():
+                for name in _ARRAYS:
+                    np.save(os.path.join(version, f"{metric}_{name}.npy"), np.ascontiguousarray(arrays[name]))
+            with open(os.path.join(version, "meta.json"), "w") as f:
+                json.dump(self.meta, f)
+            previous = os.path.realpath(path) if os.path.islink(path) else None
+            try:
+                os.symlink(os.path.basename(version), link, target_is_directory=True)
+            except (OSError, NotImplementedError):
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                os.replace(version, path)
+                return
+            if os.path.isdir(path) and not os.path.islink(path):
+                shutil.rmtree(path)  # a bundle written before versioned saves
+            os.replace(link, path)
+        except Exception:
+            if os.path.lexists(link):
+                os.remove(link)
+            shutil.rmtree(version, ignore_errors=True)
+            raise
+        for entry in os.scandir(parent):
+            if (entry.name.startswith(f".{base}-") and entry.is_dir(follow_symlinks=False)
+                    and entry.path not in (version, previous)):
+                shutil.rmtree(entry.path, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path: str, mmap_mode: Optional[Literal["r", "r+", "w+", "c"]] = "r") -> "RouteMatrix":
+        path = os.path.realpath(path)  # one version throughout, even if a save swaps the link meanwhile
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        arrays = {
+            metric: {name: np.load(os.path.join(path, f"{metric}_{name}.npy"), mmap_mode=mmap_mode) for name in _ARRAYS}
+            for metric in meta["metrics"]
+        }
+        return cls(meta, arrays)
+
+
+def iter_batch_rows(starts: Sequence[str], ends: Sequence[str], vehicles: Sequence[str], columns: Mapping[str, np.ndarray]) -> Iterator[Dict[str, Any]]:
+    """Turn :meth:`RouteMatrix.lookup_batch` columns into one JSON-ready dict per pair."""
+    found = columns["found"].tolist()
+    cols = {name: np.round(arr, 2).tolist() for name, arr in columns.items() if name != "found"}
+    for k, ok in enumerate(found):
+        row: Dict[str, Any] = {"start": starts[k], "end": ends[k], "vehicle": vehicles[k], "found": ok}
+        if ok:
+            for metric in METRICS:
+                row[metric] = {
+                    "distance_km": cols[f"{metric}_distance_km"][k],
+                    "time_min": _num(cols[f"{metric}_time_min"][k]),
+                    "co2_g": cols[f"{metric}_co2_g"][k],
+                }
+        yield row
+
+
+def build_route_matrix(data: Any = campus_data, graph: Optional[RoutingGraph] = None) -> RouteMatrix:
+    """Compute all-pairs fast/eco routes for the campus data."""
+    graph = graph or RoutingGraph.from_campus_data(data)
+    n = len(graph.nodes)
+    factors = getattr(data, "EMISSION_FACTORS_G_PER_KM", {})
+    vehicles = list(factors.keys())
+    factor_vec = np.array([float(factors[v]) for v in vehicles], dtype=np.float64)
+
+    arrays: Dict[str, Dict[str, np.ndarray]] = {}
+    for metric, (profile, _) in METRICS.items():
+        distance = np.full((n, n), np.nan)
+        minutes = np.full((n, n), np.nan)
+        geom_offsets = np.zeros(n * n + 1, dtype=np.int64)
+        path_offsets = np.zeros(n * n + 1, dtype=np.int64)
+        coords: List[np.ndarray] = []
+        n_coords = 0
+        path_nodes: List[int] = []
+        for i in range(n):
+            dist, parent = graph.shortest_path_tree(i, metric)
+            for j in range(n):
+                k = i * n + j
+                if dist[j] != float("inf"):
+                    nodes = [j]
+                    edge_path = []
+                    u = j
+                    while u != i:
+                        u, eid = parent[u]  # type: ignore[misc]
+                        nodes.append(u)
+                        edge_path.append(eid)
+                    nodes.reverse()
+                    edge_path.reverse()
+                    leg = graph.leg(nodes, edge_path, profile)
+                    distance[i, j] = leg["distance_km"]
+                    minutes[i, j] = leg["time_min"]
+                    coords.append(leg["geometry"].coords)
+                    n_coords += len(leg["geometry"])
+                    path_nodes.extend(nodes)
+                geom_offsets[k + 1] = n_coords
+                path_offsets[k + 1] = len(path_nodes)
+        arrays[metric] = {
+            "distance_km": distance,
+            "time_min": minutes,
+            "co2_g": factor_vec[:, None, None] * distance[None, :, :],
+            "geom_offsets": geom_offsets,
+            "geom_coords": np.concatenate(coords) if coords else np.zeros((0, 2), dtype=np.float64),
+            "path_offsets": path_offsets,
+            "path_nodes": np.asarray(path_nodes, dtype=np.int32),
+        }
+
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "fingerprint": source_fingerprint(data),
+        "nodes": graph.nodes,
+        "vehicles": vehicles,
+        "metrics": list(METRICS.keys()),
+    }
+    return RouteMatrix(meta, arrays)
+
+
+def load_or_build(path: str = DEFAULT_MATRIX_DIR, data: Any = campus_data) -> RouteMatrix:
+    """Load the cached matrix, rebuilding it when missing or stale.
+
+    A cache directory that cannot be written (read-only deploys) is not fatal:
+    the freshly built matrix is returned from memory.
+    """
+    fingerprint = source_fingerprint(data)
+    try:
+        cached = RouteMatrix.load(path)
+        if cached.fingerprint == fingerprint:
+            return cached
+    except Exception:
+        pass
+    matrix = build_route_matrix(data)
+    try:
+        matrix.save(path)
+    except OSError:
+        pass
+    return matrix
+
+
+@lru_cache(maxsize=1)
+def get_route_matrix() -> RouteMatrix:
+    """Process-wide route matrix, loaded (or rebuilt) once on first use."""
+    return load_or_build()
+
+
+if __name__ == "__main__":
+    m = build_route_matrix()
+    m.save(DEFAULT_MATRIX_DIR)
+    print(f"Wrote {len(m.nodes)}x{len(m.nodes)} route matrix to {os.path.abspath(DEFAULT_MATRIX_DIR)}")
@@ -0,0 +1,120 @@
+# routing/pareto.py
+"""Pareto-optimal (travel time vs CO2) route search.
+
+Every campus segment can be travelled on its ``fast`` or its ``eco`` profile,
+so a route is a path plus a profile choice per segment. ``pareto_routes``
+runs a bi-criteria label-setting search that returns every non-dominated
+route between two nodes for one vehicle type, ordered fastest to greenest.
+
+Labels are settled in lexicographic (time, CO2) order, so a new label at a
+node is dominated exactly when its CO2 is not below the best CO2 already
+settled there. Because target routes are also found in time order, a label
+can be dropped as soon as its CO2 plus a lower bound on the remaining CO2 (one
+backward Dijkstra) can't beat the greenest route found so far, which keeps the
+search small on large graphs.
+"""
+import heapq
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from routing.graph import RoutingGraph, campus_graph
+from utils.helpers import calculate_co2_grams
+
+PROFILES = ("fast", "eco")
+
+
+def _arcs(graph: RoutingGraph, vehicle_type: str) -> List[List[Tuple[str, float, float]]]:
+    """Per edge, the (profile, minutes, co2_g) options that aren't dominated by the other."""
+    out = []
+    for _, _, seg in graph.edges:
+        options = [(p, float(seg[p]["time_min"]), calculate_co2_grams(vehicle_type, seg[p]["distance_km"])) for p in PROFILES if p in seg]
+        keep: List[Tuple[str, float, float]] = []
+        for o in options:
+            if any(q[1] <= o[1] and q[2] <= o[2] for q in keep):
+                continue
+            keep = [q for q in keep if not (o[1] <= q[1] and o[2] <= q[2])] + [o]
+        out.append(keep)
+    return out
+
+
+def _lower_bounds(graph: RoutingGraph, target: int, weights: Sequence[float]) -> List[float]:
+    dist = [math.inf] * len(graph.nodes)
+    dist[target] = 0.0
+    heap = [(0.0, target)]
+    while heap:
+        d, u = heapq.heappop(heap)
+        if d > dist[u]:
+            continue
+        for v, eid in graph.adj[u]:
+            nd = d + weights[eid]
+            if nd < dist[v]:
+                dist[v] = nd
+                heapq.heappush(heap, (nd, v))
+    return dist
+
+
+def pareto_routes(graph: RoutingGraph, source: int, target: int, vehicle_type: str = "Car") -> List[Dict[str, Any]]:
+    """All non-dominated routes from ``source`` to ``target``, fastest first.
+
+    Each route is a leg dict (see :meth:`RoutingGraph.leg`) extended with
+    ``co2_g`` and ``profiles`` (the profile used on each segment).
+    """
+    arcs = _arcs(graph, vehicle_type)
+    lb_co2 = _lower_bounds(graph, target, [min(o[2] for o in a) for a in arcs])
+    if math.isinf(lb_co2[source]):
+        return []
+
+    # label: (node, parent label, edge id, profile)
+    labels: List[Tuple[int, int, int, str]] = [(source, -1, -1, "")]
+    heap = [(0.0, 0.0, 0)]
+    best_co2 = [math.inf] * len(graph.nodes)
+    found: List[Tuple[float, float, int]] = []
+    while heap:
+        t, c, li = heapq.heappop(heap)
+        node = labels[li][0]
+        if c >= best_co2[node] or c + lb_co2[node] >= best_co2[target]:
+            continue
+        best_co2[node] = c
+        if node == target:
+            found.append((t, c, li))
+            continue
+        for v, eid in graph.adj[node]:
+            for profile, dt, dc in arcs[eid]:
+                nc = c + dc
+                if nc >= best_co2[v] or nc + lb_co2[v] >= best_co2[target]:
+                    continue
+                labels.append((v, li, eid, profile))
+                heapq.heappush(heap, (t + dt, nc, len(labels) - 1))
+
+    out = []
+    for t, c, li in found:
+        nodes, edges, profiles = [], [], []
+        while li >= 0:
+            node, parent, eid, profile = labels[li]
+            nodes.append(node)
+            if eid >= 0:
+                edges.append(eid)
+                profiles.append(profile)
+            li = parent
+        nodes.reverse()
+        edges.reverse()
+        profiles.reverse()
+        leg = graph.leg(nodes, edges, profiles)
+        leg["time_min"] = round(t, 2)
+        leg["co2_g"] = round(c, 2)
+        leg["profiles"] = profiles
+        out.append(leg)
+    return out
+
+
+def find_pareto_routes(start: str, end: str, vehicle_type: str = "Car", graph: Optional[RoutingGraph] = None) -> Optional[Dict[str, Any]]:
+    """Time/CO2 trade-off routes between two campus locations, or None if unknown."""
+    graph = graph or campus_graph()
+    s = graph.index.get(start)
+    e = graph.index.get(end)
+    if s is None or e is None:
+        return None
+    routes = pareto_routes(graph, s, e, vehicle_type)
+    if not routes:
+        return None
+    return {"from_loc": start, "to_loc": end, "vehicle": vehicle_type, "routes": routes}
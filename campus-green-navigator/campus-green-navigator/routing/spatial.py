@@ -0,0 +1,206 @@
+# routing/spatial.py
+"""Spatial index for snapping raw lat/lon input onto the campus graph.
+
+Points (graph nodes) and path segments are bucketed into a uniform lat/lon
+grid. A query scans rings of cells outward from the query cell, measuring the
+candidates with a vectorized haversine, and stops once the next ring can't
+hold anything closer than the best match. On campus-sized data that is a few
+cells and well under a millisecond, instead of a scan over every point.
+"""
+import math
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from routing.graph import EARTH_RADIUS_KM, RoutingGraph, campus_graph
+
+# ~110 m cells; a campus building cluster lands in a handful of cells
+DEFAULT_CELL_DEG = 0.001
+# raw coordinates further than this from every campus node are not snapped
+DEFAULT_MAX_SNAP_KM = 2.0
+
+
+def haversine_km_vec(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Haversine distance (km) from one point to arrays of points."""
+    p1 = math.radians(lat)
+    p2 = np.radians(lats)
+    dp = p2 - p1
+    dl = np.radians(lons - lon)
+    a = np.sin(dp / 2.0) ** 2 + math.cos(p1) * np.cos(p2) * np.sin(dl / 2.0) ** 2
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.minimum(1.0, np.sqrt(a)))
+
+
+def parse_latlon(text: str) -> Optional[Tuple[float, float]]:
+    """Parse a ``'lat,lon'`` string (or ``'lon,lat'``, by range heuristic); None otherwise.
+
+    Only finite coordinates with lat in [-90, 90] and lon in [-180, 180] parse.
+    """
+    if not isinstance(text, str) or "," not in text:
+        return None
+    parts = [p.strip() for p in text.split(",")]
+    if len(parts) != 2:
+        return None
+    try:
+        a, b = float(parts[0]), float(parts[1])
+    except ValueError:
+        return None
+    if not -90 <= a <= 90:
+        a, b = b, a
+    if not (-90 <= a <= 90 and -180 <= b <= 180):  # also rejects NaN and inf
+        return None
+    return a, b
+
+
+class SpatialIndex:
+    """Grid-hash index over named points and the segments between them."""
+
+    def __init__(self, names: Sequence[str], lats: Sequence[float], lons: Sequence[float],
+                 segments: Sequence[Tuple[int, int]] = (), cell_deg: float = DEFAULT_CELL_DEG):
+        self.names = list(names)
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.cell_deg = cell_deg
+        self.segments = np.asarray(segments, dtype=np.int64).reshape(-1, 2)
+
+        point_cells: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        for i, (la, lo) in enumerate(zip(self.lats, self.lons)):
+            point_cells[self._cell(la, lo)].append(i)
+        self._points = {k: np.asarray(v, dtype=np.int64) for k, v in point_cells.items()}
+
+        # a segment is registered in every cell its bounding box touches
+        seg_cells: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        for s, (a, b) in enumerate(self.segments):
+            r0, c0 = self._cell(min(self.lats[a], self.lats[b]), min(self.lons[a], self.lons[b]))
+            r1, c1 = self._cell(max(self.lats[a], self.lats[b]), max(self.lons[a], self.lons[b]))
+            for r in range(r0, r1 + 1):
+                for c in range(c0, c1 + 1):
+                    seg_cells[(r, c)].append(s)
+        self._segments = {k: np.asarray(v, dtype=np.int64) for k, v in seg_cells.items()}
+
+        keys = list(self._points) + list(self._segments)
+        self._bounds = (
+            (min(k[0] for k in keys), max(k[0] for k in keys), min(k[1] for k in keys), max(k[1] for k in keys))
+            if keys else (0, -1, 0, -1)
+        )
+
+    @classmethod
+    def from_graph(cls, graph: RoutingGraph, cell_deg: float = DEFAULT_CELL_DEG) -> "SpatialIndex":
+        """Index the graph's nodes that have coordinates, and the edges between them."""
+        keep = [i for i, c in enumerate(graph.coords) if c is not None]
+        local = {g: i for i, g in enumerate(keep)}
+        segments = [(local[u], local[v]) for u, v, _ in graph.edges if u in local and v in local and u != v]
+        return cls(
+            [graph.nodes[i] for i in keep],
+            [graph.coords[i][0] for i in keep],  # type: ignore[index]
+            [graph.coords[i][1] for i in keep],  # type: ignore[index]
+            segments,
+            cell_deg,
+        )
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return int(math.floor(lat / self.cell_deg)), int(math.floor(lon / self.cell_deg))
+
+    def _rings(self, lat: float, lon: float, buckets: Dict[Tuple[int, int], np.ndarray]):
+        """Yield (ring radius, candidate ids) expanding outward, ring by ring.
+
+        Once a ring would touch more cells than are occupied (queries far off
+        campus), the remaining buckets are yielded at once with radius ``inf``.
+        """
+        r0, c0 = self._cell(lat, lon)
+        rmin, rmax, cmin, cmax = self._bounds
+        reach = max(abs(r0 - rmin), abs(r0 - rmax), abs(c0 - cmin), abs(c0 - cmax))
+        for ring in range(reach + 1):
+            if 8 * ring > len(buckets):
+                yield math.inf, (np.unique(np.concatenate(list(buckets.values()))) if buckets else None)
+                return
+            ids = []
+            for r in range(r0 - ring, r0 + ring + 1):
+                edge_row = r in (r0 - ring, r0 + ring)
+                step = 1 if edge_row else 2 * ring
+                for c in range(c0 - ring, c0 + ring + 1, max(1, step)):
+                    found = buckets.get((r, c))
+                    if found is not None:
+                        ids.append(found)
+            yield ring, (np.unique(np.concatenate(ids)) if ids else None)
+
+    def _ring_clearance_km(self, lat: float, ring: float) -> float:
+        """Distance beyond which unvisited cells lie once ``ring`` has been scanned."""
+        if math.isinf(ring):
+            return math.inf
+        km_per_deg = math.radians(1.0) * EARTH_RADIUS_KM
+        # longitude degrees are the shorter side; use the cos at the ring's far edge
+        far_lat = min(90.0, abs(lat) + (ring + 1) * self.cell_deg)
+        return ring * self.cell_deg * km_per_deg * math.cos(math.radians(far_lat))
+
+    def nearest_node(self, lat: float, lon: float) -> Optional[Tuple[str, float]]:
+        """Closest indexed point as ``(name, distance_km)``, or None if the index is empty."""
+        best_i, best_d = -1, math.inf
+        for ring, ids in self._rings(lat, lon, self._points):
+            if ids is not None:
+                d = haversine_km_vec(lat, lon, self.lats[ids], self.lons[ids])
+                k = int(np.argmin(d))
+                if d[k] < best_d:
+                    best_i, best_d = int(ids[k]), float(d[k])
+            if best_i >= 0 and best_d <= self._ring_clearance_km(lat, ring):
+                break
+        if best_i < 0:
+            return None
+        return self.names[best_i], best_d
+
+    def nearest_segment(self, lat: float, lon: float) -> Optional[Tuple[str, str, float, Tuple[float, float], float]]:
+        """Closest indexed segment.
+
+        Returns ``(from_name, to_name, fraction, (lat, lon) of snapped point,
+        distance_km)`` where ``fraction`` is the position along the segment
+        (0 at ``from_name``), or None if there are no segments.
+        """
+        best = None
+        best_d = math.inf
+        coslat = math.cos(math.radians(lat))
+        for ring, ids in self._rings(lat, lon, self._segments):
+            if ids is not None:
+                a = self.segments[ids, 0]
+                b = self.segments[ids, 1]
+                # project in a local equirectangular plane around the query point
+                ax, ay = (self.lons[a] - lon) * coslat, self.lats[a] - lat
+                bx, by = (self.lons[b] - lon) * coslat, self.lats[b] - lat
+                dx, dy = bx - ax, by - ay
+                denom = dx * dx + dy * dy
+                t = np.where(denom > 0, -(ax * dx + ay * dy) / np.where(denom > 0, denom, 1.0), 0.0)
+                t = np.clip(t, 0.0, 1.0)
+                plat = self.lats[a] + t * (self.lats[b] - self.lats[a])
+                plon = self.lons[a] + t * (self.lons[b] - self.lons[a])
+                d = haversine_km_vec(lat, lon, plat, plon)
+                k = int(np.argmin(d))
+                if d[k] < best_d:
+                    best_d = float(d[k])
+                    best = (self.names[a[k]], self.names[b[k]], float(t[k]), (float(plat[k]), float(plon[k])))
+            if best is not None and best_d <= self._ring_clearance_km(lat, ring):
+                break
+        if best is None:
+            return None
+        return best + (best_d,)
+
+
+@lru_cache(maxsize=1)
+def campus_spatial_index() -> SpatialIndex:
+    """Process-wide index over the campus graph, built on first use."""
+    return SpatialIndex.from_graph(campus_graph())
+
+
+def resolve_location(place: str, max_km: float = DEFAULT_MAX_SNAP_KM) -> Optional[str]:
+    """Map a campus name or a raw ``'lat,lon'`` string to a campus location name.
+
+    Raw coordinates snap to the nearest campus node within ``max_km``.
+    """
+    if place in campus_graph().index:
+        return place
+    coords = parse_latlon(place)
+    if coords is None:
+        return None
+    hit = campus_spatial_index().nearest_node(*coords)
+    if hit is None or hit[1] > max_km:
+        return None
+    return hit[0]
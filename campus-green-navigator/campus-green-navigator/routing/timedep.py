@@ -0,0 +1,237 @@
+# routing/timedep.py
+"""Time-dependent routing over hour-of-week edge travel-time profiles.
+
+Static ``time_min`` values in ``campus_data.ROUTES`` are scaled by a campus
+congestion curve with the same class-changeover peaks (8-10 and 14-16 on
+weekdays) as the synthetic parking data in ``ml/parking_predictor.py``. Each
+edge and segment profile gets 168 hourly travel times in one float32 array;
+between hour slots the time is interpolated linearly, which keeps the network
+FIFO (leaving later never gets you there earlier) so a time-dependent Dijkstra
+is exact.
+
+Queries are answered from a cache of shortest-path trees keyed by departure
+bucket (``CGN_TD_BUCKET_MIN`` minutes of the week): the path comes from the
+tree computed at the bucket start and its travel time is evaluated exactly at
+the requested departure.
+
+Keep this module import-safe (no Streamlit) so tests and the API can use it.
+"""
+import heapq
+import math
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from routing.graph import METRICS, RoutingGraph, campus_graph
+
+HOURS_PER_WEEK = 168
+MINUTES_PER_WEEK = HOURS_PER_WEEK * 60
+DEFAULT_BUCKET_MIN = int(os.getenv("CGN_TD_BUCKET_MIN", "15"))
+# travel time multiplier at full congestion is 1 + PEAK_SLOWDOWN * sensitivity
+PEAK_SLOWDOWN = 1.5
+# how strongly each segment profile reacts to congestion: the fast profile
+# follows the campus roads, the eco profile mostly paths and cycle lanes
+PROFILE_SENSITIVITY: Dict[str, float] = {"fast": 1.0, "eco": 0.15}
+
+
+def congestion_curve() -> np.ndarray:
+    """Campus congestion level in [0, 1] for each hour of the week (Monday 00:00 first)."""
+    how = np.arange(HOURS_PER_WEEK)
+    hour = how % 24
+    weekday = how // 24
+    level = np.full(HOURS_PER_WEEK, 0.2)
+    level[((hour >= 8) & (hour <= 10)) | ((hour >= 14) & (hour <= 16))] += 0.5
+    level[(hour < 6) | (hour >= 22)] -= 0.15
+    level[weekday >= 5] -= 0.25
+    return np.clip(level, 0.0, 1.0)
+
+
+def week_minute(when: datetime) -> float:
+    """Minutes since Monday 00:00 of ``when``'s week."""
+    return when.weekday() * 1440 + when.hour * 60 + when.minute + when.second / 60.0
+
+
+def _hourly_factors(attrs: Mapping[str, Any], default: np.ndarray) -> np.ndarray:
+    """Per-segment override: ``hourly_factor`` with 24 (repeated daily) or 168 multipliers."""
+    custom = attrs.get("hourly_factor")
+    if custom is None:
+        return default
+    arr = np.asarray(custom, dtype=np.float64)
+    if arr.shape == (24,):
+        return np.tile(arr, 7)
+    if arr.shape == (HOURS_PER_WEEK,):
+        return arr
+    raise ValueError(f"hourly_factor must have 24 or {HOURS_PER_WEEK} values, got {arr.size}")
+
+
+class TimeDependentRouter:
+    """Time-dependent fast/eco routes with a departure-bucket cache of search trees."""
+
+    def __init__(self, graph: RoutingGraph, bucket_min: int = DEFAULT_BUCKET_MIN, max_buckets: int = 96):
+        self.graph = graph
+        self.bucket_min = bucket_min
+        self.max_buckets = max_buckets
+        curve = congestion_curve()
+        # profile -> (E, 168) float32 travel minutes at the start of each hour
+        self.profiles: Dict[str, np.ndarray] = {}
+        for profile, sensitivity in PROFILE_SENSITIVITY.items():
+            default = 1.0 + PEAK_SLOWDOWN * sensitivity * curve
+            table = np.empty((len(graph.edges), HOURS_PER_WEEK), dtype=np.float32)
+            for eid, (_, _, seg) in enumerate(graph.edges):
+                table[eid] = float(seg[profile]["time_min"]) * _hourly_factors(seg[profile], default)
+            self.profiles[profile] = table
+        # bucket -> {source: parent list}, least recently used bucket first
+        self._trees: "OrderedDict[int, Dict[int, List[Optional[Tuple[int, int]]]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()  # the router is shared by API worker threads
+
+    def edge_minutes(self, profile: str, eid: int, at_min: float) -> float:
+        """Travel time of edge ``eid`` entered at ``at_min`` minutes into the week."""
+        row = self.profiles[profile][eid]
+        x = (at_min % MINUTES_PER_WEEK) / 60.0
+        i = int(x)
+        frac = x - i
+        return float(row[i] + (row[(i + 1) % HOURS_PER_WEEK] - row[i]) * frac)
+
+    def path_minutes(self, profile: str, edge_path: Sequence[int], depart_min: float) -> float:
+        """Door-to-door minutes along ``edge_path`` leaving at ``depart_min``."""
+        t = depart_min
+        for eid in edge_path:
+            t += self.edge_minutes(profile, eid, t)
+        return t - depart_min
+
+    def search(self, source: int, depart_min: float, profile: str = "fast",
+               target: Optional[int] = None) -> Tuple[List[float], List[Optional[Tuple[int, int]]]]:
+        """Time-dependent Dijkstra from ``source``; stops early once ``target`` is settled.
+
+        Returns ``(arrival, parent)`` lists indexed by node, with arrival in
+        minutes since the week start (``inf`` when unreachable or not reached).
+        """
+        n = len(self.graph.nodes)
+        arrival = [math.inf] * n
+        parent: List[Optional[Tuple[int, int]]] = [None] * n
+        arrival[source] = depart_min
+        heap = [(depart_min, source)]
+        while heap:
+            t, u = heapq.heappop(heap)
+            if t > arrival[u]:
+                continue
+            if u == target:
+                break
+            for v, eid in self.graph.adj[u]:
+                nt = t + self.edge_minutes(profile, eid, t)
+                if nt < arrival[v]:
+                    arrival[v] = nt
+                    parent[v] = (u, eid)
+                    heapq.heappush(heap, (nt, v))
+        return arrival, parent
+
+    def shortest_path(self, source: int, target: int, depart_min: float) -> Optional[Tuple[float, List[int], List[int]]]:
+        """Exact time-dependent fastest path as ``(minutes, node_path, edge_path)``, or None."""
+        arrival, parent = self.search(source, depart_min, "fast", target)
+        if math.isinf(arrival[target]):
+            return None
+        nodes, edge_path = _unwind(parent, source, target)
+        return arrival[target] - depart_min, nodes, edge_path
+
+    def bucket_of(self, depart_min: float) -> int:
+        return int((depart_min % MINUTES_PER_WEEK) // self.bucket_min)
+
+    def _tree(self, bucket: int, source: int) -> List[Optional[Tuple[int, int]]]:
+        with self._lock:
+            trees = self._trees.get(bucket)
+            if trees is None:
+                trees = self._trees[bucket] = {}
+                while len(self._trees) > self.max_buckets:
+                    self._trees.popitem(last=False)
+            else:
+                self._trees.move_to_end(bucket)
+            parent = trees.get(source)
+            if parent is not None:
+                self.hits += 1
+                return parent
+            self.misses += 1
+        # search outside the lock; two threads may both build the same tree, the last one is kept
+        _, parent = self.search(source, bucket * self.bucket_min, "fast")
+        with self._lock:
+            trees[source] = parent
+        return parent
+
+    def precompute(self, buckets: Sequence[int]) -> None:
+        """Fill the cache with every source's tree for ``buckets``."""
+        for bucket in buckets:
+            for source in range(len(self.graph.nodes)):
+                self._tree(bucket, source)
+
+    def peak_buckets(self, threshold: float = 0.5) -> List[int]:
+        """Departure buckets falling in hours whose congestion level is at least ``threshold``."""
+        b = self.bucket_min
+        hours = np.flatnonzero(congestion_curve() >= threshold)
+        return sorted({k for h in hours.tolist() for k in range(h * 60 // b, ((h + 1) * 60 - 1) // b + 1)})
+
+    def route(self, start: str, end: str, depart: datetime) -> Optional[Dict[str, Any]]:
+        """Fast/eco route payload for leaving at ``depart``, or None.
+
+        The fast leg follows the departure bucket's time-dependent tree; the
+        eco leg keeps the shortest-distance path. Both report ``time_min`` for
+        the exact departure time.
+        """
+        s = self.graph.index.get(start)
+        e = self.graph.index.get(end)
+        if s is None or e is None:
+            return None
+        depart_min = week_minute(depart)
+        parent = self._tree(self.bucket_of(depart_min), s)
+        if s != e and parent[e] is None:
+            return None
+        out: Dict[str, Any] = {"from_loc": start, "to_loc": end, "depart": depart.isoformat()}
+        for metric, (profile, _) in METRICS.items():
+            if metric == "fast":
+                nodes, edge_path = _unwind(parent, s, e)
+            else:
+                found = self.graph.shortest_path(s, e, metric)
+                if found is None:
+                    return None
+                _, nodes, edge_path = found
+            leg = self.graph.leg(nodes, edge_path, profile)
+            leg["time_min"] = round(self.path_minutes(profile, edge_path, depart_min), 1)
+            out[metric] = leg
+        return out
+
+
+def _unwind(parent: Sequence[Optional[Tuple[int, int]]], source: int, target: int) -> Tuple[List[int], List[int]]:
+    nodes = [target]
+    edge_path: List[int] = []
+    u = target
+    while u != source:
+        u, eid = parent[u]  # type: ignore[misc]
+        nodes.append(u)
+        edge_path.append(eid)
+    nodes.reverse()
+    edge_path.reverse()
+    return nodes, edge_path
+
+
+@lru_cache(maxsize=1)
+def campus_td_router() -> TimeDependentRouter:
+    """Process-wide time-dependent router with the weekday peak buckets precomputed.
+
+    Built on first use; the mock server builds it at startup.
+    """
+    router = TimeDependentRouter(campus_graph())
+    peaks = router.peak_buckets()
+    # room for the peak buckets plus the default budget for off-peak departures
+    router.max_buckets += len(peaks)
+    router.precompute(peaks)
+    return router
+
+
+def find_route_at(start: str, end: str, depart: datetime) -> Optional[Dict[str, Any]]:
+    """Fast/eco route between campus locations for a given departure time, or None."""
+    return campus_td_router().route(start, end, depart)
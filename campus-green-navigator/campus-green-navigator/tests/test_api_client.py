@@ -36,3 +36,15 @@ def test_client_fallback_to_local():
     resp = client.get_route(r['from'], r['to'])
     assert resp['from_loc'] == r['from']
     assert 'fast' in resp and 'eco' in resp
+
+
+def test_routes_batch_falls_back_to_local_matrix():
+    client = _load_client_module()
+    data = _load_campus_data()
+    pairs = [(r['from'], r['to']) for r in data.ROUTES] + [('Main Gate', 'Nowhere', 'EV')]
+    rows = client.get_routes_batch(pairs, vehicle='Car', chunk_size=4)
+    assert len(rows) == len(pairs)
+    first = data.ROUTES[0]
+    assert rows[0]['found'] and rows[0]['fast']['distance_km'] == first['fast']['distance_km']
+    assert rows[0]['fast']['co2_g'] == 120.0 * first['fast']['distance_km']
+    assert rows[-1] == {'start': 'Main Gate', 'end': 'Nowhere', 'vehicle': 'EV', 'found': False}
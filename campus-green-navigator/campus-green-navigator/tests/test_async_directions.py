@@ -0,0 +1,60 @@
+import asyncio
+import importlib.util
+import json
+import time
+from pathlib import Path
+
+
+def _load_mapmy_module():
+    root = Path(__file__).resolve().parents[1]
+    spec = importlib.util.spec_from_file_location('api.mapmyindia', str(root / 'api' / 'mapmyindia.py'))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+class _Resp:
+    def __init__(self, j):
+        self._j = j
+
+    def raise_for_status(self):
+        return None
+
+    def json(self):
+        return self._j
+
+
+def test_directions_geocodes_both_ends_concurrently(monkeypatch):
+    mod = _load_mapmy_module()
+    sample = json.loads((Path(__file__).resolve().parent / 'data' / 'sample_mapmyindia.json').read_text())
+    in_flight = {'now': 0, 'max': 0}
+
+    async def fake_get(url, **kwargs):
+        if 'geocode' in url:
+            in_flight['now'] += 1
+            in_flight['max'] = max(in_flight['max'], in_flight['now'])
+            await asyncio.sleep(0.2)
+            in_flight['now'] -= 1
+            return _Resp({'suggestedLocations': [{'lat': 28.6, 'lon': 77.1}]})
+        return _Resp(sample)
+
+    async def fake_token():
+        return 'fake-token'
+
+    monkeypatch.setenv('MAPMYINDIA_CLIENT_ID', 'dummy_id')
+    monkeypatch.setenv('MAPMYINDIA_CLIENT_SECRET', 'dummy_secret')
+    monkeypatch.setattr(mod.http_pool, 'async_get', fake_get)
+    monkeypatch.setattr(mod, 'fetch_token_async', fake_token)
+    monkeypatch.setattr(mod, 'geocode_cache', mod.TieredCache('geocode', db_path=None))
+
+    t0 = time.perf_counter()
+    out = mod.directions('Library', 'Main Gate')
+    assert time.perf_counter() - t0 < 0.35
+    assert in_flight['max'] == 2
+    assert out['fast']['distance_km'] == 2.5
+
+    # bulk use keeps at most `limit` lookups in flight
+    in_flight['max'] = 0
+    mod.geocode_cache.clear()
+    routes = asyncio.run(mod.directions_many([('Library', 'Main Gate')] * 6, limit=2))
+    assert len(routes) == 6 and in_flight['max'] <= 4
@@ -0,0 +1,62 @@
+import time
+
+import requests
+
+from api import client
+from api.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+def test_opens_on_failure_rate_and_half_opens_for_one_trial():
+    b = CircuitBreaker('t', window=4, min_calls=4, failure_rate=0.5, open_s=0.05)
+    for ok in (True, False, True):
+        b.record_success() if ok else b.record_failure()
+    assert b.state == CLOSED
+    b.record_failure()  # 2 of 4 failed
+    assert b.state == OPEN and not b.allow()
+    time.sleep(0.06)
+    assert b.allow() and b.state == HALF_OPEN
+    assert not b.allow()  # only one trial at a time
+    b.record_failure()
+    assert b.state == OPEN
+    time.sleep(0.06)
+    assert b.allow()
+    b.record_success()
+    assert b.state == CLOSED and b.snapshot()['opened'] == 2
+
+
+def test_guard_counts_only_outages_and_probe_recloses():
+    healthy = {'up': False}
+    b = CircuitBreaker('p', min_calls=1, open_s=60, probe=lambda: healthy['up'], probe_interval_s=0.02)
+    try:
+        with b.guard():
+            raise requests.HTTPError(response=type('R', (), {'status_code': 404})())
+    except requests.HTTPError:
+        pass
+    assert b.state == CLOSED
+    try:
+        with b.guard():
+            raise requests.ConnectionError('down')
+    except requests.ConnectionError:
+        pass
+    assert b.state == OPEN
+    time.sleep(0.1)
+    assert b.state == OPEN and b.snapshot()['probes'] >= 2
+    healthy['up'] = True
+    time.sleep(0.1)
+    assert b.state == CLOSED
+
+
+def test_open_backend_is_skipped_without_a_request(monkeypatch):
+    calls = []
+
+    async def fake_get(*args, **kwargs):
+        calls.append(args)
+        raise AssertionError('backend should not be called')
+
+    b = CircuitBreaker('backend', open_s=60)
+    b.record_failure(), b.record_failure(), b.record_failure()
+    monkeypatch.setattr(client, 'backend_breaker', b)
+    monkeypatch.setattr(client.http_pool, 'async_get', fake_get)
+    route = client.get_route('Main Gate', 'Library', use_cache=False)
+    assert route['source'] == 'local' and calls == []
+    assert b.snapshot()['rejected'] == 1
@@ -0,0 +1,71 @@
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+
+from ml.compiled_forest import CompiledForest, forest_path, load_parking_model
+from ml.parking_predictor import FEATURES, add_time_features, generate_synthetic_parking, save_model
+
+
+def _fitted(n_estimators=20, **kw):
+    df = add_time_features(generate_synthetic_parking(days=20))
+    model = RandomForestRegressor(n_estimators=n_estimators, random_state=0, **kw)
+    model.fit(df[FEATURES], df['occupancy'])
+    return model, df[FEATURES]
+
+
+def test_compiled_forest_matches_sklearn():
+    model, X = _fitted()
+    forest = CompiledForest.from_sklearn(model)
+    mean, std = forest.predict_with_std(X)
+    per_tree = np.vstack([est.predict(X.to_numpy()) for est in model.estimators_])
+    np.testing.assert_array_equal(mean, model.predict(X))
+    np.testing.assert_array_equal(forest.tree_predictions(X), per_tree)
+    np.testing.assert_allclose(std, per_tree.std(axis=0), rtol=0, atol=1e-12)
+    assert forest.n_estimators == 20 and forest.n_nodes == sum(e.tree_.node_count for e in model.estimators_)
+
+
+def test_compiled_forest_reorders_named_columns_and_takes_arrays():
+    model, X = _fitted(n_estimators=5, max_depth=4)
+    forest = CompiledForest.from_sklearn(model)
+    shuffled = X[FEATURES[::-1]]
+    np.testing.assert_array_equal(forest.predict(shuffled), model.predict(X))
+    np.testing.assert_array_equal(forest.predict(X.to_numpy()), model.predict(X))
+    assert len(forest.predict(X.iloc[:0])) == 0
+
+
+def test_save_load_round_trip(tmp_path):
+    model, X = _fitted(n_estimators=5)
+    path = str(tmp_path / 'forest.npz')
+    CompiledForest.from_sklearn(model).save(path)
+    loaded = CompiledForest.load(path)
+    assert loaded.feature_names == FEATURES
+    np.testing.assert_array_equal(loaded.feature_importances_, model.feature_importances_)
+    np.testing.assert_array_equal(loaded.predict(X), model.predict(X))
+
+
+def test_load_parking_model_prefers_current_compiled_arrays(tmp_path):
+    model, X = _fitted(n_estimators=5)
+    path = str(tmp_path / 'parking_model.joblib')
+    save_model(model, path)
+    assert os.path.exists(forest_path(path))
+    assert isinstance(load_parking_model(path), CompiledForest)
+
+    # arrays compiled from another artifact are ignored and the joblib model is compiled instead
+    CompiledForest.from_sklearn(_fitted(n_estimators=3)[0]).save(forest_path(path))
+    served = load_parking_model(path)
+    assert served.n_estimators == 5
+    np.testing.assert_array_equal(served.predict(X), model.predict(X))
+
+
+def test_load_parking_model_wraps_other_estimators(tmp_path):
+    df = add_time_features(generate_synthetic_parking(days=5))
+    model = LinearRegression().fit(df[FEATURES], df['occupancy'])
+    path = str(tmp_path / 'linear.joblib')
+    joblib.dump(model, path)
+    mean, std = load_parking_model(path).predict_with_std(pd.DataFrame(df[FEATURES]))
+    np.testing.assert_allclose(mean, model.predict(df[FEATURES]))
+    assert not std.any()
@@ -0,0 +1,51 @@
+import random
+
+from data import campus_data
+from routing.contraction import ContractionHierarchy, HierarchyRouter
+from routing.graph import RoutingGraph
+
+
+def _random_graph(seed, n=80, m=240):
+    rnd = random.Random(seed)
+    locations = {f'n{i}': {'lat': 12.9 + rnd.random() * 0.05, 'lon': 77.5 + rnd.random() * 0.05} for i in range(n)}
+    routes = []
+    for _ in range(m):
+        a, b = rnd.sample(range(n), 2)
+        routes.append({'from': f'n{a}', 'to': f'n{b}',
+                       'fast': {'distance_km': rnd.uniform(0.1, 2), 'time_min': rnd.uniform(1, 10)},
+                       'eco': {'distance_km': rnd.uniform(0.1, 2), 'time_min': rnd.uniform(1, 10)}})
+    return RoutingGraph(locations, routes)
+
+
+def test_hierarchy_matches_dijkstra_costs_and_paths():
+    g = _random_graph(3)
+    rnd = random.Random(11)
+    for metric in ('fast', 'eco'):
+        # a tiny witness limit forces extra shortcuts; answers must stay exact
+        for limit in (2, 50):
+            ch = ContractionHierarchy(g, metric, settle_limit=limit)
+            for _ in range(60):
+                s, t = rnd.sample(range(len(g.nodes)), 2)
+                expected = g.shortest_path_tree(s, metric)[0][t]
+                got = ch.query(s, t)
+                if expected == float('inf'):
+                    assert got is None
+                    continue
+                cost, nodes, edges = got
+                assert abs(cost - expected) < 1e-9
+                assert nodes[0] == s and nodes[-1] == t and len(edges) == len(nodes) - 1
+                # unpacked edges chain the node path and add up to the cost
+                total = 0.0
+                for i, eid in enumerate(edges):
+                    u, v, _ = g.edges[eid]
+                    assert {u, v} == {nodes[i], nodes[i + 1]}
+                    total += g.weights[metric][eid]
+                assert abs(total - expected) < 1e-9
+
+
+def test_router_payload_matches_graph_on_campus():
+    g = RoutingGraph.from_campus_data(campus_data)
+    router = HierarchyRouter(g)
+    for start in campus_data.LOCATIONS:
+        for end in campus_data.LOCATIONS:
+            assert router.route(start, end) == g.route(start, end)
@@ -0,0 +1,91 @@
+import asyncio
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from api import directions_parser as dp
+from utils.polyline import encode
+
+SAMPLE = Path(__file__).resolve().parent / 'data' / 'sample_mapmyindia.json'
+
+
+def _response():
+    """Two routes: one with a LineString, one with polyline step geometries, plus noise."""
+    line = [[77.1 + i * 1e-4, 28.6 + i * 1e-4] for i in range(600)]
+    steps = [
+        {'distance': 10, 'duration': 2, 'geometry': encode([(28.6, 77.1), (28.601, 77.101)]),
+         'maneuver': {'type': 'turn', 'location': [77.1, 28.6]}, 'name': 'Ring Rd'},
+        {'distance': 20, 'duration': 3, 'geometry': encode([(28.601, 77.101), (28.603, 77.1)])},
+    ]
+    return {
+        'code': 'Ok',
+        'routes': [
+            {'distance': 2500, 'duration': 600, 'weight': 1.0, 'geometry': {'type': 'LineString', 'coordinates': line},
+             'legs': [{'distance': 2500, 'steps': [{'distance': 1, 'geometry': {'coordinates': [[0, 0], [1, 1]]}}]}]},
+            {'distance': 2100, 'duration': 720, 'legs': [{'steps': steps}]},
+        ],
+        'waypoints': [{'location': [77.1, 28.6]}],
+    }
+
+
+def _chunks(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def test_json_fallback_reads_every_route():
+    routes = dp.parse_directions_json(_response())
+    assert [r['distance_m'] for r in routes] == [2500.0, 2100.0]
+    assert [r['duration_s'] for r in routes] == [600.0, 720.0]
+    assert routes[0]['geometry'][0] == (28.6, 77.1) and len(routes[0]['geometry']) == 600
+    # no route geometry: step geometries of every leg are joined
+    assert len(routes[1]['geometry']) == 4
+    assert routes[1]['geometry'][-1] == (28.603, 77.1)
+
+
+def test_sample_and_feature_collections():
+    sample = json.loads(SAMPLE.read_text())
+    (route,) = dp.parse_directions_json(sample)
+    assert route['distance_m'] == 2500.0
+    assert route['geometry'].to_list() == [[28.6, 77.1], [28.601, 77.101], [28.602, 77.102]]
+
+    fc = {'routes': {'type': 'FeatureCollection', 'features': [
+        {'properties': {'distance': 900, 'duration': 120},
+         'geometry': {'type': 'MultiLineString', 'coordinates': [[[77.1, 28.6], [77.2, 28.7]], [[77.3, 28.8, 5.0]]]}},
+    ]}}
+    (route,) = dp.parse_directions_json(fc)
+    assert route['distance_m'] == 900.0 and route['duration_s'] == 120.0
+    assert route['geometry'].to_list() == [[28.6, 77.1], [28.7, 77.2], [28.8, 77.3]]
+
+
+@pytest.mark.parametrize('payload', ['response', 'sample', 'features'])
+def test_streaming_matches_json_parse(payload):
+    pytest.importorskip('ijson')
+    j = {
+        'response': _response(),
+        'sample': json.loads(SAMPLE.read_text()),
+        'features': {'features': [{'properties': {'distance': 900, 'duration': 120},
+                                   'geometry': {'coordinates': [[[77.1, 28.6, 1.0], [77.2, 28.7, 2.0]]]}}]},
+    }[payload]
+    body = json.dumps(j).encode()
+    expected = dp.parse_directions_json(j)
+    for size in (7, 4096):
+        got = dp.parse_directions_chunks(_chunks(body, size))
+        assert len(got) == len(expected)
+        for g, e in zip(got, expected):
+            assert g['distance_m'] == e['distance_m'] and g['duration_s'] == e['duration_s']
+            np.testing.assert_array_equal(g['geometry'].coords, e['geometry'].coords)
+
+
+def test_read_directions_consumes_async_body():
+    body = json.dumps(_response()).encode()
+
+    class StreamResp:
+        async def aiter_bytes(self):
+            for chunk in _chunks(body, 512):
+                yield chunk
+
+    routes = asyncio.run(dp.read_directions(StreamResp()))
+    assert [r['distance_m'] for r in routes] == [2500.0, 2100.0]
+    assert len(routes[0]['geometry']) == 600
@@ -0,0 +1,58 @@
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+
+from ml.compiled_forest import CompiledForest
+from ml.forecast_table import (N_SLOTS, ParkingForecaster, export_table, hour_of_week_index, load_parking_forecaster,
+                               table_path)
+from ml.parking_predictor import FEATURES, add_time_features, generate_synthetic_parking, save_model
+
+
+def _fitted(columns=FEATURES):
+    df = add_time_features(generate_synthetic_parking(days=40))
+    df['temperature'] = np.random.default_rng(0).normal(25, 3, len(df))
+    model = RandomForestRegressor(n_estimators=10, random_state=0).fit(df[columns], df['occupancy'])
+    return model, df
+
+
+def test_table_matches_live_forecast_across_the_week(tmp_path):
+    model, _ = _fitted()
+    path = str(tmp_path / 'parking_model.joblib')
+    save_model(model, path)
+    served = load_parking_forecaster(path)
+    assert served.source == 'table' and len(served.table.mean) == N_SLOTS
+    live = ParkingForecaster(served.model)
+    start = datetime(2024, 3, 9, 20, 45)  # Saturday evening, across midnight into the week
+    assert served.forecast(start, 168) == live.forecast(start, 168)
+    for is_exam in (0, 1):
+        assert served.forecast(start, 24, is_exam=is_exam) == live.forecast(start, 24, is_exam=is_exam)
+
+
+def test_forecast_hours_and_slots():
+    model, df = _fitted()
+    forecaster = ParkingForecaster(CompiledForest.from_sklearn(model))
+    start = datetime(2024, 3, 10, 22, 5)
+    rows = forecaster.forecast(start, 5)
+    assert [r['hour'] for r in rows] == [(start + timedelta(hours=i)).strftime('%Y-%m-%d %H:%M') for i in range(5)]
+
+    first = df[(df['weekday'] == start.weekday()) & (df['hour'] == start.hour) & (df['is_exam'] == 0)].iloc[:1]
+    assert rows[0]['predicted_occupancy'] == model.predict(first[FEATURES])[0]
+    slot = hour_of_week_index(first['hour'], first['weekday'], first['is_exam'])
+    assert 0 <= slot[0] < N_SLOTS
+
+
+def test_table_ignored_for_another_artifact_or_feature_set(tmp_path):
+    model, _ = _fitted()
+    path = str(tmp_path / 'parking_model.joblib')
+    save_model(model, path)
+    # retrained with an extra, continuous input: no new table, the old one no longer matches
+    wider, df = _fitted(FEATURES + ['temperature'])
+    save_model(wider, path)
+    assert export_table(wider, path) is None
+    assert os.path.exists(table_path(path))
+    served = load_parking_forecaster(path)
+    assert served.source == 'model'
+    X = df[FEATURES + ['temperature']].iloc[:3]
+    np.testing.assert_array_equal(served.predict_with_std(X)[0], wider.predict(X))
@@ -0,0 +1,58 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+
+def _load_mapmy_module():
+    root = Path(__file__).resolve().parents[1]
+    spec = importlib.util.spec_from_file_location('api.mapmyindia', str(root / 'api' / 'mapmyindia.py'))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+class _Resp:
+    def __init__(self, j):
+        self._j = j
+
+    def raise_for_status(self):
+        return None
+
+    def json(self):
+        return self._j
+
+
+def test_geocode_cache_normalizes_and_caches_failures(tmp_path, monkeypatch):
+    mod = _load_mapmy_module()
+    queries = []
+
+    async def fake_get(url, params=None, **kwargs):
+        queries.append(params['query'])
+        if 'nowhere' in params['query'].lower():
+            return _Resp({'suggestedLocations': []})
+        return _Resp({'suggestedLocations': [{'lat': 12.97, 'lon': 77.59}]})
+
+    async def fake_token():
+        return 'fake-token'
+
+    monkeypatch.setenv('MAPMYINDIA_CLIENT_ID', 'dummy_id')
+    monkeypatch.setenv('MAPMYINDIA_CLIENT_SECRET', 'dummy_secret')
+    monkeypatch.setattr(mod.http_pool, 'async_get', fake_get)
+    monkeypatch.setattr(mod, 'fetch_token_async', fake_token)
+    monkeypatch.setattr(mod, 'geocode_cache', mod.TieredCache('geocode', db_path=str(tmp_path / 'c.sqlite3')))
+
+    assert mod.normalize_geocode_query('  Main-Gate, ') == 'main gate'
+    assert mod.geocode('Main Gate') == (12.97, 77.59)
+    assert mod.geocode('main  gate.') == (12.97, 77.59)
+    assert queries == ['Main Gate']
+
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            mod.geocode('Nowhere Hall')
+    assert queries == ['Main Gate', 'Nowhere Hall']
+
+    # persisted: a fresh cache on the same file still answers
+    monkeypatch.setattr(mod, 'geocode_cache', mod.TieredCache('geocode', db_path=str(tmp_path / 'c.sqlite3')))
+    assert mod.geocode('MAIN GATE') == (12.97, 77.59)
+    assert len(queries) == 2
@@ -0,0 +1,40 @@
+import json
+
+import numpy as np
+
+from data import campus_data
+from routing.graph import RoutingGraph
+from routing.matrix import build_route_matrix
+from utils.geometry import Geometry, as_geometry, jsonable_route
+
+
+def test_from_lonlat_swaps_axes_and_concat_joins():
+    g = Geometry.from_lonlat([[77.1, 28.6], [77.2, 28.7]])
+    assert g.coords.dtype == np.float64 and g.coords.flags['C_CONTIGUOUS']
+    assert list(g) == [(28.6, 77.1), (28.7, 77.2)]
+    joined = Geometry.concat([g, Geometry(), g[1:]])
+    assert len(joined) == 3 and joined[-1] == (28.7, 77.2)
+
+
+def test_from_lonlat_drops_altitude():
+    g = Geometry.from_lonlat([[77.1, 28.6, 210.0], [77.2, 28.7, 215.5]])
+    assert g.coords.shape == (2, 2) and g.coords.flags['C_CONTIGUOUS']
+    assert list(g) == [(28.6, 77.1), (28.7, 77.2)]
+    assert len(Geometry.from_lonlat([])) == 0
+
+
+def test_coercion_and_json_edge():
+    pts = [[12.9716, 77.5946], [12.9721, 77.5951]]
+    g = as_geometry(pts)
+    assert as_geometry(g) is g
+    assert as_geometry(g.encode()) == g
+    payload = jsonable_route({'fast': {'geometry': g}, 'routes': [{'geometry': g}]})
+    assert json.loads(json.dumps(payload))['fast']['geometry'] == pts
+    assert jsonable_route({'geometry': g}, 'polyline')['geometry'] == g.encode()
+
+
+def test_matrix_geometry_is_a_view_of_packed_coords():
+    m = build_route_matrix(campus_data, RoutingGraph.from_campus_data(campus_data))
+    geom = m.route('Main Gate', 'Library')['fast']['geometry']
+    assert isinstance(geom, Geometry)
+    assert np.shares_memory(geom.coords, m.arrays['fast']['geom_coords'])
@@ -31,3 +31,21 @@ def test_format_minutes_and_co2():
     # EV should produce lower CO2 (given typical factors in campus_data)
     grams_ev = h.calculate_co2_grams('EV', 10)
     assert grams_ev <= grams
+
+
+def test_co2_array_matches_scalar():
+    import numpy as np
+    h = _load_helpers()
+    rng = np.random.default_rng(0)
+    vehicles = rng.choice(['Car', 'EV', 'Bike', 'Walk', 'Truck'], size=1000)
+    distances = rng.uniform(0, 50, size=1000)
+    out = h.calculate_co2_grams_array(vehicles, distances)
+    assert out.tolist() == [h.calculate_co2_grams(v, d) for v, d in zip(vehicles.tolist(), distances.tolist())]
+
+
+def test_co2_array_rejects_non_finite_distances():
+    import pytest
+    h = _load_helpers()
+    for bad in (float('nan'), float('inf')):
+        with pytest.raises(ValueError, match='distance_km must be finite'):
+            h.calculate_co2_grams_array(['Car', 'EV'], [1.0, bad])
@@ -0,0 +1,98 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from api import http_pool
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+    wbufsize = -1  # one write per response
+    fail_next = 0
+
+    def do_GET(self):
+        status = 200
+        if _Handler.fail_next > 0:
+            _Handler.fail_next -= 1
+            status = 503
+        body = b'{"ok": true}'
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_connections_are_reused_and_transient_errors_retried():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_address[1]}/'
+    http_pool.reset_session()
+    try:
+        for _ in range(5):
+            assert http_pool.get(url, timeout=3).json() == {'ok': True}
+        _Handler.fail_next = 1
+        resp = http_pool.get(url, timeout=3)
+        assert resp.status_code == 200
+        stats = http_pool.connection_reuse()
+        assert stats['requests'] == 7  # six calls, one retried
+        assert stats['new_connections'] == 1 and stats['reuse_ratio'] > 0.8
+    finally:
+        server.shutdown()
+        http_pool.reset_session()
+
+
+def test_async_requests_retry_and_run_sync_shares_one_loop():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_address[1]}/'
+    try:
+        _Handler.fail_next = 1
+        resp = http_pool.run_sync(http_pool.async_get(url, timeout=3))
+        assert resp.status_code == 200 and resp.json() == {'ok': True}
+        results = http_pool.run_sync(http_pool.gather_bounded((http_pool.async_get(url, timeout=3) for _ in range(20)), limit=4))
+        assert [r.status_code for r in results] == [200] * 20
+    finally:
+        server.shutdown()
+
+
+class _SlowHandler(_Handler):
+    calls = 0
+
+    def do_GET(self):
+        _SlowHandler.calls += 1
+        threading.Event().wait(0.5)  # longer than the client's read timeout
+        super().do_GET()
+
+    do_POST = do_GET
+
+
+def test_read_timeouts_and_posts_are_not_retried_unless_configured():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _SlowHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_address[1]}/'
+    http_pool.reset_session()
+    try:
+        http_pool.configure_host(url, read_retries=0)
+        for call in (lambda: http_pool.get(url, timeout=0.1), lambda: http_pool.run_sync(http_pool.async_get(url, timeout=0.1))):
+            _SlowHandler.calls = 0
+            try:
+                call()
+            except Exception:
+                pass
+            assert _SlowHandler.calls == 1
+        # POSTs are only repeated on hosts that allow it, even where reads are retried
+        http_pool.configure_host(url, read_retries=None)
+        for call in (lambda: http_pool.post(url, timeout=0.1), lambda: http_pool.run_sync(http_pool.async_post(url, timeout=0.1))):
+            _SlowHandler.calls = 0
+            try:
+                call()
+            except Exception:
+                pass
+            assert _SlowHandler.calls == 1
+    finally:
+        server.shutdown()
+        http_pool.HOST_POOLS.pop(url, None)
+        http_pool.reset_session()
@@ -27,18 +27,23 @@ def test_directions_parses_sample(monkeypatch):
         def json(self):
             return self._j
 
-    def fake_get(*args, **kwargs):
+    async def fake_get(*args, **kwargs):
         return DummyResp(sample)
 
-    monkeypatch.setattr('requests.get', fake_get)
+    monkeypatch.setattr(mod.http_pool, 'async_get', fake_get)
 
     # ensure env vars are set so _get_token_from_env returns creds
     monkeypatch.setenv('MAPMYINDIA_CLIENT_ID', 'dummy_id')
     monkeypatch.setenv('MAPMYINDIA_CLIENT_SECRET', 'dummy_secret')
-    # patch the loaded module's fetch_token (requests.post not used in this test)
-    monkeypatch.setattr(mod, 'fetch_token', lambda: 'fake-token')
+
+    # patch the loaded module's token fetch (the token endpoint is not used in this test)
+    async def fake_token():
+        return 'fake-token'
+
+    monkeypatch.setattr(mod, 'fetch_token_async', fake_token)
 
     # Call with explicit lat,lon so geocode is not required in this unit test
     out = mod.directions('28.6,77.1', '28.602,77.102')
     assert 'fast' in out and 'eco' in out
     assert out['fast']['distance_km'] == 2.5
+    assert len(out['alternatives']) == 1 and out['alternatives'][0] is out['fast']
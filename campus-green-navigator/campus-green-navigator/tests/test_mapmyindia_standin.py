@@ -0,0 +1,93 @@
+import importlib.util
+import json
+import threading
+import time
+from pathlib import Path
+
+import uvicorn
+from fastapi.testclient import TestClient
+
+from api import mapmyindia_standin as standin
+
+QUIET = {'latency_ms': {'token': 'none', 'geocode': 'none', 'route': 'none'},
+         'error_rate': {'token': 0.0, 'geocode': 0.0, 'route': 0.0}, 'rate_limit_rps': None}
+
+
+def _load_mapmy_module():
+    root = Path(__file__).resolve().parents[1]
+    spec = importlib.util.spec_from_file_location('api.mapmyindia', str(root / 'api' / 'mapmyindia.py'))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+class _Server:
+    """Stand-in app served by uvicorn on a free local port."""
+
+    def __init__(self, profile):
+        config = uvicorn.Config(standin.create_app(profile), host='127.0.0.1', port=0, log_level='warning')
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        port = self.server.servers[0].sockets[0].getsockname()[1]
+        return f'http://127.0.0.1:{port}'
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join(5)
+
+
+def test_client_stack_runs_against_standin(tmp_path, monkeypatch):
+    profile = standin.load_profile(dict(QUIET, cassette=str(tmp_path / 'none.json'), alternatives=1))
+    with _Server(profile) as url:
+        monkeypatch.setenv('CGN_MAPMYINDIA_URL', url)
+        monkeypatch.setenv('MAPMYINDIA_CLIENT_ID', 'dummy_id')
+        monkeypatch.setenv('MAPMYINDIA_CLIENT_SECRET', 'dummy_secret')
+        monkeypatch.delenv('CGN_TOKEN_STORE', raising=False)
+        mod = _load_mapmy_module()
+        assert mod.TOKEN_URL == f'{url}/api/security/oauth/token'
+        monkeypatch.setattr(mod, 'geocode_cache', mod.TieredCache('geocode', db_path=None))
+
+        out = mod.directions('Library', 'Main Gate')
+        assert out['provider'] == 'mapmyindia' and len(out['alternatives']) == 2
+        assert out['fast']['geometry'][0] == (12.9721, 77.595)
+        assert out['fast']['distance_km'] > 0 and out['eco']['distance_km'] >= out['fast']['distance_km'] * 0.95
+        stats = mod.http_pool.get(f'{url}/__standin/stats').json()
+        assert stats['token']['synthetic'] == 1 and stats['geocode']['requests'] == 2 and stats['route']['requests'] == 1
+
+
+def test_injected_errors_and_rate_limit():
+    client = TestClient(standin.create_app(standin.load_profile(dict(QUIET, cassette=None, error_rate={'geocode': 1.0}))))
+    assert client.get('/api/places/geocode', params={'query': 'Library'}).status_code == 503
+    assert client.post('/api/security/oauth/token').status_code == 200
+
+    client = TestClient(standin.create_app(standin.load_profile(
+        dict(QUIET, cassette=None, rate_limit_rps=0.01, rate_limit_burst=2))))
+    codes = [client.get('/api/places/geocode', params={'query': 'Library'}) for _ in range(3)]
+    assert [r.status_code for r in codes] == [200, 200, 429]
+    assert int(codes[-1].headers['Retry-After']) >= 1
+    assert client.get('/__standin/stats').json()['geocode']['rate_limited'] == 1
+
+
+def test_record_then_replay(tmp_path):
+    cassette = tmp_path / 'cassette.json'
+    with _Server(dict(standin.load_profile(QUIET), cassette=None)) as upstream:
+        profile = standin.load_profile(dict(QUIET, mode='record', cassette=str(cassette),
+                                            upstream={ep: upstream for ep in standin.ENDPOINTS}))
+        recorder = TestClient(standin.create_app(profile))
+        live_token = recorder.post('/api/security/oauth/token').json()['access_token']
+        recorder.get('/api/places/geocode', params={'query': 'Mystery  Hall'})
+
+    saved = json.loads(cassette.read_text())['interactions']
+    assert {i['endpoint'] for i in saved} == {'token', 'geocode'}
+    assert live_token not in cassette.read_text()  # tokens are redacted
+
+    replay = TestClient(standin.create_app(standin.load_profile(dict(QUIET, cassette=str(cassette)))))
+    assert replay.post('/api/security/oauth/token').json()['access_token'] == 'recorded-token'
+    answer = replay.get('/api/places/geocode', params={'query': 'mystery hall'}).json()
+    assert answer == next(i['body'] for i in saved if i['endpoint'] == 'geocode')
+    assert replay.get('/__standin/stats').json()['geocode']['replayed'] == 1
@@ -0,0 +1,76 @@
+import os
+import time
+
+import pytest
+
+from ml.model_registry import ModelRegistry, version_path
+
+
+def _write(path, text, version=None, bump=0):
+    path.write_text(text)
+    if version is not None:
+        with open(version_path(str(path)), 'w') as f:
+            f.write(version + '\n')
+    # distinct mtimes even on coarse-grained filesystems
+    t = time.time() + bump
+    os.utime(path, (t, t))
+    if version is not None:
+        os.utime(version_path(str(path)), (t + 0.5, t + 0.5))
+
+
+def _wait_for(cond, timeout=5.0):
+    deadline = time.time() + timeout
+    while not cond():
+        assert time.time() < deadline
+        time.sleep(0.01)
+
+
+def test_loads_once_and_hot_swaps_in_background(tmp_path):
+    path = tmp_path / 'model.joblib'
+    loads = []
+
+    def loader(p):
+        text = open(p).read()
+        if text == 'broken':
+            raise ValueError('truncated file')
+        loads.append(text)
+        return text.upper()
+
+    reg = ModelRegistry(str(path), keep=2, check_interval_s=0, loader=loader)
+    assert reg.current() is None  # nothing trained yet
+
+    _write(path, 'one', version='v1')
+    first = reg.current()
+    assert first.model == 'ONE' and first.version == 'v1' and first.load_s >= 0
+    for _ in range(20):
+        assert reg.current() is first
+    assert loads == ['one']
+
+    # a retrained artifact is loaded off the request path, then swapped in
+    _write(path, 'two', version='v2', bump=10)
+    assert reg.current().version in ('v1', 'v2')
+    _wait_for(lambda: reg.current().version == 'v2')
+    assert reg.current().model == 'TWO' and reg.info()['swaps'] == 1
+    assert reg.get('v1').model == 'ONE'  # previous version stays resident
+
+    # an unreadable artifact keeps serving the last good model
+    _write(path, 'broken', version='v3', bump=20)
+    reg.current()
+    _wait_for(lambda: reg.info()['failed_loads'] >= 1 and not reg.info()['reloading'])
+    assert reg.info()['current']['version'] == 'v2'
+
+    _write(path, 'three', version='v3', bump=30)
+    _wait_for(lambda: reg.current().version == 'v3')
+    assert [v['version'] for v in reg.versions()] == ['v2', 'v3']  # keep=2
+    with pytest.raises(KeyError):
+        reg.get('v1')
+
+
+def test_version_falls_back_to_mtime_and_checks_are_throttled(tmp_path):
+    path = tmp_path / 'model.joblib'
+    _write(path, 'one')
+    reg = ModelRegistry(str(path), check_interval_s=60, loader=lambda p: open(p).read())
+    loaded = reg.current()
+    assert loaded.version.startswith('mtime-')
+    _write(path, 'two', bump=10)
+    assert reg.current() is loaded  # not re-checked within the interval
@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from ml.forecast_table import ForecastTable, N_SLOTS, ParkingForecaster
+from ml.online import OnlineParkingModel
+
+NOW = datetime(2024, 3, 13, 9, 0)  # a Wednesday
+
+
+class _Flat:
+    """Stand-in model predicting 0.3 (std 0.05) everywhere."""
+
+    def predict_with_std(self, X):
+        return np.full(len(X), 0.3), np.full(len(X), 0.05)
+
+
+@pytest.fixture
+def base():
+    flat = _Flat()
+    return ParkingForecaster(flat, ForecastTable(np.full(N_SLOTS, 0.3), np.full(N_SLOTS, 0.05), []))
+
+
+def _occupancy(rows):
+    return [r['predicted_occupancy'] for r in rows]
+
+
+def test_without_readings_forecast_is_the_models(base):
+    online = OnlineParkingModel()
+    assert online.forecast(base, NOW, 6) == base.forecast(NOW, 6)
+
+
+def test_sudden_change_shows_up_in_the_next_forecast_and_fades(base):
+    online = OnlineParkingModel()
+    # the lot filled up over the last half hour (5-minute readings)
+    online.observe(base, [NOW - timedelta(minutes=5 * i) for i in range(6)], np.ones(6))
+    first, *later = _occupancy(online.forecast(base, NOW, 6))
+    assert first > 0.6
+    assert all(a > b > 0.3 for a, b in zip([first] + later, later))
+    # hours later without new readings the level has faded away
+    assert _occupancy(online.forecast(base, NOW + timedelta(hours=12), 1))[0] < 0.32
+
+
+def test_weekly_pattern_drifts_toward_readings_and_is_forgotten(base):
+    online = OnlineParkingModel(slot_half_life_s=7 * 86400.0)
+    weeks = [NOW - timedelta(days=7 * w) for w in range(8, 0, -1)]
+    for week in weeks:
+        online.observe(base, [week + timedelta(minutes=5 * i) for i in range(12)], np.full(12, 0.8))
+    # a week after the last readings the level is gone but the 09:00 Wednesday slot remembers
+    at_nine = _occupancy(online.forecast(base, NOW, 2))
+    assert 0.35 < at_nine[0] < 0.8 and at_nine[1] == pytest.approx(0.3)
+    # a year later it has decayed back to the model's forecast
+    assert _occupancy(online.forecast(base, NOW + timedelta(days=364), 1))[0] == pytest.approx(0.3, abs=1e-3)
+
+
+def test_micro_batches_match_one_reading_at_a_time(base):
+    rng = np.random.default_rng(0)
+    times = [NOW - timedelta(minutes=int(m)) for m in sorted(rng.integers(0, 600, 200), reverse=True)]
+    occ = rng.random(200)
+    one, batched = OnlineParkingModel(), OnlineParkingModel(max_batch=64)
+    for t, o in zip(times, occ):
+        one.observe(base, [t], [o])
+    batched.observe(base, times, occ)
+    assert batched.counters['updates'] == 4 and one.counters['updates'] == 200
+    np.testing.assert_allclose(batched.slot_sum, one.slot_sum, rtol=1e-9)
+    np.testing.assert_allclose(batched.slot_weight, one.slot_weight, rtol=1e-9)
+    np.testing.assert_allclose(_occupancy(batched.forecast(base, NOW, 3))[1:], _occupancy(one.forecast(base, NOW, 3))[1:],
+                               atol=0.02)  # the level is fitted per batch
+
+
+def test_invalid_readings_are_dropped(base):
+    online = OnlineParkingModel()
+    assert online.observe(base, [NOW, NOW, None, NOW], [0.5, float('nan'), 0.5, 0.5], [0, 0, 0, 2]) == 1
+    assert online.info()['dropped'] == 3 and online.info()['observations'] == 1
+
+
+def test_readings_from_the_future_are_dropped(base):
+    online = OnlineParkingModel()
+    far = NOW + timedelta(days=6 * 365)
+    assert online.observe(base, [far, NOW + timedelta(minutes=2)], [0.5, 0.5], now=NOW) == 1
+    assert online.info()['dropped'] == 1
+    # the clock didn't jump ahead, so current readings still move the forecast
+    online.observe(base, [NOW - timedelta(minutes=5 * i) for i in range(24)], np.zeros(24), now=NOW)
+    assert _occupancy(online.forecast(base, NOW, 1))[0] < 0.25
+
+
+def test_mock_server_observations_refresh_parking_forecast(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from api import mock_server
+    from ml import online as online_module
+
+    monkeypatch.setattr(mock_server, 'online_parking', lambda fresh=online_module.OnlineParkingModel(): fresh)
+    client = TestClient(mock_server.app)
+    before = client.get('/parking', params={'hours': 3}).json()['hours']
+    now = datetime.now()
+    readings = [{'occupancy': 1.0, 'timestamp': (now - timedelta(minutes=5 * i)).isoformat()} for i in range(12)]
+    resp = client.post('/parking/observations', json={'observations': readings})
+    assert resp.status_code == 200 and resp.json()['accepted'] == 12
+    after = client.get('/parking', params={'hours': 3}).json()['hours']
+    assert after[0]['predicted_occupancy'] > before[0]['predicted_occupancy']
+    assert client.get('/models/parking').json()['online']['observations'] == 12
+
+    # is_exam is a flag; anything else would land in a neighbouring hour's slot (or past the table)
+    sunday_night = datetime(2024, 3, 17, 23, 30).isoformat()
+    for flag in (2, -1):
+        bad = {'observations': [{'occupancy': 0.5, 'timestamp': sunday_night, 'is_exam': flag}]}
+        assert client.post('/parking/observations', json=bad).status_code == 422
+    future = {'observations': [{'occupancy': 0.5, 'timestamp': (now + timedelta(days=365)).isoformat()}]}
+    assert client.post('/parking/observations', json=future).json()['accepted'] == 0
+    assert client.get('/models/parking').json()['online']['observations'] == 12
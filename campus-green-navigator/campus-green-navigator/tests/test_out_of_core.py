@@ -0,0 +1,63 @@
+import warnings
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml import out_of_core
+from ml.features import time_feature_matrix
+from ml.parking_predictor import FEATURES, add_time_features, generate_synthetic_parking
+
+
+def _frames(n=4):
+    for i in range(n):
+        yield generate_synthetic_parking(days=14, seed=i, lots=3, start=datetime(2024, 1, 1) + timedelta(days=14 * i))
+
+
+def test_feature_matrix_matches_add_time_features():
+    df = add_time_features(generate_synthetic_parking(days=10))
+    X = time_feature_matrix(df['hour'], df['weekday'], df['is_weekend'], df['is_exam'])
+    np.testing.assert_array_equal(X, df[FEATURES].to_numpy())
+
+
+def test_reservoir_keeps_a_bounded_sample_per_stratum():
+    res = out_of_core.StratifiedReservoir(per_stratum=5, n_features=1, seed=0)
+    rng = np.random.default_rng(1)
+    for _ in range(10):
+        strata = rng.integers(0, 3, 1000)
+        res.add(strata[:, None].astype(np.float32), strata.astype(np.float32), strata)
+    assert res.seen == 10000 and len(res.y) == 15
+    assert np.bincount(res.strata).tolist() == [5, 5, 5]
+    np.testing.assert_array_equal(res.X[:, 0], res.y)  # rows stay aligned with their targets
+
+
+@pytest.mark.parametrize('fmt', ['npy', 'parquet'])
+def test_train_out_of_core_from_chunks(tmp_path, fmt):
+    if fmt == 'parquet':
+        pytest.importorskip('pyarrow')
+    writer = out_of_core.write_npy_chunks if fmt == 'npy' else out_of_core.write_parquet_chunks
+    writer(_frames(), str(tmp_path / 'chunks'))
+    if fmt == 'npy':
+        chunk = next(out_of_core.iter_chunks(str(tmp_path / 'chunks')))
+        assert isinstance(chunk['hour'], np.memmap)
+
+    info = out_of_core.train_out_of_core(str(tmp_path / 'chunks'), model_path=str(tmp_path / 'm.joblib'),
+                                         sample_size=3000)
+    assert info['rows'] == 4 * 14 * 24 * 3 and info['test_rows'] + info['train_rows'] == info['rows']
+    assert info['sample_rows'] <= 3000 and info['mae'] < 0.12
+    assert info['peak_mem_mb'] > 0 and (tmp_path / 'm.joblib.version').exists()
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')  # fitted with feature names, like train_model
+        info['model'].predict(pd.DataFrame(np.zeros((1, 6)), columns=FEATURES))
+
+
+def test_partial_fit_estimator(tmp_path):
+    from sklearn.linear_model import SGDRegressor
+
+    out_of_core.write_npy_chunks(_frames(2), str(tmp_path / 'chunks'))
+    info = out_of_core.train_out_of_core(str(tmp_path / 'chunks'), model_path=str(tmp_path / 'm.joblib'),
+                                         estimator=SGDRegressor(random_state=0), track_memory=False)
+    assert info['sample_rows'] == info['train_rows'] and np.isfinite(info['mae'])
+    with pytest.raises(ValueError):
+        out_of_core.train_out_of_core(str(tmp_path / 'chunks'), estimator=object())
@@ -0,0 +1,51 @@
+import itertools
+import random
+
+from data import campus_data
+from routing.graph import RoutingGraph
+from routing.pareto import find_pareto_routes, pareto_routes
+from utils.helpers import calculate_co2_grams
+
+
+def _brute_force_frontier(g, s, t, vehicle):
+    points = set()
+
+    def walk(node, seen, edges):
+        if node == t:
+            for profiles in itertools.product(('fast', 'eco'), repeat=len(edges)):
+                time = sum(g.edges[e][2][p]['time_min'] for e, p in zip(edges, profiles))
+                co2 = sum(calculate_co2_grams(vehicle, g.edges[e][2][p]['distance_km']) for e, p in zip(edges, profiles))
+                points.add((round(time, 6), round(co2, 6)))
+            return
+        for v, eid in g.adj[node]:
+            if v not in seen:
+                walk(v, seen | {v}, edges + [eid])
+
+    walk(s, {s}, [])
+    return sorted(p for p in points if not any(q != p and q[0] <= p[0] and q[1] <= p[1] for q in points))
+
+
+def test_frontier_matches_brute_force():
+    rnd = random.Random(5)
+    n = 8
+    locations = {f'n{i}': {'lat': 12.9 + rnd.random() * 0.01, 'lon': 77.5 + rnd.random() * 0.01} for i in range(n)}
+    routes = []
+    for a, b in rnd.sample(list(itertools.combinations(range(n), 2)), 13):
+        routes.append({'from': f'n{a}', 'to': f'n{b}',
+                       'fast': {'distance_km': round(rnd.uniform(0.5, 2), 2), 'time_min': rnd.randint(2, 6)},
+                       'eco': {'distance_km': round(rnd.uniform(0.3, 1.5), 2), 'time_min': rnd.randint(4, 10)}})
+    g = RoutingGraph(locations, routes)
+    for s, t in [(0, 7), (1, 6), (2, 5)]:
+        got = [(round(r['time_min'], 6), round(r['co2_g'], 6)) for r in pareto_routes(g, s, t, 'Car')]
+        assert got == _brute_force_frontier(g, s, t, 'Car')
+
+
+def test_campus_frontier_ends_at_fastest_and_zero_emission_collapses():
+    out = find_pareto_routes('Main Gate', 'Library', 'Car', RoutingGraph.from_campus_data(campus_data))
+    routes = out['routes']
+    assert routes[0]['time_min'] == 4
+    assert [r['time_min'] for r in routes] == sorted(r['time_min'] for r in routes)
+    assert [r['co2_g'] for r in routes] == sorted((r['co2_g'] for r in routes), reverse=True)
+    # walking emits nothing, so the fastest route is also the greenest
+    walk = find_pareto_routes('Main Gate', 'Library', 'Walk', RoutingGraph.from_campus_data(campus_data))
+    assert len(walk['routes']) == 1
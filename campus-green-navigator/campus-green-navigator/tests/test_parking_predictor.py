@@ -23,3 +23,56 @@ def test_generate_and_train(tmp_path):
     assert isinstance(info, dict)
     assert 'model_path' in info
     assert os.path.exists(str(model_file))
+
+
+def _reference_generate(days, seed, start):
+    """The original row-by-row generator, kept to pin the vectorized output."""
+    import numpy as np
+    import pandas as pd
+    from datetime import timedelta
+
+    rng = np.random.default_rng(seed)
+    rows = []
+    for d in range(days):
+        date = start + timedelta(days=d)
+        is_exam = (d % 30) in (10, 11, 12)
+        for h in range(24):
+            dt = date + timedelta(hours=h)
+            base = 0.2
+            if 8 <= h <= 10 or 14 <= h <= 16:
+                base += 0.5
+            if h < 6 or h >= 22:
+                base -= 0.15
+            if dt.weekday() >= 5:
+                base -= 0.25
+            if is_exam:
+                base -= 0.4
+            occ = np.clip(base + rng.normal(0, 0.05), 0.0, 1.0)
+            rows.append({"datetime": dt, "hour": h, "weekday": dt.weekday(), "is_weekend": int(dt.weekday() >= 5),
+                         "is_exam": int(is_exam), "occupancy": occ})
+    return pd.DataFrame(rows)
+
+
+def test_vectorized_generator_matches_row_by_row_output():
+    import pandas as pd
+    from datetime import datetime
+
+    mod = _load_parking_module()
+    start = datetime(2024, 3, 1)
+    for days, seed in ((30, 42), (45, 7)):
+        expected = _reference_generate(days, seed, start)
+        pd.testing.assert_frame_equal(mod.generate_synthetic_parking(days=days, seed=seed, start=start), expected,
+                                      check_exact=True)
+
+
+def test_generator_lots_and_resolution():
+    import pandas as pd
+    from datetime import datetime
+
+    mod = _load_parking_module()
+    df = mod.generate_synthetic_parking(days=2, lots=3, resolution_min=15, start=datetime(2024, 3, 2), compact=True)
+    assert len(df) == 2 * 96 * 3
+    assert list(df['lot'][:4]) == [0, 1, 2, 0]
+    assert df['datetime'].iloc[3] - df['datetime'].iloc[0] == pd.Timedelta(minutes=15)
+    assert df['hour'].max() == 23 and df['is_weekend'].all()  # Sat 2 and Sun 3 March 2024
+    assert df['occupancy'].between(0, 1).all() and str(df['occupancy'].dtype) == 'float32'
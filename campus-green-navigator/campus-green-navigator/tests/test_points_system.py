@@ -70,3 +70,32 @@ def test_add_and_redeem_flow():
     ok2, msg2 = mod.redeem_reward('Nonexistent')
     assert ok2 is False
     assert msg2 == 'Invalid reward.'
+
+
+def test_points_array_matches_scalar_including_ties():
+    import numpy as np
+    import pandas as pd
+    mod = _load_points_module()
+    rng = np.random.default_rng(1)
+    savings = np.concatenate([rng.uniform(0, 50000, 2000), [2250.0, 2750.0, 7250.0, 12500.0]])  # x.5 raw values
+    minutes = np.concatenate([rng.integers(0, 5, 2000).astype(float), [0.0, 0.0, 0.0, 0.5]])
+    df = pd.DataFrame({'savings': savings, 'extra': minutes})
+    out = mod.calculate_points_array(df['savings'], df['extra'])
+    assert out.tolist() == [mod.calculate_points(s, m) for s, m in zip(savings.tolist(), minutes.tolist())]
+
+
+def test_points_array_rejects_non_finite_inputs():
+    import pytest
+    mod = _load_points_module()
+    for bad in (float('nan'), float('inf'), -float('inf')):
+        with pytest.raises(ValueError, match='co2_savings_g must be finite'):
+            mod.calculate_points_array([1000.0, bad], [0, 0])
+        with pytest.raises(ValueError, match='extra_minutes must be finite'):
+            mod.calculate_points_array([1000.0, 1000.0], [0, bad])
+
+
+def test_score_trips():
+    mod = _load_points_module()
+    out = mod.score_trips(['Car', 'Bike'], [1.0, 1.0], [0.5, 0.5], [0, 0])
+    assert out['co2_savings_g'].tolist() == [60.0, 0.0]
+    assert out['points'].tolist() == [10, 10]
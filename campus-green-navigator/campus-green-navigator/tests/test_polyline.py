@@ -0,0 +1,25 @@
+import numpy as np
+
+from utils.polyline import decode, encode, encode_levels, simplify
+
+
+def test_encode_matches_reference_and_round_trips():
+    pts = [(38.5, -120.2), (40.7, -120.95), (43.252, -126.453)]
+    assert encode(pts) == '_p~iF~ps|U_ulLnnqC_mqNvxq`@'
+    assert decode(encode(pts)) == [list(p) for p in pts]
+    assert encode([]) == '' and decode('') == []
+
+
+def test_simplify_keeps_shape_within_tolerance():
+    # a dense, gently wiggling line ~1.1 km long
+    lon = np.linspace(77.59, 77.60, 2000)
+    lat = 12.97 + 0.00001 * np.sin(np.linspace(0, 20, 2000))
+    pts = np.column_stack((lat, lon))
+    coarse = simplify(pts, 5.0)
+    assert len(coarse) < 50
+    assert coarse[0].tolist() == pts[0].tolist() and coarse[-1].tolist() == pts[-1].tolist()
+    assert len(simplify(pts, 0.0)) == len(pts)
+    levels = encode_levels(pts)
+    assert list(levels) == ['12', '14', '16', '18']
+    assert len(levels['12']) <= len(levels['16']) <= len(levels['18'])
+    assert len(decode(levels['18'])) == len(pts)
@@ -0,0 +1,87 @@
+import time
+
+from api import client
+from api.cache import TieredCache
+
+
+def test_lru_ttl_and_persistence(tmp_path):
+    db = str(tmp_path / 'cache.sqlite3')
+    cache = TieredCache('routes', db_path=db, max_entries=2, ttl_s=60)
+    for k in ('a', 'b', 'c'):
+        cache.set(k, {'v': k})
+    assert cache.stats()['evictions'] == 1 and cache.stats()['memory_entries'] == 2
+    # 'a' fell out of memory but is still on disk, and is promoted back
+    assert cache.get('a') == {'v': 'a'}
+    assert cache.get('a') == {'v': 'a'}
+    assert cache.counters['disk_hits'] == 1 and cache.counters['memory_hits'] == 1
+
+    cache.set('short', 1, ttl_s=0.05)
+    time.sleep(0.1)
+    assert cache.get('short') is None and cache.counters['expired'] >= 1
+
+    # a second process (fresh instance) sees the same store
+    other = TieredCache('routes', db_path=db, max_entries=2, ttl_s=60)
+    assert other.get('c') == {'v': 'c'}
+    other.invalidate('c')
+    assert TieredCache('routes', db_path=db).get('c') is None
+    other.clear()
+    assert TieredCache('routes', db_path=db).get('a') is None
+
+
+def test_get_route_is_cached_per_normalized_pair(tmp_path, monkeypatch):
+    cache = TieredCache('routes', db_path=str(tmp_path / 'cache.sqlite3'), dumps=client._route_to_json, loads=client._route_from_json)
+    monkeypatch.setattr(client, 'route_cache', cache)
+    calls = []
+
+    async def fake_fetch(start, end, depart):
+        calls.append((start, end))
+        return client._local_route(start, end), 'backend'
+
+    monkeypatch.setattr(client, '_fetch_route', fake_fetch)
+    first = client.get_route('Main Gate', 'Library')
+    again = client.get_route('  main   gate', 'LIBRARY')
+    assert calls == [('Main Gate', 'Library')]
+    assert again['from_loc'] == '  main   gate' and again['fast']['geometry'] == first['fast']['geometry']
+
+    # a restarted process reads the route (geometry included) back from SQLite
+    cache._mem.clear()
+    assert client.get_route('Main Gate', 'Library')['fast']['geometry'] == first['fast']['geometry']
+    assert cache.counters['disk_hits'] == 1
+
+    client.invalidate_route_cache('Main Gate', 'Library')
+    client.get_route('Main Gate', 'Library')
+    assert len(calls) == 2
+
+
+def test_cache_io_and_local_routing_run_off_the_event_loop(tmp_path, monkeypatch):
+    import threading
+
+    threads = {}
+
+    class _Cache(TieredCache):
+        def get(self, key):
+            threads['cache.get'] = threading.current_thread()
+            return super().get(key)
+
+        def set(self, key, value, ttl_s=None):
+            threads['cache.set'] = threading.current_thread()
+            return super().set(key, value, ttl_s=ttl_s)
+
+    def local_route(start, end, depart=None):
+        threads['local'] = threading.current_thread()
+        return {'from_loc': start, 'to_loc': end}
+
+    async def loop_thread():
+        return threading.current_thread()
+
+    async def unreachable(*args, **kwargs):
+        raise ConnectionError('backend down')
+
+    monkeypatch.delenv('MAPMYINDIA_CLIENT_ID', raising=False)
+    monkeypatch.setattr(client, 'route_cache', _Cache('routes', db_path=str(tmp_path / 'cache.sqlite3')))
+    monkeypatch.setattr(client, '_local_route', local_route)
+    monkeypatch.setattr(client.http_pool, 'async_get', unreachable)
+    assert client.get_route('Main Gate', 'Library')['source'] == 'local'
+    loop = client.http_pool.run_sync(loop_thread())
+    assert set(threads) == {'cache.get', 'cache.set', 'local'}
+    assert all(t is not loop for t in threads.values())
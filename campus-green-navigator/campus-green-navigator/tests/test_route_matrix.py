@@ -0,0 +1,88 @@
+import copy
+import types
+
+import numpy as np
+
+from data import campus_data
+from routing.graph import RoutingGraph
+from routing.matrix import RouteMatrix, build_route_matrix, load_or_build
+
+
+def _data_copy():
+    return types.SimpleNamespace(
+        LOCATIONS=copy.deepcopy(campus_data.LOCATIONS),
+        ROUTES=copy.deepcopy(campus_data.ROUTES),
+        EMISSION_FACTORS_G_PER_KM=dict(campus_data.EMISSION_FACTORS_G_PER_KM),
+    )
+
+
+def test_matrix_matches_graph_routes(tmp_path):
+    data = _data_copy()
+    graph = RoutingGraph.from_campus_data(data)
+    build_route_matrix(data).save(str(tmp_path / 'm'))
+    m = RouteMatrix.load(str(tmp_path / 'm'))
+    assert isinstance(m.arrays['fast']['distance_km'], np.memmap)
+    for start in data.LOCATIONS:
+        for end in data.LOCATIONS:
+            assert m.route(start, end) == graph.route(start, end)
+    r = data.ROUTES[0]
+    assert m.co2_grams(r['from'], r['to'], 'Car') == 120.0 * r['fast']['distance_km']
+    assert m.route('Main Gate', 'Nowhere') is None
+
+
+def test_load_or_build_rebuilds_when_data_changes(tmp_path):
+    path = str(tmp_path / 'm')
+    data = _data_copy()
+    first = load_or_build(path, data)
+    assert load_or_build(path, data).fingerprint == first.fingerprint
+
+    data.ROUTES[0]['fast']['time_min'] = 99
+    rebuilt = load_or_build(path, data)
+    assert rebuilt.fingerprint != first.fingerprint
+    # Main Gate -> Library now detours through the Hostel Complex (6 + 5 min)
+    reloaded = RouteMatrix.load(path)
+    assert reloaded.fingerprint == rebuilt.fingerprint
+    assert reloaded.route('Main Gate', 'Library')['fast']['time_min'] == 11
+    assert reloaded.route('Main Gate', 'Library')['fast']['path'] == ['Main Gate', 'Hostel Complex', 'Library']
+
+
+def test_lookup_batch_matches_single_lookups():
+    data = _data_copy()
+    m = build_route_matrix(data)
+    names = list(data.LOCATIONS)
+    starts = [a for a in names for b in names] + ['Main Gate', 'Nowhere']
+    ends = [b for a in names for b in names] + ['Library', 'Library']
+    vehicles = ['Car', 'EV', 'Bike', 'Walk'] * len(names) + ['Scooter', 'Car']
+    cols = m.lookup_batch(starts, ends, vehicles)
+    assert cols['found'].tolist() == [True] * (len(starts) - 1) + [False]
+    for k in range(len(starts) - 1):
+        single = m.route(starts[k], ends[k])
+        assert cols['fast_distance_km'][k] == single['fast']['distance_km']
+        assert cols['eco_time_min'][k] == single['eco']['time_min']
+        assert cols['fast_co2_g'][k] == m.co2_grams(starts[k], ends[k], vehicles[k])
+    # unknown vehicle types use the default emission factor
+    assert cols['fast_co2_g'][-2] == 120.0 * cols['fast_distance_km'][-2]
+
+
+def test_lookup_batch_unknown_names_are_nan_in_every_column():
+    m = build_route_matrix(_data_copy())
+    cols = m.lookup_batch(['Nowhere', 'Main Gate', 'Nowhere'], ['Library', 'Nowhere', 'Nowhere'], ['Car', 'Scooter', 'EV'])
+    assert cols['found'].tolist() == [False, False, False]
+    for name, col in cols.items():
+        if name != 'found':
+            assert np.isnan(col).all(), name
+
+
+def test_save_swaps_versions_without_removing_the_matrix(tmp_path):
+    path = tmp_path / 'm'
+    m = build_route_matrix(campus_data)
+    for _ in range(3):
+        reader = RouteMatrix.load(str(path)) if path.exists() else None
+        m.save(str(path))
+        assert path.is_symlink() and (path / 'meta.json').exists()
+        if reader is not None:
+            # a matrix opened before the save keeps reading its own version
+            assert reader.route('Main Gate', 'Library') is not None
+    # the current version and the one before it are kept
+    assert len([p for p in tmp_path.iterdir() if p.name.startswith('.m-')]) == 2
+    assert RouteMatrix.load(str(path)).fingerprint == m.fingerprint
@@ -0,0 +1,61 @@
+import random
+
+from data import campus_data
+from routing.graph import RoutingGraph, haversine_km
+
+
+def test_direct_pairs_match_campus_routes():
+    g = RoutingGraph.from_campus_data(campus_data)
+    for r in campus_data.ROUTES:
+        for start, end in ((r['from'], r['to']), (r['to'], r['from'])):
+            out = g.route(start, end)
+            assert out['from_loc'] == start and out['to_loc'] == end
+            assert out['fast']['distance_km'] == r['fast']['distance_km']
+            assert out['fast']['time_min'] == r['fast']['time_min']
+            assert out['eco']['distance_km'] == r['eco']['distance_km']
+            # geometry is oriented start -> end
+            loc = campus_data.LOCATIONS[start]
+            assert out['fast']['geometry'][0] == (loc['lat'], loc['lon'])
+
+
+def test_multi_hop_route_and_unknown_location():
+    locations = {
+        'A': {'lat': 12.970, 'lon': 77.590},
+        'B': {'lat': 12.971, 'lon': 77.591},
+        'C': {'lat': 12.972, 'lon': 77.592},
+    }
+    routes = [
+        {'from': 'A', 'to': 'B', 'fast': {'distance_km': 0.5, 'time_min': 2}, 'eco': {'distance_km': 0.4, 'time_min': 3}},
+        {'from': 'B', 'to': 'C', 'fast': {'distance_km': 0.5, 'time_min': 2}, 'eco': {'distance_km': 0.6, 'time_min': 3}},
+    ]
+    g = RoutingGraph(locations, routes)
+    out = g.route('A', 'C')
+    assert out['fast']['path'] == ['A', 'B', 'C']
+    assert out['fast']['time_min'] == 4
+    assert out['eco']['distance_km'] == 1.0
+    assert g.route('A', 'Nowhere') is None
+
+
+def test_astar_matches_dijkstra_on_random_graph():
+    rnd = random.Random(7)
+    n = 60
+    locations = {f'n{i}': {'lat': 12.9 + rnd.random() * 0.05, 'lon': 77.5 + rnd.random() * 0.05} for i in range(n)}
+    routes = []
+    for i in range(n * 3):
+        a, b = rnd.sample(range(n), 2)
+        la, lb = locations[f'n{a}'], locations[f'n{b}']
+        km = haversine_km(la['lat'], la['lon'], lb['lat'], lb['lon']) * (1 + rnd.random())
+        routes.append({'from': f'n{a}', 'to': f'n{b}',
+                       'fast': {'distance_km': km, 'time_min': km * 3},
+                       'eco': {'distance_km': km * 1.1, 'time_min': km * 4}})
+    g = RoutingGraph(locations, routes)
+    plain = RoutingGraph(locations, routes)
+    plain._h_scale = {k: 0.0 for k in plain._h_scale}  # degrade A* to Dijkstra
+    for _ in range(50):
+        s, t = rnd.sample(range(n), 2)
+        for metric in ('fast', 'eco'):
+            a = g.shortest_path(s, t, metric)
+            b = plain.shortest_path(s, t, metric)
+            assert (a is None) == (b is None)
+            if a is not None:
+                assert abs(a[0] - b[0]) < 1e-9
@@ -0,0 +1,65 @@
+import threading
+import time
+
+from api import client
+from api.singleflight import SingleFlight
+
+
+def _run_threads(n, target):
+    out = []
+    threads = [threading.Thread(target=lambda: out.append(target())) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return out
+
+
+def test_concurrent_identical_calls_share_one_result():
+    flights = SingleFlight('test')
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.2)
+        return {'ok': True}
+
+    out = _run_threads(10, lambda: flights.do('k', slow))
+    assert len(calls) == 1 and out == [{'ok': True}] * 10
+    assert flights.stats() == {'calls': 10, 'collapsed': 9, 'in_flight': 0}
+    # nothing is kept once the call completes
+    flights.do('k', slow)
+    assert len(calls) == 2
+
+
+def test_client_get_route_coalesces_upstream_calls(monkeypatch):
+    calls = []
+
+    async def slow_fetch(start, end, depart):
+        import asyncio
+        calls.append((start, end))
+        await asyncio.sleep(0.2)
+        return client._local_route(start, end), 'local'
+
+    monkeypatch.setattr(client, '_fetch_route', slow_fetch)
+    monkeypatch.setattr(client, 'route_flights', SingleFlight('client.route.test'))
+    out = _run_threads(8, lambda: client.get_route('Main Gate', 'Library', use_cache=False))
+    assert len(calls) == 1 and len(out) == 8
+    assert len({id(r) for r in out}) == 8  # callers get their own dicts
+    assert client.route_flights.stats()['collapsed'] == 7
+
+
+def test_mock_server_parking_coalesces_model_runs(monkeypatch):
+    from api import mock_server
+
+    runs = []
+
+    def slow_forecast(hours, model_version=None):
+        runs.append(hours)
+        time.sleep(0.2)
+        return {'hours': []}
+
+    monkeypatch.setattr(mock_server, '_parking_forecast', slow_forecast)
+    out = _run_threads(6, lambda: mock_server.get_parking(hours=6))
+    assert runs == [6] and out == [{'hours': []}] * 6
+    assert mock_server.coalescing_stats()['server.parking']['collapsed'] >= 5
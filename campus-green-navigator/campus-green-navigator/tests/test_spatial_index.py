@@ -0,0 +1,46 @@
+import random
+
+import numpy as np
+
+from routing.spatial import SpatialIndex, haversine_km_vec, parse_latlon, resolve_location
+
+
+def _random_index(seed=0, n=2000):
+    rnd = random.Random(seed)
+    lats = [12.95 + rnd.random() * 0.05 for _ in range(n)]
+    lons = [77.57 + rnd.random() * 0.05 for _ in range(n)]
+    segments = [(i, rnd.randrange(n)) for i in range(0, n, 2)]
+    segments = [(a, b) for a, b in segments if a != b]
+    return SpatialIndex([f'p{i}' for i in range(n)], lats, lons, segments), np.array(lats), np.array(lons)
+
+
+def test_nearest_node_matches_linear_scan():
+    idx, lats, lons = _random_index()
+    rnd = random.Random(1)
+    # on campus, at the edge and far away (falls back to scanning every bucket)
+    queries = [(12.95 + rnd.random() * 0.05, 77.57 + rnd.random() * 0.05) for _ in range(200)]
+    queries += [(12.94, 77.56), (13.5, 78.0)]
+    for lat, lon in queries:
+        d = haversine_km_vec(lat, lon, lats, lons)
+        name, dist = idx.nearest_node(lat, lon)
+        assert abs(dist - d.min()) < 1e-12
+
+
+def test_nearest_segment_snaps_onto_segment():
+    idx = SpatialIndex(['A', 'B', 'C'], [12.970, 12.970, 12.980], [77.590, 77.600, 77.600], [(0, 1), (1, 2)])
+    a, b, frac, (lat, lon), dist = idx.nearest_segment(12.9705, 77.595)
+    assert (a, b) == ('A', 'B')
+    assert abs(frac - 0.5) < 1e-6
+    assert abs(lat - 12.970) < 1e-9 and abs(lon - 77.595) < 1e-6
+    assert dist < 0.06
+
+
+def test_resolve_location_snaps_raw_coordinates():
+    assert parse_latlon('100.5, 12.9716') == (12.9716, 100.5)
+    assert parse_latlon('Library') is None
+    for bad in ('nan,nan', 'inf,77', '12.97,-inf', '95,200', '12.97,181'):
+        assert parse_latlon(bad) is None
+        assert resolve_location(bad) is None
+    assert resolve_location('Library') == 'Library'
+    assert resolve_location('12.97212,77.59502') == 'Library'
+    assert resolve_location('28.6,77.2') is None
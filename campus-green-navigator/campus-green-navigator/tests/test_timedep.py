@@ -0,0 +1,92 @@
+import itertools
+import random
+from datetime import datetime
+
+from data import campus_data
+from routing.graph import RoutingGraph
+from routing.timedep import TimeDependentRouter, week_minute
+
+
+def _random_graph(seed):
+    rnd = random.Random(seed)
+    n = 8
+    locations = {f'n{i}': {'lat': 12.9 + rnd.random() * 0.01, 'lon': 77.5 + rnd.random() * 0.01} for i in range(n)}
+    routes = []
+    for a, b in rnd.sample(list(itertools.combinations(range(n), 2)), 14):
+        fast = {'distance_km': 1.0, 'time_min': rnd.randint(2, 9)}
+        if rnd.random() < 0.5:
+            # some segments jam much harder than the campus-wide curve
+            fast['hourly_factor'] = [rnd.uniform(1.0, 4.0) for _ in range(24)]
+        routes.append({'from': f'n{a}', 'to': f'n{b}', 'fast': fast, 'eco': {'distance_km': 1.0, 'time_min': 10}})
+    return RoutingGraph(locations, routes)
+
+
+def test_td_dijkstra_matches_brute_force():
+    g = _random_graph(3)
+    router = TimeDependentRouter(g)
+
+    def best(s, t, depart):
+        out = float('inf')
+
+        def walk(node, seen, edges):
+            nonlocal out
+            if node == t:
+                out = min(out, router.path_minutes('fast', edges, depart))
+                return
+            for v, eid in g.adj[node]:
+                if v not in seen:
+                    walk(v, seen | {v}, edges + [eid])
+
+        walk(s, {s}, [])
+        return out
+
+    for depart in (0.0, 8 * 60 + 40, 2 * 1440 + 14 * 60 + 55, 6 * 1440 + 23 * 60 + 59):
+        for s, t in [(0, 7), (1, 6), (2, 5)]:
+            found = router.shortest_path(s, t, depart)
+            assert abs(found[0] - best(s, t, depart)) < 1e-6
+            assert abs(found[0] - router.path_minutes('fast', found[2], depart)) < 1e-6
+
+
+def test_profiles_are_fifo_and_peaks_are_slower():
+    router = TimeDependentRouter(RoutingGraph.from_campus_data(campus_data))
+    for eid in range(len(router.graph.edges)):
+        arrivals = [t + router.edge_minutes('fast', eid, t) for t in range(0, 10080, 7)]
+        assert all(b >= a for a, b in zip(arrivals, arrivals[1:]))
+    peak = router.route('Main Gate', 'Library', datetime(2026, 10, 12, 9, 30))
+    night = router.route('Main Gate', 'Library', datetime(2026, 10, 12, 3, 30))
+    assert peak['fast']['time_min'] > night['fast']['time_min']
+    assert peak['eco']['time_min'] - night['eco']['time_min'] < peak['fast']['time_min'] - night['fast']['time_min']
+
+
+def test_departure_bucket_cache():
+    router = TimeDependentRouter(RoutingGraph.from_campus_data(campus_data), bucket_min=15, max_buckets=2)
+    router.route('Main Gate', 'Library', datetime(2026, 10, 12, 9, 1))
+    router.route('Main Gate', 'Library', datetime(2026, 10, 12, 9, 14))
+    assert (router.hits, router.misses) == (1, 1)
+    router.route('Main Gate', 'Library', datetime(2026, 10, 12, 10, 0))
+    router.route('Main Gate', 'Library', datetime(2026, 10, 12, 11, 0))
+    assert len(router._trees) == 2
+    assert router.bucket_of(week_minute(datetime(2026, 10, 12, 9, 14))) == 36
+
+
+def test_bucket_cache_is_thread_safe():
+    from concurrent.futures import ThreadPoolExecutor
+
+    router = TimeDependentRouter(RoutingGraph.from_campus_data(campus_data), bucket_min=15, max_buckets=3)
+    departures = [datetime(2026, 10, 12, 8 + i % 6, (i * 7) % 60) for i in range(300)]
+    with ThreadPoolExecutor(8) as pool:
+        routes = list(pool.map(lambda t: router.route('Main Gate', 'Library', t), departures))
+    assert all(r is not None for r in routes)
+    assert router.hits + router.misses == len(departures) and len(router._trees) <= 3
+
+
+def test_mock_server_builds_router_and_matrix_at_startup(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from api import mock_server
+
+    built = []
+    monkeypatch.setattr(mock_server, 'get_route_matrix', lambda: built.append('matrix'))
+    monkeypatch.setattr(mock_server, 'campus_td_router', lambda: built.append('router'))
+    with TestClient(mock_server.app):
+        assert built == ['matrix', 'router']
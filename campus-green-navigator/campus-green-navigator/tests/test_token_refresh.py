@@ -0,0 +1,76 @@
+import importlib.util
+import threading
+import time
+from pathlib import Path
+
+
+def _load_mapmy_module():
+    root = Path(__file__).resolve().parents[1]
+    spec = importlib.util.spec_from_file_location('api.mapmyindia', str(root / 'api' / 'mapmyindia.py'))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+class _Resp:
+    def __init__(self, j):
+        self._j = j
+
+    def raise_for_status(self):
+        return None
+
+    def json(self):
+        return self._j
+
+
+def _setup(monkeypatch, expires_in=3600):
+    mod = _load_mapmy_module()
+    posts = []
+
+    def fake_post(url, **kwargs):
+        posts.append(url)
+        time.sleep(0.1)
+        return _Resp({'access_token': f'tok-{len(posts)}', 'expires_in': expires_in})
+
+    monkeypatch.setenv('MAPMYINDIA_CLIENT_ID', 'dummy_id')
+    monkeypatch.setenv('MAPMYINDIA_CLIENT_SECRET', 'dummy_secret')
+    monkeypatch.setattr(mod.http_pool, 'post', fake_post)
+    return mod, posts
+
+
+def test_concurrent_callers_share_one_refresh(monkeypatch):
+    mod, posts = _setup(monkeypatch)
+    tokens = []
+    threads = [threading.Thread(target=lambda: tokens.append(mod.fetch_token())) for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert posts == [mod.TOKEN_URL] and tokens == ['tok-1'] * 10
+
+
+def test_token_is_renewed_in_the_background_before_expiry(monkeypatch):
+    mod, posts = _setup(monkeypatch)
+    assert mod.fetch_token() == 'tok-1'
+    timer = mod._renew_timer
+    assert 3600 - mod.TOKEN_RENEW_BEFORE_S - 5 < timer.interval <= 3600 - mod.TOKEN_RENEW_BEFORE_S
+    timer.cancel()
+    # fire the renewal now: callers keep getting the current token without waiting
+    mod._renew_in_background()
+    t0 = time.perf_counter()
+    assert mod.fetch_token() == 'tok-1' and time.perf_counter() - t0 < 0.05
+    time.sleep(0.2)
+    assert len(posts) == 2 and mod.fetch_token() == 'tok-2'
+    mod._renew_timer.cancel()
+
+
+def test_workers_share_token_through_store(tmp_path, monkeypatch):
+    mod, posts = _setup(monkeypatch)
+    monkeypatch.setattr(mod, 'TOKEN_STORE', str(tmp_path / 'token.json'))
+    assert mod.fetch_token() == 'tok-1'
+    # a second worker process starts with an empty in-memory token
+    other, other_posts = _setup(monkeypatch)
+    monkeypatch.setattr(other, 'TOKEN_STORE', str(tmp_path / 'token.json'))
+    assert other.fetch_token() == 'tok-1' and other_posts == []
+    mod._renew_timer.cancel()
+    other._renew_timer.cancel()
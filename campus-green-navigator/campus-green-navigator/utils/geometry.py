@@ -0,0 +1,118 @@
+# utils/geometry.py
+"""Compact route geometry backed by one contiguous float64 array.
+
+Parsers build a :class:`Geometry` straight from provider coordinates and it is
+passed through the client and the app without per-point copies. It is turned
+into JSON lists or an encoded polyline only at the edge (API responses, the
+map payload).
+
+Keep this module import-safe (no Streamlit) so tests and the API can use it.
+"""
+from typing import Any, Iterable, Iterator, List, Sequence, Tuple, Union
+
+import numpy as np
+
+from utils.polyline import decode, encode
+
+
+class Geometry:
+    """Polyline of ``(lat, lon)`` points stored as an ``(n, 2)`` float64 array.
+
+    Indexing returns ``(lat, lon)`` tuples (slices return a Geometry view), so
+    code written against the old list-of-pairs form keeps working.
+    """
+
+    __slots__ = ("coords",)
+
+    def __init__(self, coords: Any = ()):
+        # np.asarray/reshape don't copy when handed a float64 (n, 2) array or view
+        self.coords: np.ndarray = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+
+    @classmethod
+    def from_lonlat(cls, coords: Sequence[Sequence[float]]) -> "Geometry":
+        """Build from GeoJSON-ordered ``[lon, lat]`` positions (one array allocation).
+
+        Positions may carry an altitude (``[lon, lat, alt]``); it is dropped.
+        """
+        arr = np.asarray(coords, dtype=np.float64)
+        if arr.size == 0:
+            return cls()
+        return cls(np.ascontiguousarray(arr[:, 1::-1]))
+
+    @classmethod
+    def from_polyline(cls, encoded: str) -> "Geometry":
+        return cls(decode(encoded))
+
+    @classmethod
+    def concat(cls, parts: Iterable["Geometry"]) -> "Geometry":
+        """Join geometries end to end in a single allocation."""
+        arrays = [p.coords for p in parts if len(p)]
+        if not arrays:
+            return cls()
+        return cls(np.concatenate(arrays))
+
+    def __len__(self) -> int:
+        return self.coords.shape[0]
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __getitem__(self, i: Union[int, slice]) -> Any:
+        if isinstance(i, slice):
+            return Geometry(self.coords[i])
+        lat, lon = self.coords[i]
+        return float(lat), float(lon)
+
+    def __iter__(self) -> Iterator[Tuple[float, float]]:
+        return (tuple(p) for p in self.coords.tolist())
+
+    def __array__(self, dtype: Any = None, copy: Any = None) -> np.ndarray:
+        return self.coords if dtype is None else self.coords.astype(dtype)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, Geometry):
+            return np.array_equal(self.coords, other.coords)
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"Geometry({len(self)} points)"
+
+    @property
+    def nbytes(self) -> int:
+        return self.coords.nbytes
+
+    def to_list(self) -> List[List[float]]:
+        """``[[lat, lon], ...]`` for JSON responses."""
+        return self.coords.tolist()
+
+    def encode(self) -> str:
+        """Encoded-polyline string for JSON responses and the map payload."""
+        return encode(self.coords)
+
+
+def as_geometry(value: Any) -> Geometry:
+    """Coerce a Geometry, an encoded polyline or a list of ``[lat, lon]`` pairs."""
+    if isinstance(value, Geometry):
+        return value
+    if isinstance(value, str):
+        return Geometry.from_polyline(value)
+    if value is None:
+        return Geometry()
+    return Geometry([(float(p[0]), float(p[1])) for p in value])
+
+
+def jsonable_route(obj: Any, geometry_format: str = "coords") -> Any:
+    """Copy of a route payload with every Geometry serialized for JSON.
+
+    ``geometry_format`` is ``"coords"`` (``[[lat, lon], ...]``) or
+    ``"polyline"`` (encoded string).
+    """
+    if isinstance(obj, Geometry):
+        return obj.encode() if geometry_format == "polyline" else obj.to_list()
+    if isinstance(obj, dict):
+        return {k: jsonable_route(v, geometry_format) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [jsonable_route(v, geometry_format) for v in obj]
+    return obj
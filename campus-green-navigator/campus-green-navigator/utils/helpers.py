@@ -3,8 +3,18 @@
 
 Keep these functions import-safe (no Streamlit) so tests can import them.
 """
+import numpy as np
+
 from data.campus_data import EMISSION_FACTORS_G_PER_KM
 
+DEFAULT_EMISSION_FACTOR_G_PER_KM = 120.0
+
+
+def require_finite(name: str, values) -> None:
+    """Raise ValueError if any of ``values`` (a number or an array) is NaN or infinite."""
+    if not np.isfinite(np.asarray(values, dtype=np.float64)).all():
+        raise ValueError(f"{name} must be finite")
+
 
 def calculate_co2_grams(vehicle_type: str, distance_km: float) -> float:
     """Return grams of CO2 for the trip distance using an emission factor.
@@ -12,10 +22,34 @@ def calculate_co2_grams(vehicle_type: str, distance_km: float) -> float:
     vehicle_type: string like 'Car', 'EV', etc.
     distance_km: trip distance in kilometers
     """
-    factor = EMISSION_FACTORS_G_PER_KM.get(vehicle_type, 120.0)
+    factor = EMISSION_FACTORS_G_PER_KM.get(vehicle_type, DEFAULT_EMISSION_FACTOR_G_PER_KM)
     return float(factor) * float(distance_km)
 
 
+def emission_factors_array(vehicle_types) -> np.ndarray:
+    """Per-trip emission factors (g/km) for an array or pandas column of vehicle types.
+
+    One vectorized comparison per known vehicle type; unknown types keep the
+    default factor, as in `calculate_co2_grams`.
+    """
+    types = np.asarray(vehicle_types)
+    factors = np.full(types.shape, DEFAULT_EMISSION_FACTOR_G_PER_KM, dtype=np.float64)
+    for vehicle, factor in EMISSION_FACTORS_G_PER_KM.items():
+        factors[types == vehicle] = float(factor)
+    return factors
+
+
+def calculate_co2_grams_array(vehicle_types, distances_km) -> np.ndarray:
+    """Vectorized `calculate_co2_grams` over arrays (or pandas columns) of trips.
+
+    Results are identical to calling the scalar function per trip, except that
+    NaN or infinite distances raise ValueError.
+    """
+    distances = np.asarray(distances_km, dtype=np.float64)
+    require_finite("distance_km", distances)
+    return emission_factors_array(vehicle_types) * distances
+
+
 def format_minutes(minutes: float) -> str:
     """Pretty-format a minutes value for display.
 
@@ -0,0 +1,107 @@
+# utils/polyline.py
+"""Encoded-polyline (delta + varint) geometry and zoom-dependent simplification.
+
+Route geometries are sent to the map as Google encoded-polyline strings,
+pre-simplified with Douglas-Peucker at a few zoom-level tolerances so the
+browser only draws what is visible at the current zoom.
+
+Keep this module import-safe (no Streamlit) so tests and the API can use it.
+"""
+import math
+from typing import Dict, List, Sequence, Union
+
+import numpy as np
+
+PRECISION = 5
+
+# zoom level -> Douglas-Peucker tolerance in meters (about one screen pixel at
+# that zoom on campus latitudes); 0 keeps every point
+ZOOM_TOLERANCES_M: Dict[int, float] = {12: 20.0, 14: 5.0, 16: 1.2, 18: 0.0}
+
+_M_PER_DEG_LAT = 110540.0
+_M_PER_DEG_LON = 111320.0
+
+
+def encode(points: Union[Sequence[Sequence[float]], np.ndarray], precision: int = PRECISION) -> str:
+    """Encode ``[(lat, lon), ...]`` as an encoded-polyline string."""
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    if len(pts) == 0:
+        return ""
+    scaled = np.round(pts * (10 ** precision)).astype(np.int64)
+    deltas = np.diff(scaled, axis=0, prepend=np.zeros((1, 2), dtype=np.int64)).ravel()
+    # zigzag: shift left one bit and invert negatives so the sign lands in bit 0
+    values = np.where(deltas < 0, ~(deltas << 1), deltas << 1).tolist()
+    out = []
+    for v in values:
+        while v >= 0x20:
+            out.append(chr((0x20 | (v & 0x1F)) + 63))
+            v >>= 5
+        out.append(chr(v + 63))
+    return "".join(out)
+
+
+def decode(encoded: str, precision: int = PRECISION) -> List[List[float]]:
+    """Decode an encoded-polyline string back to ``[[lat, lon], ...]``."""
+    factor = float(10 ** precision)
+    coords: List[List[float]] = []
+    lat = lon = 0
+    index = 0
+    n = len(encoded)
+    while index < n:
+        deltas = []
+        for _ in range(2):
+            shift = result = 0
+            while True:
+                b = ord(encoded[index]) - 63
+                index += 1
+                result |= (b & 0x1F) << shift
+                shift += 5
+                if b < 0x20:
+                    break
+            deltas.append(~(result >> 1) if result & 1 else result >> 1)
+        lat += deltas[0]
+        lon += deltas[1]
+        coords.append([lat / factor, lon / factor])
+    return coords
+
+
+def simplify(points: Sequence[Sequence[float]], tolerance_m: float) -> np.ndarray:
+    """Douglas-Peucker simplification of ``[(lat, lon), ...]`` with a tolerance in meters.
+
+    Distances are measured in a local equirectangular projection, which is
+    accurate at route scale. Endpoints are always kept.
+    """
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    if tolerance_m <= 0 or len(pts) < 3:
+        return pts
+    coslat = math.cos(math.radians(float(pts[:, 0].mean())))
+    xy = np.column_stack((pts[:, 1] * _M_PER_DEG_LON * coslat, pts[:, 0] * _M_PER_DEG_LAT))
+    keep = np.zeros(len(pts), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(pts) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        a, b = xy[first], xy[last]
+        seg = xy[first + 1:last]
+        ab = b - a
+        length = math.hypot(ab[0], ab[1])
+        if length == 0:
+            d = np.hypot(seg[:, 0] - a[0], seg[:, 1] - a[1])
+        else:
+            d = np.abs(ab[0] * (seg[:, 1] - a[1]) - ab[1] * (seg[:, 0] - a[0])) / length
+        k = int(np.argmax(d))
+        if d[k] > tolerance_m:
+            mid = first + 1 + k
+            keep[mid] = True
+            stack.append((first, mid))
+            stack.append((mid, last))
+    return pts[keep]
+
+
+def encode_levels(points: Sequence[Sequence[float]], tolerances: Dict[int, float] = ZOOM_TOLERANCES_M) -> Dict[str, str]:
+    """Encoded polylines keyed by minimum zoom level (as strings, for JSON)."""
+    if len(points) == 0:
+        return {}
+    return {str(zoom): encode(simplify(points, tol)) for zoom, tol in sorted(tolerances.items())}